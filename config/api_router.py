@@ -1,6 +1,7 @@
 from django.conf import settings
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
+from darcydb.darcy_app.urls import api_urlpatterns
 from darcydb.users.api.views import UserViewSet
 
 if settings.DEBUG:
@@ -12,4 +13,4 @@ router.register("users", UserViewSet)
 
 
 app_name = "api"
-urlpatterns = router.urls
+urlpatterns = router.urls + api_urlpatterns
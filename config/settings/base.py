@@ -1,9 +1,11 @@
 """
 Base settings to build other settings files upon.
 """
+import datetime
 from pathlib import Path
 
 import environ
+from celery.schedules import crontab
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
 # darcydb/
@@ -289,6 +291,17 @@ CELERY_TASK_TIME_LIMIT = 5 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 60
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-scheduler
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-schedule
+CELERY_BEAT_SCHEDULE = {
+    "refresh-regime-statistics": {
+        "task": "darcydb.darcy_app.tasks.refresh_regime_statistics_task",
+        "schedule": crontab(hour=2, minute=30),
+    },
+    "check-regime-quality": {
+        "task": "darcydb.darcy_app.tasks.check_regime_quality_task",
+        "schedule": crontab(hour=3, minute=0),
+    },
+}
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#worker-send-task-events
 CELERY_WORKER_SEND_TASK_EVENTS = True
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std-setting-task_send_sent_event
@@ -383,5 +396,25 @@ AWS_STORAGE_BUCKET_NAME = env("AWS_STORAGE_BUCKET_NAME", default="darcydb-bucket
 AWS_S3_REGION_NAME = env("AWS_S3_REGION_NAME", default="ru-central1")
 AWS_S3_SIGNATURE_VERSION = env("AWS_S3_SIGNATURE_VERSION", default="s3v4")
 DEFAULT_FILE_STORAGE = "myapp.storage_backends.YandexObjectStorage"
+# Multipart-выгрузка в Object Storage: файлы больше порога передаются частями,
+# в памяти одновременно находится не более AWS_S3_MAX_CONCURRENCY частей
+AWS_S3_MULTIPART_THRESHOLD = env.int("AWS_S3_MULTIPART_THRESHOLD", default=8 * 1024 * 1024)
+AWS_S3_MULTIPART_CHUNKSIZE = env.int("AWS_S3_MULTIPART_CHUNKSIZE", default=8 * 1024 * 1024)
+AWS_S3_MAX_CONCURRENCY = env.int("AWS_S3_MAX_CONCURRENCY", default=4)
 
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
+
+# Documents generation
+# ------------------------------------------------------------------------------
+# Каталог заранее скомпилированных шаблонов паспортов и журналов (manage.py compile_doc_templates)
+DOCUMENTS_COMPILED_TEMPLATES_DIR = env("DOCUMENTS_COMPILED_TEMPLATES_DIR", default="")
+# Локальный кэш тайлов OSM и обзорных схем скважин
+DOCUMENTS_CACHE_DIR = env("DOCUMENTS_CACHE_DIR", default=str(BASE_DIR / ".cache" / "documents"))
+# Размер сформированного PDF, до которого он хранится в памяти; больше - во временном файле на диске
+DOCUMENTS_SPOOL_MAX_SIZE = env.int("DOCUMENTS_SPOOL_MAX_SIZE", default=4 * 1024 * 1024)
+# Количество потоков для параллельной подготовки разделов паспорта (адрес, схема, вложения, формулы)
+DOCUMENTS_SECTION_WORKERS = env.int("DOCUMENTS_SECTION_WORKERS", default=4)
+# Срок хранения адресов, полученных обратным геокодированием
+GEOCODE_CACHE_TTL = datetime.timedelta(days=env.int("GEOCODE_CACHE_TTL_DAYS", default=180))
+# Таймаут запроса к nominatim.openstreetmap.org, сек
+GEOCODE_TIMEOUT = env.int("GEOCODE_TIMEOUT", default=10)
@@ -1,11 +1,14 @@
 import datetime
 
 import nested_admin
+from django.contrib import messages
 from django.contrib.admin import DateFieldListFilter, register
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.gis import admin
+from django.db import transaction
 from django.http import HttpResponseRedirect
-from django.utils.safestring import mark_safe
+from django.urls import reverse
+from django.utils.html import format_html
 from import_export.admin import ImportExportModelAdmin
 from jet.admin import CompactInline
 
@@ -14,6 +17,7 @@ from .filters import (
     DictEquipmentTypeFilter,
     DocSourceFilter,
     DocTypeFilter,
+    RegimeQaFlagFilter,
     TypeEfwFilter,
     WellsTypeFilter,
 )
@@ -44,12 +48,14 @@ from .models import (
     DictEntities,
     DictEquipment,
     Documents,
+    DocumentsJob,
     DocumentsPath,
     Entities,
     Fields,
     Intakes,
     License,
     LicenseToWells,
+    RegimeQaFlag,
     WaterUsers,
     WaterUsersChange,
     Wells,
@@ -62,6 +68,7 @@ from .models import (
     WellsDepth,
     WellsDrilledData,
     WellsEfw,
+    WellsEfwAnalysis,
     WellsGeophysics,
     WellsLithology,
     WellsLugHeight,
@@ -103,8 +110,9 @@ from .resources import (
     WellsTemperatureResource,
     WellsWaterDepthResource,
 )
-from .utils.passport_gen import generate_passport
-from .utils.pump_journals_gen import generate_pump_journal
+from .tasks import generate_passport_task, generate_pump_journal_task
+from .utils.packing import pack_depression, unpack_depression
+from .utils.passport_gen import get_passport_document
 
 
 class DarcyAdminArea(admin.AdminSite):
@@ -116,6 +124,64 @@ class DarcyAdminArea(admin.AdminSite):
 darcy_admin = DarcyAdminArea(name="darcy_admin")
 
 
+def documents_job_status(job):
+    """
+    Статус задачи генерации документа со ссылкой на файл, если генерация завершена
+    """
+    if not job:
+        return "-"
+    if job.status == DocumentsJob.DONE:
+        doc_file = DocumentsPath.objects.filter(doc=job.doc_id).last()
+        if doc_file:
+            label = "Скачать паспорт" if job.kind == DocumentsJob.PASSPORT else "Скачать журнал"
+            return format_html('{} <a href="{}">{}</a>', job.get_status_display(), doc_file.path.url, label)
+    if job.status == DocumentsJob.FAILED:
+        return format_html("{}: {}", job.get_status_display(), job.error)
+    return job.get_status_display()
+
+
+def queue_documents_job(model_admin, request, kind, doc_instance, obj, task):
+    """
+    Создает задачу генерации документа и отправляет ее в Celery после фиксации транзакции
+    """
+    job = DocumentsJob.objects.create(kind=kind, doc=doc_instance, content_object=obj)
+    transaction.on_commit(lambda: task.delay(job.pk))
+    job_url = reverse(f"{model_admin.admin_site.name}:darcy_app_documentsjob_change", args=[job.pk])
+    model_admin.message_user(
+        request,
+        format_html(
+            '{} поставлен в очередь на генерацию. <a href="{}">Статус задачи</a>',
+            "Паспорт" if kind == DocumentsJob.PASSPORT else "Журнал",
+            job_url,
+        ),
+    )
+    return job
+
+
+def queue_passports(model_admin, request, wells):
+    """
+    Ставит в очередь генерацию паспортов для набора скважин.
+    Паспорта формируются параллельно рабочими процессами Celery.
+    """
+    jobs = []
+    for well in wells.select_related("typo"):
+        job = DocumentsJob.objects.create(
+            kind=DocumentsJob.PASSPORT, doc=get_passport_document(well), content_object=well
+        )
+        jobs.append(job.pk)
+    transaction.on_commit(lambda: [generate_passport_task.delay(job_id) for job_id in jobs])
+    jobs_url = reverse(f"{model_admin.admin_site.name}:darcy_app_documentsjob_changelist")
+    model_admin.message_user(
+        request,
+        format_html(
+            'В очередь на генерацию поставлено паспортов: {}. <a href="{}?kind__exact={}">Статус задач</a>',
+            len(jobs),
+            jobs_url,
+            DocumentsJob.PASSPORT,
+        ),
+    )
+
+
 @register(ContentType)
 class ContentTypeAdmin(admin.ModelAdmin):
     list_filter = ("model", "app_label")
@@ -287,6 +353,21 @@ class WellsDepressionInline(nested_admin.NestedTabularInline):
     max_num = 1
 
 
+class WellsEfwAnalysisInline(nested_admin.NestedTabularInline):
+    """
+    Inline tab for WellsEfwAnalysis model (read only, filled by analyze_efws)
+    """
+
+    model = WellsEfwAnalysis
+    fields = ("method", "transmissivity", "storativity", "rate", "points", "r2", "computed")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 class WellsEfwInlines(nested_admin.NestedStackedInline):
     """
     Inline tab for WellsEfw  model
@@ -416,24 +497,79 @@ class WellsAdmin(nested_admin.NestedModelAdmin, ImportExportModelAdmin):
         "name_drill",
         "name_subject",
         "comments",
+        "passport_job",
+        "hydrograph",
     )
-    # readonly_fields=('extra',)
+    readonly_fields = ("passport_job", "hydrograph")
     list_display = (
         "id",
         "__str__",
         "typo",
+        "state_water_depth",
+        "state_condition",
+        "state_last_sample",
     )
-    list_filter = (WellsTypeFilter,)
+    list_filter = (WellsTypeFilter, RegimeQaFlagFilter)
     search_fields = (
         "extra",
         "uuid",
     )
 
     list_select_related = ("typo", "moved", "intake", "field")
+    actions = ["generate_passports"]
+
+    @admin.action(description="Сгенерировать паспорта выбранных скважин")
+    def generate_passports(self, request, queryset):
+        queue_passports(self, request, queryset)
+
+    @admin.display(description="Генерация паспорта")
+    def passport_job(self, obj):
+        if not obj.pk:
+            return "-"
+        job = DocumentsJob.objects.filter(
+            kind=DocumentsJob.PASSPORT, content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk
+        ).first()
+        return documents_job_status(job)
+
+    @admin.display(description="Гидрограф")
+    def hydrograph(self, obj):
+        if not obj.pk:
+            return "-"
+        url = reverse("api:wells-hydrograph", args=[obj.pk])
+        return format_html(
+            '<a href="{}?image=png" target="_blank"><img src="{}?image=svg" alt="Гидрограф" '
+            'style="max-width: 800px;" loading="lazy"></a>',
+            url,
+            url,
+        )
+
+    @staticmethod
+    def get_state(obj):
+        # Строка состояния отсутствует у скважины до первого пересчета
+        return getattr(obj, "state", None) if obj.pk else None
+
+    @admin.display(description="Уровень, м", ordering="state__water_depth_date")
+    def state_water_depth(self, obj):
+        state = self.get_state(obj)
+        if state is None or state.water_depth is None:
+            return "-"
+        return f"{state.water_depth} ({state.water_depth_date:%d.%m.%Y})"
+
+    @admin.display(description="Тех. состояние")
+    def state_condition(self, obj):
+        state = self.get_state(obj)
+        return state.condition if state and state.condition else "-"
+
+    @admin.display(description="Последнее опробование", ordering="state__last_sample_date")
+    def state_last_sample(self, obj):
+        state = self.get_state(obj)
+        return state.last_sample_date if state and state.last_sample_date else "-"
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related("typo", "typo__entity", "moved", "moved__entity", "intake", "field").prefetch_related(
+        return qs.select_related(
+            "typo", "typo__entity", "moved", "moved__entity", "intake", "field", "state", "state__condition"
+        ).prefetch_related(
             "docs",
             "docs__typo",
             "docs__source",
@@ -453,18 +589,10 @@ class WellsAdmin(nested_admin.NestedModelAdmin, ImportExportModelAdmin):
     def save_related(self, request, form, formsets, change):
         super().save_related(request, form, formsets, change)
         if "_generate_doc" in request.POST:
-            code = DictEntities.objects.get(entity__name="тип документа", name="Паспорт скважины")
-            doc_instance = form.instance.docs.filter(typo=code).last()
-            if not doc_instance:
-                doc_instance = form.instance.docs.create(
-                    name=f"Паспорт скважины №{form.instance.pk}",
-                    typo=code,
-                    creation_date=datetime.datetime.now().date(),
-                    object_id=form.instance.pk,
-                )
-            generate_passport(form.instance, doc_instance)
-            doc_file = DocumentsPath.objects.filter(doc=doc_instance).last()
-            self.message_user(request, mark_safe(f'Паспорт создан. <a href="{doc_file.path.url}">Скачать паспорт</a>'))
+            doc_instance = get_passport_document(form.instance)
+            queue_documents_job(
+                self, request, DocumentsJob.PASSPORT, doc_instance, form.instance, generate_passport_task
+            )
 
     def response_change(self, request, obj):
         if "_generate_doc" in request.POST:
@@ -490,6 +618,38 @@ class DocumentsAdmin(nested_admin.NestedModelAdmin, ImportExportModelAdmin):
         return super().has_delete_permission(request, obj=obj)
 
 
+@register(DocumentsJob)
+class DocumentsJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "content_object", "status_link", "queued", "started", "finished", "duration")
+    list_filter = ("kind", "status")
+    list_select_related = ("doc", "content_type")
+    readonly_fields = (
+        "kind",
+        "status_link",
+        "doc",
+        "content_type",
+        "object_id",
+        "task_id",
+        "error",
+        "queued",
+        "started",
+        "finished",
+        "duration",
+        "timings",
+    )
+    exclude = ("status",)
+
+    @admin.display(description="Статус")
+    def status_link(self, obj):
+        return documents_job_status(obj)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # Intakes
 # -------------------------------------------------------------------------------
 class WellsInline(CompactInline):
@@ -519,6 +679,11 @@ class IntakesAdmin(ImportExportModelAdmin):
         return False
 
     list_display = ("id", "intake_name", "geom_valid")
+    actions = ["generate_passports"]
+
+    @admin.action(description="Сгенерировать паспорта скважин водозабора")
+    def generate_passports(self, request, queryset):
+        queue_passports(self, request, Wells.objects.filter(intake__in=queryset))
 
 
 # Fields
@@ -555,6 +720,11 @@ class FieldsAdmin(nested_admin.NestedModelAdmin, ImportExportModelAdmin):
     inlines = [DocumentsInline, BalanceInline]
     list_display = ("id", "field_name", "geom_valid")
     search_fields = ("field_name",)
+    actions = ["generate_passports"]
+
+    @admin.action(description="Сгенерировать паспорта скважин месторождения")
+    def generate_passports(self, request, queryset):
+        queue_passports(self, request, Wells.objects.filter(field__in=queryset))
 
 
 # WellsEfw
@@ -565,9 +735,19 @@ class WellsEfwAdmin(nested_admin.NestedModelAdmin, ImportExportModelAdmin):
     change_form_template = "darcy_app/doc_change_form.html"
     form = WellsEfwForm
     model = WellsEfw
-    inlines = [WellsLugHeightInline, WellsWaterDepthDrilledInline, WellsDepressionInline]
+    inlines = [WellsLugHeightInline, WellsWaterDepthDrilledInline, WellsDepressionInline, WellsEfwAnalysisInline]
     list_display = ("id", "well", "date", "type_efw")
     list_filter = ("date", "well", TypeEfwFilter)
+    readonly_fields = ("pump_journal_job",)
+
+    @admin.display(description="Генерация журнала")
+    def pump_journal_job(self, obj):
+        if not obj.pk:
+            return "-"
+        job = DocumentsJob.objects.filter(
+            kind=DocumentsJob.PUMP_JOURNAL, content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk
+        ).first()
+        return documents_job_status(job)
 
     def save_related(self, request, form, formsets, change):
         super().save_related(request, form, formsets, change)
@@ -583,9 +763,9 @@ class WellsEfwAdmin(nested_admin.NestedModelAdmin, ImportExportModelAdmin):
                 )
                 form.instance.doc = doc_instance
                 form.instance.save()
-            generate_pump_journal(form.instance, doc_instance)
-            doc_file = DocumentsPath.objects.filter(doc=doc_instance).last()
-            self.message_user(request, mark_safe(f'Журнал создан.<a href="{doc_file.path.url}">Скачать журнал</a>'))
+            queue_documents_job(
+                self, request, DocumentsJob.PUMP_JOURNAL, doc_instance, form.instance, generate_pump_journal_task
+            )
 
     def response_change(self, request, obj):
         if "_generate_doc" in request.POST:
@@ -619,15 +799,31 @@ class WellsTemperatureInline(nested_admin.NestedGenericTabularInline):
     extra = 0
 
 
+class RegimeQaFlagInline(nested_admin.NestedTabularInline):
+    """
+    Inline tab for RegimeQaFlag model (read only, filled by check_regime_quality)
+    """
+
+    model = RegimeQaFlag
+    fields = ("date", "time_measure", "value", "kind", "score")
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @register(WellsRegime)
 class WellsRegimeAdmin(ImportExportModelAdmin, nested_admin.NestedModelAdmin):
     form = WellsRegimeForm
     model = WellsRegime
-    inlines = [WellsWaterDepthInline, WellsTemperatureInline, WellsRateInline]
+    inlines = [WellsWaterDepthInline, WellsTemperatureInline, WellsRateInline, RegimeQaFlagInline]
     list_display = ("well", "date")
     list_filter = (
         "well",
         ("date", DateFieldListFilter),
+        RegimeQaFlagFilter,
     )
     resource_class = WellsRegimeResource
 
@@ -802,11 +998,33 @@ class WellsDepressionAdmin(ImportExportModelAdmin):
     list_display = (
         "id",
         "efw",
+        "packed",
     )
+    actions = ["pack", "unpack"]
+
+    @admin.display(description="Упакован", boolean=True)
+    def packed(self, obj):
+        return obj.is_packed
+
+    @admin.action(description="Упаковать замеры в массивы")
+    def pack(self, request, queryset):
+        readings = 0
+        for depression in queryset.filter(series_time__isnull=True).prefetch_related("waterdepths", "rates"):
+            try:
+                readings += pack_depression(depression)
+            except ValueError as e:
+                self.message_user(request, f"Журнал {depression} не упакован: {e}", level=messages.WARNING)
+        self.message_user(request, f"Упаковано замеров: {readings}")
+
+    @admin.action(description="Развернуть массивы в строки замеров")
+    def unpack(self, request, queryset):
+        readings = sum(unpack_depression(depression) for depression in queryset.filter(series_time__isnull=False))
+        self.message_user(request, f"Восстановлено замеров: {readings}")
 
 
 darcy_admin.register(Wells, WellsAdmin)
 darcy_admin.register(Documents, DocumentsAdmin)
+darcy_admin.register(DocumentsJob, DocumentsJobAdmin)
 darcy_admin.register(Intakes, IntakesAdmin)
 darcy_admin.register(Fields, FieldsAdmin)
 darcy_admin.register(WellsEfw, WellsEfwAdmin)
@@ -5,3 +5,6 @@ class DarcyAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "darcydb.darcy_app"
     verbose_name = "Ввод данных"
+
+    def ready(self):
+        import darcydb.darcy_app.signals  # noqa: F401
@@ -2,7 +2,7 @@
 
 from django.contrib import admin
 
-from .models import DictDocOrganizations, DictEntities
+from .models import DictDocOrganizations, DictEntities, RegimeQaFlag
 
 __all__ = [
     "WellsTypeFilter",
@@ -11,6 +11,7 @@ __all__ = [
     "DocSourceFilter",
     "DictEquipmentTypeFilter",
     "BalanceTypeFilter",
+    "RegimeQaFlagFilter",
 ]
 
 
@@ -96,3 +97,21 @@ class DocSourceFilter(admin.SimpleListFilter):
             return queryset.filter(source=self.value())
         else:
             return queryset
+
+
+class RegimeQaFlagFilter(admin.SimpleListFilter):
+    """Скважины и режимные наблюдения с замечаниями контроля качества уровней (check_regime_quality)"""
+
+    title = "Контроль качества уровней"
+    parameter_name = "qa_flag"
+
+    def lookups(self, request, model_admin):
+        return (("any", "Есть замечания"),) + RegimeQaFlag.KIND_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value() == "any":
+            return queryset.filter(qa_flags__isnull=False).distinct()
+        elif self.value():
+            return queryset.filter(qa_flags__kind=self.value()).distinct()
+        else:
+            return queryset
@@ -27,6 +27,8 @@ from .models import (
     WellsTemperature,
     WellsWaterDepth,
 )
+from .utils.packing import create_readings, unpack_depression
+from .utils.series import DEPTH_PLACES, RATE_PLACES, Reading, depression_readings, to_decimal
 
 
 class GeoWidget(forms.OSMWidget):
@@ -275,11 +277,73 @@ class WellsLithologyForm(forms.ModelForm):
         return instance
 
 
+# Строк с ошибками, перечисляемых в сообщении формы
+MAX_CSV_ERRORS = 20
+
+
+def parse_depression_csv(csv_file, existing=((), ())):
+    """
+    Разбор CSV журнала ОФР (время замера в минутах, глубина уровня, дебит) без построчного
+    обхода DataFrame. Возвращает ([Reading], [Reading]) уровней и дебитов (pk - номер строки файла),
+    при ошибках разбора - ValidationError с номерами строк. existing - время замеров уровня
+    и дебита, уже записанных в журнал: повтор времени в файле или в журнале - ошибка строки.
+    """
+    columns = ["time_measure", "water_depth", "rate"]
+    # Разделитель (запятая или точка с запятой) определяется по содержимому файла
+    data = pd.read_csv(csv_file, dtype=str, sep=None, engine="python", skipinitialspace=True)
+    if "time_measure" not in data.columns:
+        data = data.iloc[:, :3].set_axis(columns[: min(data.shape[1], 3)], axis=1)
+    data = data.reindex(columns=columns).astype(object)
+    lines = data.index.to_numpy() + 2  # первая строка файла - заголовок
+    raw = data.apply(lambda column: column.str.strip().replace("", np.nan))
+    values = raw.apply(lambda column: pd.to_numeric(column.str.replace(",", "."), errors="coerce"))
+
+    problems = pd.Series("", index=data.index)
+    for column, label, limit in (
+        ("time_measure", "время замера", None),
+        ("water_depth", "глубина уровня", 10**4),
+        ("rate", "дебит", 10**4),
+    ):
+        problems[raw[column].notna() & values[column].isna()] += f"{label} не число; "
+        if limit:
+            problems[values[column].abs() >= limit] += f"{label} вне допустимого диапазона; "
+    has_value = values["water_depth"].notna() | values["rate"].notna()
+    problems[raw["time_measure"].isna() & has_value] += "нет времени замера; "
+    times = pd.to_timedelta(values["time_measure"], unit="m")
+    first_lines = pd.Series(lines, index=data.index)
+    for column, label, journal in (("water_depth", "глубина уровня", existing[0]), ("rate", "дебит", existing[1])):
+        present = times.notna() & values[column].notna()
+        present_times = times.where(present)
+        repeated = present & present_times.duplicated(keep="first")
+        first = first_lines.groupby(present_times).transform("first")
+        problems[repeated] += (
+            f"{label}: время замера повторяет строку " + first[repeated].astype(int).astype(str) + "; "
+        )
+        problems[present & times.isin(list(journal))] += f"{label}: время замера уже есть в журнале; "
+    failed = problems.to_numpy() != ""
+    if failed.any():
+        messages = [f"Строка {line}: {problem.rstrip('; ')}" for line, problem in zip(lines[failed], problems[failed])]
+        if len(messages) > MAX_CSV_ERRORS:
+            messages = messages[:MAX_CSV_ERRORS] + [f"и еще строк с ошибками: {len(messages) - MAX_CSV_ERRORS}"]
+        raise ValidationError(messages)
+
+    readings = []
+    for column, places in (("water_depth", DEPTH_PLACES), ("rate", RATE_PLACES)):
+        present = (times.notna() & values[column].notna()).to_numpy()
+        readings.append(
+            [
+                Reading(int(line), time_measure.to_pytimedelta(), to_decimal(value, places))
+                for line, time_measure, value in zip(lines[present], times[present], values[column][present])
+            ]
+        )
+    return tuple(readings)
+
+
 class WellsDepressionForm(forms.ModelForm):
     csv_file = forms.FileField(
         required=False,
-        label="Импортировать данные с файла",
-        help_text="CSV файл со следующими столбцами: 'time_measure', 'water_depth', 'rate'",
+        label="Импортировать данные с файла",
+        help_text="CSV файл со следующими столбцами: 'time_measure', 'water_depth', 'rate'",
     )
 
     class Meta:
@@ -288,29 +352,29 @@ class WellsDepressionForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.readings = None
+
+    def clean_csv_file(self):
+        csv_file = self.cleaned_data.get("csv_file")
+        if csv_file:
+            existing = ((), ())
+            if self.instance.pk:
+                existing = [{item.time_measure for item in items} for items in depression_readings(self.instance)]
+            try:
+                self.readings = parse_depression_csv(csv_file, existing)
+            except ValueError as e:
+                raise ValidationError(f"Файл не разобран: {e}")
+        return csv_file
 
     def save(self, commit=True):
-        csv_file = self.cleaned_data.pop("csv_file")
+        self.cleaned_data.pop("csv_file")
         instance = super().save(commit=False)
         if commit:
             instance.save()
-            if csv_file:
-                data = pd.read_csv(csv_file)
-                if "time_measure" in data.columns:
-                    data["time_measure"] = pd.to_timedelta(data["time_measure"], unit="m")
-                else:
-                    data = data.iloc[:, 0].str.split(";", expand=True)
-                    data.columns = ["time_measure", "water_depth", "rate", *data.columns[3:]]
-                    data["time_measure"] = pd.to_timedelta(data["time_measure"].astype(float), unit="m")
-                data = data.replace(np.nan, None)
-                for index, row in data.iterrows():
-                    if row["time_measure"] is not None:
-                        if row["water_depth"]:
-                            instance.waterdepths.create(
-                                time_measure=row["time_measure"], water_depth=float(row["water_depth"])
-                            )
-                        if row["rate"]:
-                            instance.rates.create(time_measure=row["time_measure"], rate=float(row["rate"]))
+            if self.readings:
+                # Новые замеры дополняют строки журнала, упакованный журнал сначала разворачивается
+                unpack_depression(instance)
+                create_readings(instance, *self.readings)
         return instance
 
 
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from darcydb.darcy_app.models import WellsEfw
+from darcydb.darcy_app.utils.aquifer_tests import run_analysis
+
+
+class Command(BaseCommand):
+    help = "Пакетная интерпретация ОФР (Купер-Джейкоб, Тейс, восстановление уровня) для опытов с измененными замерами"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--efw", type=int, nargs="*", default=[], help="id ОФР (по умолчанию все)")
+        parser.add_argument("--force", action="store_true", help="Пересчитать и опыты без изменений")
+        parser.add_argument("--chunk-size", type=int, default=500, help="ОФР в одном пакете")
+
+    def handle(self, *args, **options):
+        efws = WellsEfw.objects.all()
+        if options["efw"]:
+            efws = efws.filter(pk__in=options["efw"])
+        analyzed, skipped = run_analysis(efws, force=options["force"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано опытов: {analyzed}, без изменений: {skipped}"))
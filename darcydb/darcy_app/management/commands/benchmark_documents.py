@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from darcydb.darcy_app.utils.benchmark import BENCHMARK_CASES, compare_results, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Замер генерации паспорта и журнала опытной откачки на синтетических скважинах: "
+        "время, количество запросов, пиковая память и размер PDF"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cases", nargs="*", choices=list(BENCHMARK_CASES), default=[], help="Случаи замера")
+        parser.add_argument("--repeat", type=int, default=1, help="Количество повторов каждого замера")
+        parser.add_argument("--output", default="benchmark_documents.json", help="Файл результатов (JSON)")
+        parser.add_argument("--baseline", help="Файл эталонных результатов (JSON) для сравнения")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2, help="Допустимое ухудшение относительно эталона, доля"
+        )
+
+    def handle(self, *args, **options):
+        results = run_benchmark(options["cases"], repeat=options["repeat"], stdout=self.stdout)
+        with open(options["output"], "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        self.stdout.write(f"Результаты записаны в {options['output']}")
+        if not options["baseline"]:
+            return
+        with open(options["baseline"], encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, options["threshold"])
+        for case_name, doc_name, metric, expected, actual in regressions:
+            self.stdout.write(self.style.ERROR(f"{case_name} {doc_name}: {metric} {expected} -> {actual}"))
+        if regressions:
+            raise CommandError(f"Ухудшение показателей относительно {options['baseline']}: {len(regressions)}")
+        self.stdout.write(self.style.SUCCESS("Показатели не хуже эталона"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from darcydb.darcy_app.models import Attachments
+from darcydb.darcy_app.utils.attachments import build_derivatives
+
+
+class Command(BaseCommand):
+    help = "Растрирование вложений: страницы печатного разрешения и миниатюры для уже загруженных файлов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Пересоздать существующие производные")
+
+    def handle(self, *args, **options):
+        failed = 0
+        attachments = Attachments.objects.order_by("pk")
+        for attachment in attachments.iterator():
+            try:
+                build_derivatives(attachment, force=options["force"])
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"{attachment.pk} {attachment}: {e}"))
+        style = self.style.ERROR if failed else self.style.SUCCESS
+        self.stdout.write(style(f"Вложений: {attachments.count()}, с ошибкой: {failed}"))
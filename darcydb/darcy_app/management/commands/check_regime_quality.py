@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from darcydb.darcy_app.models import Wells
+from darcydb.darcy_app.utils.quality import run_quality_checks
+
+
+class Command(BaseCommand):
+    help = "Контроль качества рядов уровней режимных наблюдений (выбросы, ошибки знака и единиц, скачки)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wells", type=int, nargs="*", default=[], help="id скважин (по умолчанию все)")
+        parser.add_argument("--force", action="store_true", help="Проверить и ряды без изменений")
+        parser.add_argument("--chunk-size", type=int, default=200, help="Скважин в одном пакете")
+
+    def handle(self, *args, **options):
+        wells = None
+        if options["wells"]:
+            wells = Wells.objects.filter(pk__in=options["wells"])
+        checked, skipped = run_quality_checks(wells, force=options["force"], chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Проверено рядов: {checked}, без изменений: {skipped}"))
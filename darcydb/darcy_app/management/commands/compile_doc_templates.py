@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from darcydb.darcy_app.utils.renderer import renderer
+
+
+class Command(BaseCommand):
+    help = "Компиляция шаблонов паспортов и журналов ОФР в Python-модули"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            default=settings.DOCUMENTS_COMPILED_TEMPLATES_DIR,
+            help="Каталог для скомпилированных шаблонов (по умолчанию DOCUMENTS_COMPILED_TEMPLATES_DIR)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["target"]:
+            raise CommandError("Укажите --target или DOCUMENTS_COMPILED_TEMPLATES_DIR")
+        target = renderer.compile_templates(options["target"])
+        self.stdout.write(self.style.SUCCESS(f"Шаблоны скомпилированы в {target}"))
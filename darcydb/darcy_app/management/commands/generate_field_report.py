@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from darcydb.darcy_app.models import Fields, Intakes
+from darcydb.darcy_app.utils.field_report_gen import WELLS_PER_VOLUME, generate_field_report
+
+
+class Command(BaseCommand):
+    help = "Сводный отчет (паспорта всех скважин) месторождения или водозабора в одном PDF"
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--field", type=int, help="id месторождения")
+        group.add_argument("--intake", type=int, help="id водозабора")
+        parser.add_argument("--output", required=True, help="Путь к PDF-файлу")
+        parser.add_argument(
+            "--wells-per-volume", type=int, default=WELLS_PER_VOLUME, help="Скважин в одном томе отчета"
+        )
+
+    def handle(self, *args, **options):
+        model, pk = (Fields, options["field"]) if options["field"] else (Intakes, options["intake"])
+        obj = model.objects.filter(pk=pk).first()
+        if obj is None:
+            raise CommandError(f"{model._meta.verbose_name} с id {pk} не найден")
+        timings = {}
+        pages = generate_field_report(
+            obj, options["output"], timings=timings, wells_per_volume=options["wells_per_volume"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Отчет {options['output']}: {pages} стр., этапы: {timings}"))
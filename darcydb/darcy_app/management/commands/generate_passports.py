@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from darcydb.darcy_app.models import Wells
+from darcydb.darcy_app.utils.bulk_gen import render_passports
+
+
+class Command(BaseCommand):
+    help = "Генерация паспортов скважин водозабора или месторождения в пуле процессов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--intake", type=int, nargs="*", default=[], help="id водозаборов")
+        parser.add_argument("--field", type=int, nargs="*", default=[], help="id месторождений")
+        parser.add_argument("--wells", type=int, nargs="*", default=[], help="id скважин")
+        parser.add_argument("--processes", type=int, default=None, help="Количество рабочих процессов")
+        parser.add_argument("--force", action="store_true", help="Сформировать паспорта даже без изменений в данных")
+
+    def handle(self, *args, **options):
+        if not (options["intake"] or options["field"] or options["wells"]):
+            raise CommandError("Укажите --intake, --field или --wells")
+        wells = Wells.objects.none()
+        if options["intake"]:
+            wells |= Wells.objects.filter(intake__in=options["intake"])
+        if options["field"]:
+            wells |= Wells.objects.filter(field__in=options["field"])
+        if options["wells"]:
+            wells |= Wells.objects.filter(pk__in=options["wells"])
+        report = render_passports(
+            wells.distinct().order_by("pk"), processes=options["processes"], stdout=self.stdout, force=options["force"]
+        )
+        style = self.style.ERROR if report.failed else self.style.SUCCESS
+        self.stdout.write(style(str(report)))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from darcydb.darcy_app.models import Wells, WellsDepression
+from darcydb.darcy_app.utils.logger_import import CHUNK_SIZE, PRESSURE_UNITS, LoggerImport, read_logger
+
+
+class Command(BaseCommand):
+    help = (
+        "Импорт файла логгера давления в режимные наблюдения скважины или журнал ОФР "
+        "с барометрической компенсацией и прореживанием"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="CSV-файл логгера")
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument("--well", type=int, help="id скважины (режимные наблюдения)")
+        group.add_argument("--depression", type=int, help="id журнала ОФР")
+        parser.add_argument("--sensor-depth", type=float, required=True, help="Глубина установки датчика, м")
+        parser.add_argument("--baro", help="CSV-файл барометрического логгера")
+        parser.add_argument("--interval", type=float, default=0, help="Интервал прореживания, сек (0 - без него)")
+        parser.add_argument("--units", choices=list(PRESSURE_UNITS), default="kPa", help="Единицы давления")
+        parser.add_argument("--time-column", default="time", help="Столбец времени")
+        parser.add_argument("--pressure-column", default="pressure", help="Столбец давления")
+        parser.add_argument("--time-format", help="Формат времени strftime (по умолчанию ISO 8601)")
+        parser.add_argument("--sep", default=",", help="Разделитель столбцов")
+        parser.add_argument("--decimal", default=".", help="Десятичный разделитель")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Строк в пакете чтения")
+
+    def handle(self, *args, **options):
+        model, pk = (Wells, options["well"]) if options["well"] else (WellsDepression, options["depression"])
+        target = model.objects.filter(pk=pk).first()
+        if target is None:
+            raise CommandError(f"{model._meta.verbose_name} с id {pk} не найден")
+        reader = dict(
+            time_column=options["time_column"],
+            pressure_column=options["pressure_column"],
+            units=options["units"],
+            time_format=options["time_format"],
+            chunk_size=options["chunk_size"],
+            sep=options["sep"],
+            decimal=options["decimal"],
+        )
+        reference = read_logger(options["baro"], **reader) if options["baro"] else None
+        summary = LoggerImport(target, options["sensor_depth"], reference=reference, interval=options["interval"]).run(
+            read_logger(options["file"], **reader)
+        )
+        for reject in summary["rejects"]:
+            self.stderr.write(f"Строка {reject['row']}: {reject['errors']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Замеров в файле: {summary['readings']}, пропущено: {summary['skipped']}, "
+                f"записано: {summary['written']}, уже в журнале: {summary['duplicates']}, "
+                f"отклонено: {summary['rejected']}"
+            )
+        )
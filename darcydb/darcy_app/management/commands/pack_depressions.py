@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from darcydb.darcy_app.models import WellsDepression
+from darcydb.darcy_app.utils.packing import pack_depression, unpack_depression
+
+
+class Command(BaseCommand):
+    help = "Упаковка замеров журналов ОФР в массивы (или обратное развертывание в строки замеров)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--efw", type=int, nargs="*", default=[], help="id ОФР (по умолчанию все)")
+        parser.add_argument("--unpack", action="store_true", help="Развернуть массивы в строки замеров")
+
+    def handle(self, *args, **options):
+        depressions = WellsDepression.objects.order_by("pk")
+        if options["efw"]:
+            depressions = depressions.filter(efw__in=options["efw"])
+        done = readings = 0
+        if options["unpack"]:
+            for depression in depressions.filter(series_time__isnull=False).iterator():
+                readings += unpack_depression(depression)
+                done += 1
+        else:
+            for depression in depressions.filter(series_time__isnull=True).prefetch_related("waterdepths", "rates"):
+                try:
+                    readings += pack_depression(depression)
+                except ValueError as e:
+                    self.stderr.write(f"Журнал {depression.pk}: {e}")
+                    continue
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f"Журналов: {done}, замеров: {readings}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from darcydb.darcy_app.models import Wells
+from darcydb.darcy_app.utils.well_state import rebuild_well_states
+
+
+class Command(BaseCommand):
+    help = "Пересчет таблицы последнего состояния скважин (wells_state) по исходным записям"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wells", type=int, nargs="*", default=[], help="id скважин (по умолчанию все)")
+
+    def handle(self, *args, **options):
+        wells = Wells.objects.all()
+        if options["wells"]:
+            wells = wells.filter(pk__in=options["wells"])
+        count = rebuild_well_states(wells)
+        self.stdout.write(self.style.SUCCESS(f"Скважин: {count}"))
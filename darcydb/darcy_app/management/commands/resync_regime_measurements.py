@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from darcydb.darcy_app.models import WellsRegime
+from darcydb.darcy_app.utils.regime import resync_regimes
+
+
+class Command(BaseCommand):
+    help = "Перезапись таблицы режимных замеров (regime_measurement) по исходным замерам уровня и температуры"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wells", type=int, nargs="*", default=[], help="id скважин (по умолчанию все)")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Режимных наблюдений в одном пакете")
+
+    def handle(self, *args, **options):
+        regimes = WellsRegime.objects.all()
+        if options["wells"]:
+            regimes = regimes.filter(well__in=options["wells"])
+        count = resync_regimes(regimes, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Режимных наблюдений: {count}"))
@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+
+from darcydb.darcy_app.models import WellsConstruction
+from darcydb.darcy_app.utils.dossier import select_constructions
+from darcydb.darcy_app.utils.formula import construction_tex, get_formulas
+
+
+class Command(BaseCommand):
+    help = "Рендеринг формул конструкции всех скважин в кэш formula_cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Количество параллельных процессов KaTeX")
+
+    def handle(self, *args, **options):
+        constructions = WellsConstruction.objects.order_by("well_id", "depth_from").only(
+            "well_id", "date", "diameter", "depth_from", "depth_till"
+        )
+        texs = set()
+        for _, well_constructions in groupby(constructions.iterator(), key=lambda item: item.well_id):
+            well_constructions = list(well_constructions)
+            for archive in (True, False):
+                texs.add(construction_tex(select_constructions(well_constructions, archive)))
+        texs.discard("")
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            formulas = get_formulas(texs, executor=executor)
+        self.stdout.write(self.style.SUCCESS(f"Формул в кэше: {len(formulas)}"))
@@ -0,0 +1,110 @@
+# Generated by Django 4.1.12 on 2026-10-18 10:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("darcy_app", "0028_alter_historicalwellswaterdepth_time_measure_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DocumentsJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("passport", "Паспорт скважины"),
+                            ("pump_journal", "Журнал опытно-фильтрационных работ"),
+                        ],
+                        max_length=20,
+                        verbose_name="Тип документа",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("queued", "В очереди"),
+                            ("running", "Выполняется"),
+                            ("done", "Готово"),
+                            ("failed", "Ошибка"),
+                        ],
+                        db_index=True,
+                        default="queued",
+                        max_length=10,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("object_id", models.PositiveIntegerField()),
+                (
+                    "task_id",
+                    models.CharField(
+                        blank=True,
+                        max_length=50,
+                        null=True,
+                        verbose_name="Идентификатор задачи",
+                    ),
+                ),
+                ("error", models.TextField(blank=True, null=True, verbose_name="Ошибка")),
+                (
+                    "queued",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Поставлена в очередь",
+                    ),
+                ),
+                (
+                    "started",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Начало выполнения"),
+                ),
+                (
+                    "finished",
+                    models.DateTimeField(blank=True, null=True, verbose_name="Окончание выполнения"),
+                ),
+                (
+                    "timings",
+                    models.JSONField(
+                        blank=True,
+                        null=True,
+                        verbose_name="Время выполнения этапов, сек",
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="contenttypes.contenttype",
+                    ),
+                ),
+                (
+                    "doc",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="darcy_app.documents",
+                        verbose_name="Документ",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Генерация документа",
+                "verbose_name_plural": "Генерация документов",
+                "db_table": "documents_job",
+                "ordering": ("-queued",),
+            },
+        ),
+    ]
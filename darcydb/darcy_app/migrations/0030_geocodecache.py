@@ -0,0 +1,47 @@
+# Generated by Django 4.1.12 on 2026-10-18 10:00
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0029_documentsjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeocodeCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("lat", models.DecimalField(decimal_places=4, max_digits=7, verbose_name="Широта")),
+                ("lon", models.DecimalField(decimal_places=4, max_digits=7, verbose_name="Долгота")),
+                (
+                    "geom",
+                    django.contrib.gis.db.models.fields.PointField(
+                        help_text="WGS84", srid=4326, verbose_name="Геометрия"
+                    ),
+                ),
+                ("address", models.JSONField(verbose_name="Адрес")),
+                (
+                    "fetched",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Дата запроса"),
+                ),
+            ],
+            options={
+                "verbose_name": "Адрес по координатам",
+                "verbose_name_plural": "Кэш адресов по координатам",
+                "db_table": "geocode_cache",
+                "unique_together": {("lat", "lon")},
+            },
+        ),
+    ]
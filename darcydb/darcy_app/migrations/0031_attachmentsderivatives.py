@@ -0,0 +1,70 @@
+# Generated by Django 4.1.12 on 2026-10-18 12:00
+
+import darcydb.darcy_app.storage_backends
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0030_geocodecache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttachmentsDerivatives",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("print", "Страница для печати"), ("thumb", "Миниатюра")],
+                        max_length=10,
+                        verbose_name="Тип",
+                    ),
+                ),
+                ("page", models.PositiveSmallIntegerField(default=0, verbose_name="Страница")),
+                (
+                    "file",
+                    models.FileField(
+                        storage=darcydb.darcy_app.storage_backends.YandexObjectStorage(),
+                        upload_to="images/derivatives/",
+                        verbose_name="Файл",
+                    ),
+                ),
+                (
+                    "fingerprint",
+                    models.CharField(max_length=40, verbose_name="Контрольная сумма исходного файла"),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Дата создания"),
+                ),
+                (
+                    "attachment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="derivatives",
+                        to="darcy_app.attachments",
+                        verbose_name="Вложение",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Производная вложения",
+                "verbose_name_plural": "Производные вложений",
+                "db_table": "attachments_derivatives",
+                "ordering": ("attachment", "kind", "page"),
+                "unique_together": {("attachment", "kind", "page")},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.1.12 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0031_attachmentsderivatives"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="documents",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Заполняется при генерации документа",
+                max_length=40,
+                null=True,
+                verbose_name="Контрольная сумма исходных данных",
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicaldocuments",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text="Заполняется при генерации документа",
+                max_length=40,
+                null=True,
+                verbose_name="Контрольная сумма исходных данных",
+            ),
+        ),
+    ]
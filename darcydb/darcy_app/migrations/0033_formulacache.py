@@ -0,0 +1,40 @@
+# Generated by Django 4.1.12 on 2026-10-18 16:00
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0032_documents_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FormulaCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=40, unique=True, verbose_name="Ключ")),
+                ("latex", models.TextField(verbose_name="Формула LaTeX")),
+                ("katex_version", models.CharField(max_length=30, verbose_name="Версия KaTeX")),
+                ("html", models.TextField(verbose_name="HTML")),
+                (
+                    "created",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Дата создания"),
+                ),
+            ],
+            options={
+                "verbose_name": "Формула конструкции",
+                "verbose_name_plural": "Кэш формул конструкции",
+                "db_table": "formula_cache",
+            },
+        ),
+    ]
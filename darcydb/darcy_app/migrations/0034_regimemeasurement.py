@@ -0,0 +1,102 @@
+# Generated by Django 4.1.12 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+CREATE_TABLE = """
+CREATE TABLE regime_measurement (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    well_id bigint NOT NULL REFERENCES wells (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+    regime_id bigint NOT NULL REFERENCES wells_regime (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+    date date NOT NULL,
+    time_measure interval NULL,
+    parameter smallint NOT NULL CHECK (parameter >= 0),
+    value numeric(6, 2) NOT NULL,
+    source_id integer NOT NULL CHECK (source_id >= 0),
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+
+DO $$
+DECLARE
+    year integer;
+BEGIN
+    FOR year IN
+        SELECT DISTINCT extract(year FROM date)::integer FROM wells_regime
+        UNION SELECT extract(year FROM now())::integer
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE regime_measurement_%s PARTITION OF regime_measurement FOR VALUES FROM (%L) TO (%L)',
+            year, make_date(year, 1, 1), make_date(year + 1, 1, 1)
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO regime_measurement (well_id, regime_id, date, time_measure, parameter, value, source_id)
+SELECT r.well_id, r.id, r.date, m.time_measure, 1, m.water_depth, m.id
+FROM wells_regime r
+JOIN wells_water_depth m ON m.object_id = r.id
+JOIN django_content_type ct ON ct.id = m.content_type_id AND ct.app_label = 'darcy_app' AND ct.model = 'wellsregime'
+UNION ALL
+SELECT r.well_id, r.id, r.date, t.time_measure, 2, t.temperature, t.id
+FROM wells_regime r
+JOIN wells_temperature t ON t.object_id = r.id
+JOIN django_content_type ct ON ct.id = t.content_type_id AND ct.app_label = 'darcy_app' AND ct.model = 'wellsregime';
+
+CREATE INDEX regime_measurement_well_idx ON regime_measurement (well_id, parameter, date, time_measure);
+CREATE INDEX regime_measurement_regime_idx ON regime_measurement (regime_id);
+CREATE INDEX regime_measurement_date_brin ON regime_measurement USING brin (date);
+ANALYZE regime_measurement;
+"""
+
+DROP_TABLE = "DROP TABLE regime_measurement;"
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("darcy_app", "0033_formulacache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RegimeMeasurement",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("date", models.DateField(verbose_name="Дата замера")),
+                ("time_measure", models.DurationField(blank=True, null=True, verbose_name="Время замера")),
+                (
+                    "parameter",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Глубина подземных вод, м"), (2, "Температура, ℃")],
+                        verbose_name="Параметр",
+                    ),
+                ),
+                ("value", models.DecimalField(decimal_places=2, max_digits=6, verbose_name="Значение")),
+                ("source_id", models.PositiveIntegerField(verbose_name="id исходного замера")),
+                (
+                    "regime",
+                    models.ForeignKey(
+                        on_delete=models.deletion.DO_NOTHING,
+                        related_name="measurements",
+                        to="darcy_app.wellsregime",
+                        verbose_name="Режимное наблюдение",
+                    ),
+                ),
+                (
+                    "well",
+                    models.ForeignKey(
+                        on_delete=models.deletion.DO_NOTHING,
+                        to="darcy_app.wells",
+                        verbose_name="Номер скважины",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Режимный замер",
+                "verbose_name_plural": "Режимные замеры",
+                "db_table": "regime_measurement",
+                "ordering": ("date", "time_measure"),
+                "managed": False,
+            },
+        ),
+        migrations.RunSQL(CREATE_TABLE, DROP_TABLE),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.1.12 on 2026-10-18 16:00
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0034_regimemeasurement"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="wellsdepression",
+            name="series_depth",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(null=True),
+                blank=True,
+                editable=False,
+                null=True,
+                size=None,
+                verbose_name="Глубина уровня, м",
+            ),
+        ),
+        migrations.AddField(
+            model_name="wellsdepression",
+            name="series_rate",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(null=True),
+                blank=True,
+                editable=False,
+                null=True,
+                size=None,
+                verbose_name="Дебит, л/с",
+            ),
+        ),
+        migrations.AddField(
+            model_name="wellsdepression",
+            name="series_time",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.FloatField(),
+                blank=True,
+                editable=False,
+                null=True,
+                size=None,
+                verbose_name="Время замеров, сек",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.1.12 on 2026-10-18 16:00
+
+from django.db import migrations
+
+CREATE_VIEWS = """
+CREATE MATERIALIZED VIEW regime_level_monthly AS
+SELECT well_id, date_trunc('month', date)::date AS period,
+       min(value) AS min_value, round(avg(value), 3) AS mean_value, max(value) AS max_value, count(*) AS readings
+FROM regime_measurement
+WHERE parameter = 1
+GROUP BY well_id, date_trunc('month', date)::date;
+
+CREATE UNIQUE INDEX regime_level_monthly_well_period ON regime_level_monthly (well_id, period);
+
+CREATE MATERIALIZED VIEW regime_level_yearly AS
+SELECT well_id, date_trunc('year', date)::date AS period,
+       min(value) AS min_value, round(avg(value), 3) AS mean_value, max(value) AS max_value, count(*) AS readings
+FROM regime_measurement
+WHERE parameter = 1
+GROUP BY well_id, date_trunc('year', date)::date;
+
+CREATE UNIQUE INDEX regime_level_yearly_well_period ON regime_level_yearly (well_id, period);
+"""
+
+DROP_VIEWS = """
+DROP MATERIALIZED VIEW regime_level_yearly;
+DROP MATERIALIZED VIEW regime_level_monthly;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0035_wellsdepression_series"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_VIEWS, DROP_VIEWS),
+    ]
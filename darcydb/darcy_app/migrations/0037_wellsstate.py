@@ -0,0 +1,88 @@
+# Generated by Django 4.1.12 on 2026-10-18 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0036_regime_level_statistics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WellsState",
+            fields=[
+                (
+                    "well",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="state",
+                        serialize=False,
+                        to="darcy_app.wells",
+                        verbose_name="Скважина",
+                    ),
+                ),
+                (
+                    "water_depth",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=6, null=True, verbose_name="Глубина подземных вод, м"
+                    ),
+                ),
+                ("water_depth_date", models.DateField(blank=True, null=True, verbose_name="Дата замера уровня")),
+                (
+                    "depth",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=6, null=True, verbose_name="Глубина, м"
+                    ),
+                ),
+                ("depth_date", models.DateField(blank=True, null=True, verbose_name="Дата замера глубины")),
+                ("condition_date", models.DateField(blank=True, null=True, verbose_name="Дата тех. состояния")),
+                (
+                    "last_sample_date",
+                    models.DateField(blank=True, null=True, verbose_name="Дата последнего опробования"),
+                ),
+                ("last_efw_date", models.DateTimeField(blank=True, null=True, verbose_name="Дата последних ОФР")),
+                ("updated", models.DateTimeField(auto_now=True, verbose_name="Обновлено")),
+                (
+                    "condition",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="darcy_app.dictentities",
+                        verbose_name="Тех. состояние",
+                    ),
+                ),
+                (
+                    "last_efw",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="darcy_app.wellsefw",
+                        verbose_name="Последние ОФР",
+                    ),
+                ),
+                (
+                    "last_sample",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="darcy_app.wellssample",
+                        verbose_name="Последняя проба",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Состояние скважины",
+                "verbose_name_plural": "Состояние скважин",
+                "db_table": "wells_state",
+            },
+        ),
+    ]
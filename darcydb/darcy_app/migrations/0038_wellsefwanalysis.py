@@ -0,0 +1,52 @@
+# Generated by Django 4.1.12 on 2026-10-18 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0037_wellsstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WellsEfwAnalysis",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "method",
+                    models.PositiveSmallIntegerField(
+                        choices=[(1, "Купер-Джейкоб"), (2, "Тейс"), (3, "Восстановление уровня (Тейс)")],
+                        verbose_name="Метод",
+                    ),
+                ),
+                (
+                    "transmissivity",
+                    models.FloatField(blank=True, null=True, verbose_name="Водопроводимость, м2/сут"),
+                ),
+                ("storativity", models.FloatField(blank=True, null=True, verbose_name="Упругая водоотдача")),
+                ("rate", models.FloatField(blank=True, null=True, verbose_name="Дебит, м3/сут")),
+                ("points", models.PositiveIntegerField(default=0, verbose_name="Замеров в интерпретации")),
+                ("r2", models.FloatField(blank=True, null=True, verbose_name="Коэффициент детерминации")),
+                ("fingerprint", models.CharField(max_length=40, verbose_name="Контрольная сумма замеров")),
+                ("computed", models.DateTimeField(auto_now=True, verbose_name="Дата расчета")),
+                (
+                    "efw",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="analyses",
+                        to="darcy_app.wellsefw",
+                        verbose_name="ОФР",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Интерпретация ОФР",
+                "verbose_name_plural": "Интерпретация ОФР",
+                "db_table": "wells_efw_analysis",
+                "ordering": ("efw", "method"),
+                "unique_together": {("efw", "method")},
+            },
+        ),
+    ]
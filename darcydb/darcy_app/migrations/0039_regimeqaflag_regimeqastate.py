@@ -0,0 +1,95 @@
+# Generated by Django 4.1.12 on 2026-10-18 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0038_wellsefwanalysis"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RegimeQaFlag",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="Дата замера")),
+                ("time_measure", models.DurationField(blank=True, null=True, verbose_name="Время замера")),
+                (
+                    "value",
+                    models.DecimalField(decimal_places=2, max_digits=6, verbose_name="Глубина подземных вод, м"),
+                ),
+                (
+                    "kind",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (1, "Выброс"),
+                            (2, "Ошибка знака"),
+                            (3, "Ошибка единиц измерения"),
+                            (4, "Скачок уровня"),
+                        ],
+                        verbose_name="Замечание",
+                    ),
+                ),
+                ("score", models.FloatField(verbose_name="Отклонение, в единицах разброса ряда")),
+                (
+                    "regime",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="qa_flags",
+                        to="darcy_app.wellsregime",
+                        verbose_name="Режимное наблюдение",
+                    ),
+                ),
+                (
+                    "water_depth",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="qa_flags",
+                        to="darcy_app.wellswaterdepth",
+                        verbose_name="Замер уровня",
+                    ),
+                ),
+                (
+                    "well",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="qa_flags",
+                        to="darcy_app.wells",
+                        verbose_name="Скважина",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Замечание контроля качества",
+                "verbose_name_plural": "Замечания контроля качества",
+                "db_table": "regime_qa_flag",
+                "ordering": ("well", "date", "time_measure"),
+            },
+        ),
+        migrations.CreateModel(
+            name="RegimeQaState",
+            fields=[
+                (
+                    "well",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="qa_state",
+                        serialize=False,
+                        to="darcy_app.wells",
+                        verbose_name="Скважина",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=40, verbose_name="Контрольная сумма замеров")),
+                ("flags", models.PositiveIntegerField(default=0, verbose_name="Замечаний")),
+                ("checked", models.DateTimeField(auto_now=True, verbose_name="Дата проверки")),
+            ],
+            options={
+                "verbose_name": "Контроль качества уровней",
+                "verbose_name_plural": "Контроль качества уровней",
+                "db_table": "regime_qa_state",
+            },
+        ),
+    ]
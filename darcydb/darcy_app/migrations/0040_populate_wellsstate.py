@@ -0,0 +1,20 @@
+# Generated by Django 4.1.12 on 2026-10-18 16:00
+
+from django.db import migrations
+
+
+def populate_well_states(apps, schema_editor):
+    # Состояние считается той же функцией, что и при обновлении сигналами
+    from darcydb.darcy_app.utils.well_state import rebuild_well_states
+
+    rebuild_well_states()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("darcy_app", "0039_regimeqaflag_regimeqastate"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_well_states, migrations.RunPython.noop),
+    ]
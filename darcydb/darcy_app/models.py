@@ -8,6 +8,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.gis.db import models
+from django.contrib.postgres.fields import ArrayField
 from django.core.files.storage import FileSystemStorage
 from django.utils import timezone
 from django.utils.safestring import mark_safe
@@ -23,8 +24,12 @@ __all__ = [
     "DictDocOrganizations",
     "Documents",
     "DocumentsPath",
+    "DocumentsJob",
+    "GeocodeCache",
+    "FormulaCache",
     "AquiferCodes",
     "Wells",
+    "WellsState",
     "WellsAquiferUsage",
     "Intakes",
     "WellsRegime",
@@ -33,6 +38,9 @@ __all__ = [
     "WellsWaterDepth",
     "WellsRate",
     "WellsTemperature",
+    "RegimeMeasurement",
+    "RegimeQaFlag",
+    "RegimeQaState",
     "WellsDepth",
     "WellsCondition",
     "WellsLugHeight",
@@ -41,12 +49,14 @@ __all__ = [
     "WellsConstruction",
     "WellsEfw",
     "WellsDepression",
+    "WellsEfwAnalysis",
     "WellsSample",
     "ChemCodes",
     "WellsChem",
     "Fields",
     "Balance",
     "Attachments",
+    "AttachmentsDerivatives",
     "License",
     "LicenseToWells",
     "WaterUsers",
@@ -179,7 +189,7 @@ class Documents(BaseModel):
     документов, а также универсальный внешний ключ для связи с различными
     типами связанных объектов.
     fields = ["id", "name", "typo", "source", "org_executor", "org_customer", "creation_date", "creation_place",
-    "number_rgf", "number_tfgi", "authors", "links", "content_type", "object_id"]
+    "number_rgf", "number_tfgi", "authors", "links", "content_type", "object_id", "fingerprint"]
     """
 
     name = models.CharField(max_length=1200, verbose_name="Название документа")
@@ -222,6 +232,14 @@ class Documents(BaseModel):
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, blank=True, null=True)
     object_id = models.PositiveIntegerField(blank=True, null=True)
     content_object = GenericForeignKey()
+    fingerprint = models.CharField(
+        max_length=40,
+        editable=False,
+        blank=True,
+        null=True,
+        verbose_name="Контрольная сумма исходных данных",
+        help_text="Заполняется при генерации документа",
+    )
     history = HistoricalRecords(table_name="documents_history")
 
     class Meta:
@@ -296,6 +314,130 @@ class DocumentsPath(BaseModel):
     presigned_url = property(generate_presigned_url)
 
 
+class DocumentsJob(models.Model):
+    """
+    Задача фоновой генерации документа (паспорт скважины, журнал ОФР).
+    Хранит статус выполнения, время постановки в очередь, начала и окончания,
+    а также текст ошибки, если генерация завершилась неудачно.
+    fields = ["id", "kind", "status", "doc", "content_type", "object_id", "task_id", "error",
+    "queued", "started", "finished", "timings"]
+    """
+
+    PASSPORT = "passport"
+    PUMP_JOURNAL = "pump_journal"
+    KIND_CHOICES = (
+        (PASSPORT, "Паспорт скважины"),
+        (PUMP_JOURNAL, "Журнал опытно-фильтрационных работ"),
+    )
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, "В очереди"),
+        (RUNNING, "Выполняется"),
+        (DONE, "Готово"),
+        (FAILED, "Ошибка"),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Тип документа")
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=QUEUED, db_index=True, verbose_name="Статус"
+    )
+    doc = models.ForeignKey("Documents", models.CASCADE, verbose_name="Документ")
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey()
+    task_id = models.CharField(max_length=50, blank=True, null=True, verbose_name="Идентификатор задачи")
+    error = models.TextField(blank=True, null=True, verbose_name="Ошибка")
+    queued = models.DateTimeField(default=timezone.now, verbose_name="Поставлена в очередь")
+    started = models.DateTimeField(blank=True, null=True, verbose_name="Начало выполнения")
+    finished = models.DateTimeField(blank=True, null=True, verbose_name="Окончание выполнения")
+    timings = models.JSONField(blank=True, null=True, verbose_name="Время выполнения этапов, сек")
+
+    class Meta:
+        verbose_name = "Генерация документа"
+        verbose_name_plural = "Генерация документов"
+        db_table = "documents_job"
+        ordering = ("-queued",)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.doc_id} ({self.get_status_display()})"
+
+    @property
+    def duration(self):
+        if self.started and self.finished:
+            return self.finished - self.started
+
+    def mark_running(self, task_id=None):
+        self.status = self.RUNNING
+        self.task_id = task_id
+        self.started = timezone.now()
+        self.save(update_fields=["status", "task_id", "started"])
+
+    def mark_done(self, timings=None):
+        self.status = self.DONE
+        self.finished = timezone.now()
+        self.timings = timings
+        self.save(update_fields=["status", "finished", "timings"])
+
+    def mark_failed(self, error):
+        self.status = self.FAILED
+        self.finished = timezone.now()
+        self.error = str(error)
+        self.save(update_fields=["status", "finished", "error"])
+
+
+class GeocodeCache(models.Model):
+    """
+    Кэш обратного геокодирования (Nominatim).
+    Ключ - координаты, округленные до 4 знаков (около 10 м).
+    fields = ["id", "lat", "lon", "geom", "address", "fetched"]
+    """
+
+    lat = models.DecimalField(max_digits=7, decimal_places=4, verbose_name="Широта")
+    lon = models.DecimalField(max_digits=7, decimal_places=4, verbose_name="Долгота")
+    geom = models.PointField(srid=4326, verbose_name="Геометрия", help_text="WGS84")
+    address = models.JSONField(verbose_name="Адрес")
+    fetched = models.DateTimeField(default=timezone.now, verbose_name="Дата запроса")
+
+    class Meta:
+        verbose_name = "Адрес по координатам"
+        verbose_name_plural = "Кэш адресов по координатам"
+        db_table = "geocode_cache"
+        unique_together = (("lat", "lon"),)
+
+    def __str__(self):
+        return f"{self.lat}, {self.lon}"
+
+    @property
+    def is_fresh(self):
+        return timezone.now() - self.fetched < settings.GEOCODE_CACHE_TTL
+
+
+class FormulaCache(models.Model):
+    """
+    Кэш HTML формул конструкции скважины, отрендеренных KaTeX.
+    Ключ - sha1 версии markdown-katex и исходной формулы LaTeX.
+    fields = ["id", "key", "latex", "katex_version", "html", "created"]
+    """
+
+    key = models.CharField(max_length=40, unique=True, verbose_name="Ключ")
+    latex = models.TextField(verbose_name="Формула LaTeX")
+    katex_version = models.CharField(max_length=30, verbose_name="Версия KaTeX")
+    html = models.TextField(verbose_name="HTML")
+    created = models.DateTimeField(default=timezone.now, verbose_name="Дата создания")
+
+    class Meta:
+        verbose_name = "Формула конструкции"
+        verbose_name_plural = "Кэш формул конструкции"
+        db_table = "formula_cache"
+
+    def __str__(self):
+        return self.latex
+
+
 class AquiferCodes(models.Model):
     """
     Гидрогеологическое подразделение
@@ -372,6 +514,48 @@ class Wells(BaseModel):
             return f"well {self.pk}"
 
 
+class WellsState(models.Model):
+    """
+    Последнее состояние скважины: уровень и глубина по последнему замеру,
+    техническое состояние, последние опробование и ОФР. Денормализованная
+    таблица, обновляется сигналами при изменении исходных записей
+    (utils/well_state.py) и пересобирается командой rebuild_well_states.
+    fields = ["well", "water_depth", "water_depth_date", "depth", "depth_date", "condition", "condition_date",
+              "last_sample", "last_sample_date", "last_efw", "last_efw_date", "updated"]
+    """
+
+    well = models.OneToOneField(
+        "Wells", models.CASCADE, primary_key=True, related_name="state", verbose_name="Скважина"
+    )
+    water_depth = models.DecimalField(
+        max_digits=6, decimal_places=2, blank=True, null=True, verbose_name="Глубина подземных вод, м"
+    )
+    water_depth_date = models.DateField(blank=True, null=True, verbose_name="Дата замера уровня")
+    depth = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True, verbose_name="Глубина, м")
+    depth_date = models.DateField(blank=True, null=True, verbose_name="Дата замера глубины")
+    condition = models.ForeignKey(
+        "DictEntities", models.SET_NULL, blank=True, null=True, related_name="+", verbose_name="Тех. состояние"
+    )
+    condition_date = models.DateField(blank=True, null=True, verbose_name="Дата тех. состояния")
+    last_sample = models.ForeignKey(
+        "WellsSample", models.SET_NULL, blank=True, null=True, related_name="+", verbose_name="Последняя проба"
+    )
+    last_sample_date = models.DateField(blank=True, null=True, verbose_name="Дата последнего опробования")
+    last_efw = models.ForeignKey(
+        "WellsEfw", models.SET_NULL, blank=True, null=True, related_name="+", verbose_name="Последние ОФР"
+    )
+    last_efw_date = models.DateTimeField(blank=True, null=True, verbose_name="Дата последних ОФР")
+    updated = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    class Meta:
+        verbose_name = "Состояние скважины"
+        verbose_name_plural = "Состояние скважин"
+        db_table = "wells_state"
+
+    def __str__(self):
+        return f"{self.well} {self.water_depth_date or ''}"
+
+
 class WellsAquiferUsage(BaseModel):
     """
     Целевой водоносный горизонт скважины
@@ -588,6 +772,112 @@ class WellsTemperature(BaseModel):
         return ""
 
 
+class RegimeMeasurement(models.Model):
+    """
+    Режимные замеры уровня и температуры подземных вод для чтения временных рядов.
+    Таблица секционирована по дате замера (по годам) и заполняется из WellsWaterDepth и
+    WellsTemperature режимных наблюдений (utils/regime.py); создается миграцией 0034.
+    Источник истины - исходные таблицы wells_water_depth и wells_temperature: таблица обновляется
+    сигналами, после записей в обход сигналов (update(), SQL, loaddata --raw) ее перестраивает
+    команда resync_regime_measurements.
+    fields = ["id", "well", "regime", "date", "time_measure", "parameter", "value", "source_id"]
+    """
+
+    LEVEL = 1
+    TEMPERATURE = 2
+    PARAMETERS = (
+        (LEVEL, "Глубина подземных вод, м"),
+        (TEMPERATURE, "Температура, ℃"),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    well = models.ForeignKey("Wells", models.DO_NOTHING, verbose_name="Номер скважины")
+    regime = models.ForeignKey(
+        "WellsRegime", models.DO_NOTHING, related_name="measurements", verbose_name="Режимное наблюдение"
+    )
+    date = models.DateField(verbose_name="Дата замера")
+    time_measure = models.DurationField(verbose_name="Время замера", blank=True, null=True)
+    parameter = models.PositiveSmallIntegerField(choices=PARAMETERS, verbose_name="Параметр")
+    value = models.DecimalField(max_digits=6, decimal_places=2, verbose_name="Значение")
+    source_id = models.PositiveIntegerField(verbose_name="id исходного замера")
+
+    class Meta:
+        managed = False
+        verbose_name = "Режимный замер"
+        verbose_name_plural = "Режимные замеры"
+        db_table = "regime_measurement"
+        ordering = ("date", "time_measure")
+
+    def __str__(self):
+        return f"{self.well} {self.date} {self.get_parameter_display()}: {self.value}"
+
+
+class RegimeQaFlag(models.Model):
+    """
+    Замечание контроля качества к замеру уровня режимного наблюдения: выброс,
+    ошибка знака, ошибка единиц измерения (см вместо м) или скачок уровня.
+    Заполняется ночной проверкой рядов (utils/quality.py), пересчитывается
+    только для скважин с изменившимися замерами.
+    fields = ["id", "well", "regime", "water_depth", "date", "time_measure", "value", "kind", "score"]
+    """
+
+    SPIKE = 1
+    SIGN = 2
+    SCALE = 3
+    STEP = 4
+    KIND_CHOICES = (
+        (SPIKE, "Выброс"),
+        (SIGN, "Ошибка знака"),
+        (SCALE, "Ошибка единиц измерения"),
+        (STEP, "Скачок уровня"),
+    )
+
+    well = models.ForeignKey("Wells", models.CASCADE, related_name="qa_flags", verbose_name="Скважина")
+    regime = models.ForeignKey(
+        "WellsRegime", models.CASCADE, related_name="qa_flags", verbose_name="Режимное наблюдение"
+    )
+    water_depth = models.ForeignKey(
+        "WellsWaterDepth", models.CASCADE, related_name="qa_flags", verbose_name="Замер уровня"
+    )
+    date = models.DateField(verbose_name="Дата замера")
+    time_measure = models.DurationField(verbose_name="Время замера", blank=True, null=True)
+    value = models.DecimalField(max_digits=6, decimal_places=2, verbose_name="Глубина подземных вод, м")
+    kind = models.PositiveSmallIntegerField(choices=KIND_CHOICES, verbose_name="Замечание")
+    score = models.FloatField(verbose_name="Отклонение, в единицах разброса ряда")
+
+    class Meta:
+        verbose_name = "Замечание контроля качества"
+        verbose_name_plural = "Замечания контроля качества"
+        db_table = "regime_qa_flag"
+        ordering = ("well", "date", "time_measure")
+
+    def __str__(self):
+        return f"{self.well} {self.date} {self.get_kind_display()}: {self.value}"
+
+
+class RegimeQaState(models.Model):
+    """
+    Состояние контроля качества ряда уровней скважины: контрольная сумма замеров
+    на момент последней проверки, по которой пропускаются неизмененные ряды.
+    fields = ["well", "fingerprint", "flags", "checked"]
+    """
+
+    well = models.OneToOneField(
+        "Wells", models.CASCADE, primary_key=True, related_name="qa_state", verbose_name="Скважина"
+    )
+    fingerprint = models.CharField(max_length=40, verbose_name="Контрольная сумма замеров")
+    flags = models.PositiveIntegerField(default=0, verbose_name="Замечаний")
+    checked = models.DateTimeField(auto_now=True, verbose_name="Дата проверки")
+
+    class Meta:
+        verbose_name = "Контроль качества уровней"
+        verbose_name_plural = "Контроль качества уровней"
+        db_table = "regime_qa_state"
+
+    def __str__(self):
+        return f"{self.well} {self.checked:%Y-%m-%d}"
+
+
 class WellsDepth(BaseModel):
     """
     Модель для представления замеров глубины скважин. Содержит значения глубины
@@ -885,13 +1175,26 @@ class WellsDepression(BaseModel):
     Модель журнала опытно-фильтрационных работ (ОФР).
     Содержит информацию о времени замера динамического уровня и
     значениях динамического уровня.
-    fields = ["id", "efw", "waterdepths", "rates"]
+    Замеры хранятся либо строками waterdepths/rates, либо упакованными
+    в массивы series_* (utils/packing.py: pack_depression/unpack_depression).
+    fields = ["id", "efw", "waterdepths", "rates", "series_time", "series_depth", "series_rate"]
     """
 
+    SERIES_FIELDS = ["series_time", "series_depth", "series_rate"]
+
     efw = models.ForeignKey("WellsEfw", models.CASCADE)
     waterdepths = GenericRelation("WellsWaterDepth")
     rates = GenericRelation("WellsRate")
-    history = HistoricalRecords(table_name="wells_depression_history")
+    series_time = ArrayField(
+        models.FloatField(), blank=True, null=True, editable=False, verbose_name="Время замеров, сек"
+    )
+    series_depth = ArrayField(
+        models.FloatField(null=True), blank=True, null=True, editable=False, verbose_name="Глубина уровня, м"
+    )
+    series_rate = ArrayField(
+        models.FloatField(null=True), blank=True, null=True, editable=False, verbose_name="Дебит, л/с"
+    )
+    history = HistoricalRecords(table_name="wells_depression_history", excluded_fields=SERIES_FIELDS)
 
     class Meta:
         verbose_name = "Журнал ОФР"
@@ -902,6 +1205,50 @@ class WellsDepression(BaseModel):
     def __str__(self):
         return str(self.pk)
 
+    @property
+    def is_packed(self):
+        return self.series_time is not None
+
+
+class WellsEfwAnalysis(models.Model):
+    """
+    Результат интерпретации ОФР: водопроводимость и пьезопроводность (упругая
+    водоотдача) по методу Купера-Джейкоба, Тейса или по восстановлению уровня.
+    Пересчитывается пакетно (utils/aquifer_tests.py), fingerprint - контрольная
+    сумма исходных замеров, по которой пропускаются неизмененные опыты.
+    fields = ["id", "efw", "method", "transmissivity", "storativity", "rate", "points", "r2", "fingerprint",
+              "computed"]
+    """
+
+    COOPER_JACOB = 1
+    THEIS = 2
+    RECOVERY = 3
+    METHOD_CHOICES = (
+        (COOPER_JACOB, "Купер-Джейкоб"),
+        (THEIS, "Тейс"),
+        (RECOVERY, "Восстановление уровня (Тейс)"),
+    )
+
+    efw = models.ForeignKey("WellsEfw", models.CASCADE, related_name="analyses", verbose_name="ОФР")
+    method = models.PositiveSmallIntegerField(choices=METHOD_CHOICES, verbose_name="Метод")
+    transmissivity = models.FloatField(blank=True, null=True, verbose_name="Водопроводимость, м2/сут")
+    storativity = models.FloatField(blank=True, null=True, verbose_name="Упругая водоотдача")
+    rate = models.FloatField(blank=True, null=True, verbose_name="Дебит, м3/сут")
+    points = models.PositiveIntegerField(default=0, verbose_name="Замеров в интерпретации")
+    r2 = models.FloatField(blank=True, null=True, verbose_name="Коэффициент детерминации")
+    fingerprint = models.CharField(max_length=40, verbose_name="Контрольная сумма замеров")
+    computed = models.DateTimeField(auto_now=True, verbose_name="Дата расчета")
+
+    class Meta:
+        verbose_name = "Интерпретация ОФР"
+        verbose_name_plural = "Интерпретация ОФР"
+        db_table = "wells_efw_analysis"
+        unique_together = (("efw", "method"),)
+        ordering = ("efw", "method")
+
+    def __str__(self):
+        return f"{self.efw} {self.get_method_display()}"
+
 
 class WellsSample(BaseModel):
     """
@@ -1083,6 +1430,14 @@ class Attachments(BaseModel):
             super().delete(*args, **kwargs)
 
     def get_base64_image(self):
+        derivatives = [item for item in self.derivatives.all() if item.kind == AttachmentsDerivatives.PRINT]
+        if derivatives:
+            # Заранее подготовленные страницы печатного разрешения
+            base64_images = []
+            for item in derivatives:
+                with item.file.open("rb") as f:
+                    base64_images.append(base64.b64encode(f.read()).decode("utf-8"))
+            return base64_images
         image_content = []
         if self.img.name.endswith(".pdf"):
             images = convert_from_bytes(self.img.read())
@@ -1109,6 +1464,42 @@ class Attachments(BaseModel):
     image_tag.allow_tags = True
 
 
+class AttachmentsDerivatives(models.Model):
+    """
+    Производные вложения: страницы печатного разрешения и миниатюра.
+    Создаются один раз после загрузки вложения и удаляются при замене файла.
+    fields = ["id", "attachment", "kind", "page", "file", "fingerprint", "created"]
+    """
+
+    PRINT = "print"
+    THUMB = "thumb"
+    KIND_CHOICES = (
+        (PRINT, "Страница для печати"),
+        (THUMB, "Миниатюра"),
+    )
+
+    attachment = models.ForeignKey("Attachments", models.CASCADE, related_name="derivatives", verbose_name="Вложение")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name="Тип")
+    page = models.PositiveSmallIntegerField(default=0, verbose_name="Страница")
+    file = models.FileField(
+        upload_to="images/derivatives/",
+        storage=YandexObjectStorage() if not settings.DEBUG else FileSystemStorage(location=settings.MEDIA_ROOT),
+        verbose_name="Файл",
+    )
+    fingerprint = models.CharField(max_length=40, verbose_name="Контрольная сумма исходного файла")
+    created = models.DateTimeField(default=timezone.now, verbose_name="Дата создания")
+
+    class Meta:
+        verbose_name = "Производная вложения"
+        verbose_name_plural = "Производные вложений"
+        db_table = "attachments_derivatives"
+        ordering = ("attachment", "kind", "page")
+        unique_together = (("attachment", "kind", "page"),)
+
+    def __str__(self):
+        return f"{self.attachment_id} {self.kind} {self.page}"
+
+
 class License(BaseModel):
     """
     Лицензии
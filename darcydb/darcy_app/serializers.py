@@ -1,7 +1,12 @@
 # from django.contrib.contenttypes.models import ContentType
+from django.contrib.gis.gdal import GDALException
+from django.contrib.gis.geos import GEOSException, GEOSGeometry
 from rest_framework import serializers
 
-from .models import DictEntities, WellsDepression, WellsEfw, WellsRegime, WellsWaterDepth
+from .models import DictEntities, Fields, Intakes, WellsDepression, WellsEfw, WellsRegime, WellsWaterDepth
+from .utils.export import EXPORT_PARAMETERS
+from .utils.hydrograph import HYDROGRAPH_FORMATS
+from .utils.regime import STATISTICS_VIEWS
 
 # , WellsRate
 
@@ -68,3 +73,54 @@ class WellsEfwSerializer(serializers.ModelSerializer):
                     depression_instance.waterdepths.create(**water_depth)
 
         return efw
+
+
+def split_wells(data):
+    """wells в параметрах запроса передаются списком через запятую: ?wells=1,2,3"""
+    if hasattr(data, "getlist"):
+        data = {key: data.get(key) for key in data}
+        data["wells"] = [pk for pk in (data.get("wells") or "").split(",") if pk]
+    return data
+
+
+class RegimeStatisticsQuerySerializer(serializers.Serializer):
+    wells = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    granularity = serializers.ChoiceField(choices=list(STATISTICS_VIEWS), default="month")
+    date_from = serializers.DateField(required=False)
+    date_till = serializers.DateField(required=False)
+
+    def to_internal_value(self, data):
+        return super().to_internal_value(split_wells(data))
+
+
+class RegimeExportQuerySerializer(serializers.Serializer):
+    wells = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=5000)
+    intake = serializers.PrimaryKeyRelatedField(queryset=Intakes.objects.all(), required=False)
+    field = serializers.PrimaryKeyRelatedField(queryset=Fields.objects.all(), required=False)
+    polygon = serializers.CharField(required=False, help_text="WKT или GeoJSON, WGS84")
+    parameter = serializers.ChoiceField(choices=list(EXPORT_PARAMETERS), default="all")
+    date_from = serializers.DateField(required=False)
+    date_till = serializers.DateField(required=False)
+
+    def to_internal_value(self, data):
+        return super().to_internal_value(split_wells(data))
+
+    def validate_polygon(self, value):
+        try:
+            polygon = GEOSGeometry(value)
+        except (ValueError, GEOSException, GDALException):
+            raise serializers.ValidationError("Некорректная геометрия")
+        if polygon.geom_type not in ("Polygon", "MultiPolygon"):
+            raise serializers.ValidationError("Ожидается полигон")
+        if not polygon.srid:
+            polygon.srid = 4326
+        return polygon
+
+    def validate(self, attrs):
+        if not any(attrs.get(key) for key in ("wells", "intake", "field", "polygon")):
+            raise serializers.ValidationError("Укажите скважины, водозабор, месторождение или полигон")
+        return attrs
+
+
+class HydrographQuerySerializer(serializers.Serializer):
+    image = serializers.ChoiceField(choices=list(HYDROGRAPH_FORMATS), default="png")
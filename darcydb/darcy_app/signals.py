@@ -0,0 +1,97 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    Attachments,
+    AttachmentsDerivatives,
+    Wells,
+    WellsCondition,
+    WellsDepression,
+    WellsDepth,
+    WellsDrilledData,
+    WellsEfw,
+    WellsGeophysics,
+    WellsRate,
+    WellsRegime,
+    WellsSample,
+    WellsTemperature,
+    WellsWaterDepth,
+)
+from .tasks import build_attachment_derivatives_task
+from .utils.attachments import delete_derivatives
+from .utils.packing import unpack_depression
+from .utils.regime import is_regime_measurement, sync_regime
+from .utils.well_state import related_well_id, schedule_well_state
+
+
+@receiver(pre_save, sender=Attachments)
+def attachment_file_changed(sender, instance, **kwargs):
+    # Новый файл еще не записан в хранилище до сохранения поля
+    instance._img_changed = instance.pk is None or not instance.img._committed
+
+
+@receiver(post_save, sender=Attachments)
+def queue_attachment_derivatives(sender, instance, **kwargs):
+    if getattr(instance, "_img_changed", False) and instance.img:
+        delete_derivatives(instance)
+        transaction.on_commit(lambda: build_attachment_derivatives_task.delay(instance.pk))
+
+
+@receiver(post_delete, sender=AttachmentsDerivatives)
+def delete_derivative_file(sender, instance, **kwargs):
+    if instance.file:
+        instance.file.delete(save=False)
+
+
+@receiver(post_save, sender=WellsWaterDepth)
+@receiver(post_delete, sender=WellsWaterDepth)
+@receiver(post_save, sender=WellsTemperature)
+@receiver(post_delete, sender=WellsTemperature)
+def sync_regime_measurement(sender, instance, **kwargs):
+    if is_regime_measurement(instance):
+        sync_regime(instance.object_id)
+
+
+@receiver(post_save, sender=WellsRegime)
+def sync_regime_date(sender, instance, created, **kwargs):
+    # Смена даты или скважины наблюдения переносит его замеры в другую секцию
+    if not created:
+        sync_regime(instance.pk)
+
+
+@receiver(pre_save, sender=WellsWaterDepth)
+@receiver(pre_save, sender=WellsRate)
+def unpack_edited_depression(sender, instance, **kwargs):
+    # Замеры упакованного журнала ОФР редактируются только в виде строк
+    if instance.content_type_id == ContentType.objects.get_for_model(WellsDepression).pk:
+        depression = WellsDepression.objects.filter(pk=instance.object_id, series_time__isnull=False).first()
+        if depression:
+            unpack_depression(depression, saving=instance)
+
+
+@receiver(post_save, sender=Wells)
+@receiver(post_save, sender=WellsDrilledData)
+@receiver(post_delete, sender=WellsDrilledData)
+@receiver(post_save, sender=WellsGeophysics)
+@receiver(post_delete, sender=WellsGeophysics)
+@receiver(post_save, sender=WellsEfw)
+@receiver(post_delete, sender=WellsEfw)
+@receiver(post_save, sender=WellsSample)
+@receiver(post_delete, sender=WellsSample)
+@receiver(post_save, sender=WellsRegime)
+@receiver(post_delete, sender=WellsRegime)
+@receiver(post_save, sender=WellsWaterDepth)
+@receiver(post_delete, sender=WellsWaterDepth)
+@receiver(post_save, sender=WellsDepth)
+@receiver(post_delete, sender=WellsDepth)
+@receiver(post_save, sender=WellsCondition)
+@receiver(post_delete, sender=WellsCondition)
+def update_well_state(sender, instance, **kwargs):
+    # Состояние пересчитывается после фиксации транзакции, по одному разу на скважину
+    if sender is Wells:
+        if kwargs.get("created"):
+            schedule_well_state(instance.pk)
+        return
+    schedule_well_state(related_well_id(instance))
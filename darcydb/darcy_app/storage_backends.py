@@ -1,6 +1,18 @@
+from boto3.s3.transfer import TransferConfig
+from django.conf import settings
 from storages.backends.s3boto3 import S3Boto3Storage
 
 
 class YandexObjectStorage(S3Boto3Storage):
     endpoint_url = "https://storage.yandexcloud.net"
     default_acl = "public-read"  # or set as per your requirements
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # Файл читается и передается частями, а не одним запросом
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.AWS_S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.AWS_S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=settings.AWS_S3_MAX_CONCURRENCY,
+            use_threads=self.use_threads,
+        )
@@ -0,0 +1,86 @@
+import time
+
+from celery.signals import worker_process_init
+
+from config import celery_app
+
+from .models import Attachments, DocumentsJob
+from .utils.attachments import build_derivatives
+from .utils.passport_gen import generate_passport
+from .utils.pump_journals_gen import generate_pump_journal
+from .utils.quality import run_quality_checks
+from .utils.regime import refresh_regime_statistics
+from .utils.renderer import renderer
+
+# Генерация документа заметно дольше глобального лимита CELERY_TASK_SOFT_TIME_LIMIT:
+# WeasyPrint, загрузка тайлов, геокодирование и выгрузка в S3.
+DOCUMENTS_SOFT_TIME_LIMIT = 10 * 60
+DOCUMENTS_TIME_LIMIT = DOCUMENTS_SOFT_TIME_LIMIT + 60
+
+# REFRESH MATERIALIZED VIEW CONCURRENTLY месячной и годовой статистики читает
+# всю секционированную таблицу regime_measurement
+STATISTICS_SOFT_TIME_LIMIT = 60 * 60
+STATISTICS_TIME_LIMIT = STATISTICS_SOFT_TIME_LIMIT + 5 * 60
+
+# Контроль качества: контрольные суммы по всем замерам уровня и проверка измененных рядов
+QUALITY_SOFT_TIME_LIMIT = 2 * 60 * 60
+QUALITY_TIME_LIMIT = QUALITY_SOFT_TIME_LIMIT + 5 * 60
+
+
+@worker_process_init.connect
+def warm_document_renderer(**kwargs):
+    renderer.warm()
+
+
+def run_documents_job(job_id, generator, task_id=None):
+    """
+    Выполняет задачу генерации документа и фиксирует ее статус:
+    queued -> running -> done/failed.
+    """
+    job = DocumentsJob.objects.select_related("doc", "content_type").get(pk=job_id)
+    job.mark_running(task_id)
+    start = time.perf_counter()
+    timings = {}
+    try:
+        rendered = generator(job.content_object, job.doc, timings=timings)
+    except Exception as e:
+        job.mark_failed(e)
+        raise
+    timings["total"] = round(time.perf_counter() - start, 3)
+    if rendered is False:
+        # Исходные данные не изменились, используется существующий файл
+        timings["skipped"] = True
+    job.mark_done(timings)
+    return job.pk
+
+
+@celery_app.task(bind=True, soft_time_limit=DOCUMENTS_SOFT_TIME_LIMIT, time_limit=DOCUMENTS_TIME_LIMIT)
+def generate_passport_task(self, job_id):
+    """Генерация паспорта скважины в фоне."""
+    return run_documents_job(job_id, generate_passport, task_id=self.request.id)
+
+
+@celery_app.task(bind=True, soft_time_limit=DOCUMENTS_SOFT_TIME_LIMIT, time_limit=DOCUMENTS_TIME_LIMIT)
+def generate_pump_journal_task(self, job_id):
+    """Генерация журнала опытной откачки в фоне."""
+    return run_documents_job(job_id, generate_pump_journal, task_id=self.request.id)
+
+
+@celery_app.task(soft_time_limit=DOCUMENTS_SOFT_TIME_LIMIT, time_limit=DOCUMENTS_TIME_LIMIT)
+def build_attachment_derivatives_task(attachment_id):
+    """Растрирование вложения в страницы печатного разрешения и миниатюру."""
+    attachment = Attachments.objects.filter(pk=attachment_id).first()
+    if attachment:
+        build_derivatives(attachment)
+
+
+@celery_app.task(soft_time_limit=STATISTICS_SOFT_TIME_LIMIT, time_limit=STATISTICS_TIME_LIMIT)
+def refresh_regime_statistics_task():
+    """Пересчет месячной и годовой статистики уровней режимных наблюдений."""
+    refresh_regime_statistics()
+
+
+@celery_app.task(soft_time_limit=QUALITY_SOFT_TIME_LIMIT, time_limit=QUALITY_TIME_LIMIT)
+def check_regime_quality_task():
+    """Ночной контроль качества рядов уровней, измененных с прошлой проверки."""
+    run_quality_checks()
@@ -0,0 +1,22 @@
+import pytest
+from django.contrib.gis.geos import Point
+from rest_framework.test import APIClient
+
+from ..models import DictEntities, Entities, Wells
+
+
+@pytest.fixture
+def typo(user):
+    return DictEntities.objects.create(name="Наблюдательная", entity=Entities.objects.create(name="тип скважины"))
+
+
+@pytest.fixture
+def well(typo):
+    return Wells.objects.create(name="1", typo=typo, geom=Point(49.1, 55.7, srid=4326))
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
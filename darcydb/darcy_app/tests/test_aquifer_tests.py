@@ -0,0 +1,130 @@
+import datetime
+import re
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import (
+    DictEntities,
+    Documents,
+    Entities,
+    Wells,
+    WellsConstruction,
+    WellsDepression,
+    WellsEfw,
+    WellsEfwAnalysis,
+)
+from ..utils.aquifer_tests import (
+    RECOVERY_TYPE,
+    collect_tests,
+    cooper_jacob,
+    pad,
+    run_analysis,
+    theis,
+    theis_recovery,
+    well_function,
+)
+
+pytestmark = pytest.mark.django_db
+
+TRANSMISSIVITY, STORATIVITY, RATE, RADIUS = 50.0, 1e-4, 432.0, 0.1
+
+
+def theis_drawdown(time, transmissivity=TRANSMISSIVITY, storativity=STORATIVITY):
+    return RATE / (4 * np.pi * transmissivity) * well_function(RADIUS**2 * storativity / (4 * transmissivity * time))
+
+
+def test_well_function_matches_exponential_integral():
+    assert well_function(np.array([0.01, 1.0, 5.0])) == pytest.approx([4.0379, 0.21938, 0.001148], rel=1e-3)
+
+
+def test_batch_fit_recovers_parameters():
+    time = np.geomspace(1 / 1440, 2, 40)
+    times = pad([time, time[:25]])
+    drawdowns = pad([theis_drawdown(time), theis_drawdown(time[:25], 80.0, 5e-3)])
+    rate, radius = np.full(2, RATE), np.full(2, RADIUS)
+
+    transmissivity, storativity, _, _ = cooper_jacob(times, drawdowns, rate, radius)
+    assert transmissivity == pytest.approx([50.0, 80.0], rel=0.01)
+
+    transmissivity, storativity, r2, points = theis(times, drawdowns, rate, radius, transmissivity * 1.5, storativity)
+    assert transmissivity == pytest.approx([50.0, 80.0], rel=1e-3)
+    assert storativity == pytest.approx([1e-4, 5e-3], rel=1e-2)
+    assert list(points) == [40, 25]
+
+    recovery = np.geomspace(1 / 1440, 1, 30)
+    residual = theis_drawdown(1 + recovery) - theis_drawdown(recovery)
+    transmissivity, _, _ = theis_recovery(pad([recovery]), pad([residual]), np.array([RATE]), np.array([1.0]))
+    assert transmissivity == pytest.approx([50.0], rel=0.01)
+
+
+@pytest.fixture
+def efw(user):
+    entity = Entities.objects.create(name="справочник")
+    well = Wells.objects.create(name="1", typo=DictEntities.objects.create(name="Разведочная", entity=entity))
+    WellsConstruction.objects.create(
+        well=well,
+        construction_type=DictEntities.objects.create(name="обсадная колонна", entity=entity),
+        diameter=200,
+        depth_from=Decimal(0),
+        depth_till=Decimal(50),
+    )
+    efw = WellsEfw.objects.create(
+        well=well,
+        date=datetime.datetime(2020, 5, 1, tzinfo=datetime.timezone.utc),
+        type_efw=DictEntities.objects.create(name="откачки одиночные опытные", entity=entity),
+        pump_time=datetime.timedelta(days=1),
+    )
+    efw.waterdepths.create(water_depth=Decimal("5.00"), time_measure=datetime.timedelta(0))
+    depression = WellsDepression.objects.create(efw=efw)
+    for minutes in np.geomspace(1, 1440, 30).round():
+        time_measure = datetime.timedelta(minutes=minutes)
+        depth = 5 + theis_drawdown(minutes / 1440)
+        depression.waterdepths.create(water_depth=round(Decimal(depth), 2), time_measure=time_measure)
+        depression.rates.create(rate=Decimal("5.000"), time_measure=time_measure)
+    return efw
+
+
+def test_run_analysis_skips_unchanged_tests(efw):
+    assert run_analysis() == (1, 0)
+    jacob = WellsEfwAnalysis.objects.get(efw=efw, method=WellsEfwAnalysis.COOPER_JACOB)
+    assert jacob.transmissivity == pytest.approx(TRANSMISSIVITY, rel=0.05)
+    assert jacob.rate == pytest.approx(RATE)
+    assert WellsEfwAnalysis.objects.get(efw=efw, method=WellsEfwAnalysis.THEIS).transmissivity == pytest.approx(
+        TRANSMISSIVITY, rel=0.05
+    )
+
+    assert run_analysis() == (0, 1)
+    efw.wellsdepression_set.get().waterdepths.create(
+        water_depth=Decimal("12.00"), time_measure=datetime.timedelta(days=2)
+    )
+    assert run_analysis() == (1, 0)
+
+
+def test_collect_tests_loads_only_the_chunk_and_its_pumping_tests(efw):
+    entity = efw.type_efw.entity
+    efw.doc = Documents.objects.create(
+        name="Отчет об ОФР", typo=DictEntities.objects.create(name="Отчет", entity=entity)
+    )
+    efw.save()
+    recovery = WellsEfw.objects.create(
+        well=efw.well,
+        doc=efw.doc,
+        date=datetime.datetime(2020, 5, 2, tzinfo=datetime.timezone.utc),
+        type_efw=DictEntities.objects.create(name=RECOVERY_TYPE, entity=entity),
+    )
+    WellsDepression.objects.create(efw=recovery).waterdepths.create(
+        water_depth=Decimal("5.50"), time_measure=datetime.timedelta(minutes=10)
+    )
+    # Откачка той же скважины без документа не относится к восстановлению уровня
+    other = WellsEfw.objects.create(well=efw.well, date=efw.date, type_efw=efw.type_efw)
+
+    with CaptureQueriesContext(connection) as queries:
+        (test,) = collect_tests(WellsEfw.objects.filter(pk=recovery.pk))
+    assert (test.efw_id, test.recovery, test.rate, test.pump_time) == (recovery.pk, True, pytest.approx(RATE), 1.0)
+    depressions = next(query["sql"] for query in queries if 'FROM "wells_depression"' in query["sql"])
+    loaded = {int(pk) for pk in re.search(r"IN \(([^)]*)\)", depressions).group(1).split(",")}
+    assert other.pk not in loaded and loaded == {efw.pk, recovery.pk}
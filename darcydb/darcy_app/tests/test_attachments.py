@@ -0,0 +1,16 @@
+import io
+
+from PIL import Image
+
+from ..utils.attachments import PRINT_SIZE, THUMB_SIZE, encode_image, source_images
+
+
+def test_encode_image_fits_print_and_thumb_size():
+    """Derivatives are RGB JPEGs downscaled to the print page and thumbnail sizes."""
+    source = io.BytesIO()
+    Image.new("RGBA", (3000, 4000), "white").save(source, format="PNG")
+    (image,) = source_images(source.getvalue(), "scan.png")
+    for size in (PRINT_SIZE, THUMB_SIZE):
+        result = Image.open(io.BytesIO(encode_image(image, size)))
+        assert result.format == "JPEG" and result.mode == "RGB"
+        assert result.width <= size[0] and result.height <= size[1]
@@ -0,0 +1,45 @@
+import pytest
+from django.conf import settings
+
+from ..utils import formula
+from ..utils.benchmark import compare_results, measure_cold
+
+BASELINE = {
+    "small": {
+        "case": {"layers": 3},
+        "passport": {"seconds": 2.0, "queries": 40, "peak_rss_mb": 300.0, "pdf_kb": 500.0},
+    }
+}
+
+
+def result(**changes):
+    passport = {**BASELINE["small"]["passport"], "stages": {}, **changes}
+    return {"small": {"case": {"layers": 3}, "passport": passport}}
+
+
+def test_compare_results_within_threshold():
+    assert compare_results(result(seconds=2.3, queries=44), BASELINE, threshold=0.2) == []
+
+
+def test_compare_results_reports_regressions():
+    regressions = compare_results(result(seconds=3.0, queries=41), BASELINE, threshold=0.2)
+    assert regressions == [("small", "passport", "seconds", 2.0, 3.0)]
+
+
+def test_compare_results_ignores_cases_missing_from_baseline():
+    assert compare_results({"large": result()["small"]}, BASELINE, threshold=0.2) == []
+
+
+@pytest.mark.django_db
+def test_each_run_starts_with_empty_document_caches(tmp_path):
+    formula._memory["x"] = "<span>x</span>"
+    cache_dirs = []
+
+    def run(timings):
+        assert formula._memory == {}
+        cache_dirs.append(settings.DOCUMENTS_CACHE_DIR)
+
+    measure_cold(run, None, tmp_path)
+    measure_cold(run, None, tmp_path)
+    assert len(set(cache_dirs)) == 2 and all(path.startswith(str(tmp_path)) for path in cache_dirs)
+    assert formula._memory.pop("x") == "<span>x</span>"
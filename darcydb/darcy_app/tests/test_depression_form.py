@@ -0,0 +1,61 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from ..forms import WellsDepressionForm
+from ..models import DictEntities, Entities, Wells, WellsEfw
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def efw(user):
+    entity = Entities.objects.create(name="справочник")
+    well = Wells.objects.create(name="1", typo=DictEntities.objects.create(name="Разведочная", entity=entity))
+    return WellsEfw.objects.create(
+        well=well,
+        date=datetime.datetime(2020, 5, 1, tzinfo=datetime.timezone.utc),
+        type_efw=DictEntities.objects.create(name="откачки одиночные опытные", entity=entity),
+        pump_time=datetime.timedelta(hours=40),
+    )
+
+
+def upload(content):
+    return {"csv_file": SimpleUploadedFile("journal.csv", content.encode(), content_type="text/csv")}
+
+
+def test_csv_upload_is_written_in_bulk(efw, django_assert_max_num_queries):
+    content = "time_measure,water_depth,rate\n" + "".join(f"{i},{5 + i / 1000:.3f},2.5\n" for i in range(1, 2001))
+    form = WellsDepressionForm({"efw": efw.pk}, upload(content))
+    assert form.is_valid(), form.errors
+    with django_assert_max_num_queries(30):
+        depression = form.save()
+    assert depression.waterdepths.count() == 2000
+    assert depression.rates.count() == 2000
+    first = depression.waterdepths.order_by("time_measure").first()
+    assert (first.time_measure, first.water_depth) == (datetime.timedelta(minutes=1), Decimal("5.00"))
+    assert first.history.count() == 1
+
+
+def test_csv_parse_errors_are_reported_per_line(efw):
+    form = WellsDepressionForm({"efw": efw.pk}, upload("time;depth;rate\n1;5,5;2.5\n2;abc;\n;4;\n"))
+    assert not form.is_valid()
+    assert form.errors["csv_file"] == ["Строка 3: глубина уровня не число", "Строка 4: нет времени замера"]
+
+
+def test_csv_repeated_and_recorded_times_are_reported_per_line(efw):
+    form = WellsDepressionForm({"efw": efw.pk}, upload("time_measure,water_depth,rate\n1,5.5,2.5\n2,5.6,\n1,5.7,\n"))
+    assert not form.is_valid()
+    assert form.errors["csv_file"] == ["Строка 4: глубина уровня: время замера повторяет строку 2"]
+
+    form = WellsDepressionForm({"efw": efw.pk}, upload("time_measure,water_depth,rate\n1,5.5,2.5\n"))
+    assert form.is_valid(), form.errors
+    depression = form.save()
+    form = WellsDepressionForm(
+        {"efw": efw.pk}, upload("time_measure,water_depth,rate\n2,5.6,\n1,,2.4\n"), instance=depression
+    )
+    assert not form.is_valid()
+    assert form.errors["csv_file"] == ["Строка 3: дебит: время замера уже есть в журнале"]
+    assert depression.rates.count() == 1
@@ -0,0 +1,134 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..models import (
+    AquiferCodes,
+    DictEntities,
+    Documents,
+    Entities,
+    Wells,
+    WellsAquifers,
+    WellsAquiferUsage,
+    WellsConstruction,
+    WellsDepression,
+    WellsEfw,
+    WellsLithology,
+)
+from ..utils.passport_gen import Passports, gather_sections
+from ..utils.pump_journals_gen import PumpJournal
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def dicts(user):
+    entity = Entities.objects.create(name="справочник")
+    return {
+        name: DictEntities.objects.create(name=name, entity=entity)
+        for name in ("Разведочная", "Паспорт скважины", "песок", "обсадная колонна", "откачки одиночные опытные")
+    }
+
+
+def create_well(dicts, name, size):
+    well = Wells.objects.create(name=name, typo=dicts["Разведочная"], geom=Point(49.1, 55.7, srid=4326))
+    for i in range(size):
+        aquifer = AquiferCodes.objects.create(aquifer_id=int(name) * 100 + i, aquifer_name=f"{name}-{i}")
+        WellsAquifers.objects.create(well=well, aquifer=aquifer, bot_elev=Decimal(10 * (i + 1)))
+        WellsAquiferUsage.objects.create(well=well, aquifer=aquifer)
+        WellsLithology.objects.create(well=well, rock=dicts["песок"], bot_elev=Decimal(10 * (i + 1)))
+        WellsConstruction.objects.create(
+            well=well,
+            construction_type=dicts["обсадная колонна"],
+            diameter=200 - i,
+            depth_from=Decimal(10 * i),
+            depth_till=Decimal(10 * (i + 1)),
+        )
+    efw = WellsEfw.objects.create(
+        well=well,
+        date=datetime.datetime(2020, 5, 1, tzinfo=datetime.timezone.utc),
+        type_efw=dicts["откачки одиночные опытные"],
+        pump_time=datetime.timedelta(hours=size),
+    )
+    efw.waterdepths.create(water_depth=Decimal("5.00"), time_measure=datetime.timedelta(0))
+    depression = WellsDepression.objects.create(efw=efw)
+    for i in range(size):
+        depression.waterdepths.create(water_depth=Decimal(6 + i), time_measure=datetime.timedelta(hours=i + 1))
+        depression.rates.create(rate=Decimal("2.5"), time_measure=datetime.timedelta(hours=i + 1))
+    doc = Documents.objects.create(name=f"Паспорт скважины №{name}", typo=dicts["Паспорт скважины"])
+    return well, doc
+
+
+def passport_queries(well, doc):
+    pdf = Passports(Wells.objects.select_related("typo", "intake", "field").get(pk=well.pk), doc)
+    with CaptureQueriesContext(connection) as queries, mock.patch(
+        "darcydb.darcy_app.utils.doc_gen.reverse_geocode", return_value={}
+    ), mock.patch("darcydb.darcy_app.utils.passport_gen.get_formulas", return_value={}):
+        pdf.create_title()
+        pdf.create_position()
+        pdf.get_attachments()
+        pdf.create_drilled_base()
+        pdf.create_archive_data()
+        pdf.create_lithology()
+        pdf.construction_define(archive=False)
+        pdf.create_geophysics_data()
+        pdf.get_pump_complex()
+        pdf.create_sample_data()
+        pdf.create_chem_conclusion()
+    return len(queries)
+
+
+def test_passport_query_count_is_constant(dicts):
+    """The number of queries does not depend on layers, constructions and measurements."""
+    small = passport_queries(*create_well(dicts, "1", 1))
+    large = passport_queries(*create_well(dicts, "2", 8))
+    assert small == large
+
+
+def pump_journal_queries(well, doc):
+    efw = WellsEfw.objects.get(well=well)
+    with CaptureQueriesContext(connection) as queries, mock.patch(
+        "darcydb.darcy_app.utils.doc_gen.reverse_geocode", return_value={"country": "", "state": ""}
+    ):
+        pdf = PumpJournal(efw, Wells.objects.select_related("typo", "intake", "field").get(pk=well.pk), doc)
+        pdf.create_info_data()
+        pdf.get_pump_data()
+        pdf.get_recovery_data()
+    return len(queries)
+
+
+def test_pump_journal_query_count_is_constant(dicts):
+    """Long pumping tests do not add queries per reading."""
+    small = pump_journal_queries(*create_well(dicts, "3", 1))
+    large = pump_journal_queries(*create_well(dicts, "4", 50))
+    assert small == large
+
+
+def test_passport_sections_split_archive_and_current_construction(dicts):
+    """The archive and current construction columns use their own formulas."""
+    well, doc = create_well(dicts, "5", 0)
+    for date, diameter in ((datetime.date(2010, 6, 1), 200), (datetime.date.today(), 150)):
+        WellsConstruction.objects.create(
+            well=well,
+            date=date,
+            construction_type=dicts["обсадная колонна"],
+            diameter=diameter,
+            depth_from=Decimal(0),
+            depth_till=Decimal(50),
+        )
+    pdf = Passports(Wells.objects.select_related("typo", "intake", "field").get(pk=well.pk), doc)
+    cached = mock.Mock(is_fresh=True, address="адрес")
+    with mock.patch("darcydb.darcy_app.utils.passport_gen.get_cached_address", return_value=cached), mock.patch(
+        "darcydb.darcy_app.utils.passport_gen.render_formula", side_effect=lambda tex: f"<{tex}>"
+    ), mock.patch.object(pdf, "create_schema", return_value=""), mock.patch.object(
+        pdf, "get_attachments", return_value=[]
+    ):
+        sections = gather_sections(pdf, {})
+    assert "200" in sections["formula_archive"]
+    assert "150" in sections["formula_new"]
+    assert sections["formula_archive"] != sections["formula_new"]
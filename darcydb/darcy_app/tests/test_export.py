@@ -0,0 +1,45 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.contrib.gis.geos import Point
+from django.urls import reverse
+
+from ..models import Intakes, Wells, WellsRegime
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def wells(typo):
+    intake = Intakes.objects.create(intake_name="Водозабор")
+    wells = [
+        Wells.objects.create(name="1", typo=typo, intake=intake, geom=Point(49.1, 55.7, srid=4326)),
+        Wells.objects.create(name="2", typo=typo, geom=Point(50.1, 55.7, srid=4326)),
+    ]
+    for well in wells:
+        for day in (1, 2):
+            regime = WellsRegime.objects.create(well=well, date=datetime.date(2022, 6, day))
+            regime.waterdepths.create(water_depth=Decimal(f"{day}.50"), time_measure=datetime.timedelta(hours=9))
+    return wells
+
+
+def export(api_client, params):
+    response = api_client.get(reverse("api:regime-export"), params, HTTP_ACCEPT="text/csv")
+    assert response.status_code == 200
+    return b"".join(response.streaming_content).decode().splitlines()
+
+
+def test_export_streams_csv_for_intake(api_client, wells):
+    lines = export(api_client, {"intake": wells[0].intake_id, "date_from": "2022-06-02"})
+    assert lines == [
+        "well,well_name,date,time_measure,parameter,value",
+        f"{wells[0].pk},1,2022-06-02,09:00:00,level,2.50",
+    ]
+
+
+def test_export_by_polygon_and_well_list(api_client, wells):
+    polygon = "POLYGON((50 55, 51 55, 51 56, 50 56, 50 55))"
+    assert len(export(api_client, {"polygon": polygon, "parameter": "level"})) == 3
+    assert len(export(api_client, {"wells": f"{wells[0].pk},{wells[1].pk}"})) == 5
+    assert api_client.get(reverse("api:regime-export")).status_code == 400
@@ -0,0 +1,77 @@
+from itertools import count
+from unittest import mock
+
+import pytest
+from django.contrib.gis.geos import Point
+
+from ..models import DictEntities, Entities, Intakes, Wells
+from ..utils.field_report_gen import FieldReport, generate_field_report, report_wells
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def intake(user):
+    typo = DictEntities.objects.create(name="Разведочная", entity=Entities.objects.create(name="тип скважины"))
+    intake, other = Intakes.objects.create(intake_name="Северный"), Intakes.objects.create(intake_name="Южный")
+    for name, well_intake in (("2", intake), ("1", intake), ("3", other)):
+        Wells.objects.create(name=name, typo=typo, intake=well_intake, geom=Point(49.1, 55.7, srid=4326))
+    return intake
+
+
+@pytest.fixture
+def layout():
+    """
+    Layout without WeasyPrint: every section has two pages and two images, the shared logo
+    and a well image. Yields the image URLs that were loaded past the cache.
+    """
+    loads = []
+    sections = count()
+
+    def html(string):
+        def render(stylesheets, font_config, cache):
+            section = next(sections)
+            for url in ("file:///logo.png", f"data:image/png;base64,{section}"):
+                if url not in cache:
+                    loads.append(url)
+                    cache[url] = object()
+            return mock.Mock(pages=[f"{section}-1", f"{section}-2"], copy=lambda pages: mock.Mock(pages=pages))
+
+        return mock.Mock(render=render)
+
+    shared = {name: f"file:///{name}.png" for name in ("logo", "watermark", "sign", "stamp", "sign_creator")}
+    module = "darcydb.darcy_app.utils.field_report_gen"
+    with mock.patch(f"{module}.HTML", side_effect=html), mock.patch(f"{module}.Passports"), mock.patch(
+        f"{module}.shared_context", return_value=shared
+    ), mock.patch(f"{module}.passport_context", return_value={}), mock.patch(f"{module}.get_template"), mock.patch(
+        f"{module}.get_stylesheet"
+    ):
+        yield loads
+
+
+def test_report_wells_of_intake(intake):
+    assert [well.name for well in report_wells(intake)] == ["1", "2"]
+
+
+def test_report_wells_rejects_other_objects(user):
+    with pytest.raises(TypeError):
+        report_wells(user)
+
+
+def test_field_report_reuses_shared_images(intake, layout):
+    report = FieldReport(intake)
+    document = report.render()
+    # Two passports and the closing memo
+    assert len(document.pages) == 6
+    assert layout.count("file:///logo.png") == 1
+    assert len(layout) == 4
+    assert list(report.image_cache) == ["file:///logo.png"]
+
+
+def test_field_report_is_split_into_volumes(intake, tmp_path):
+    with mock.patch.object(FieldReport, "render") as render:
+        render.return_value.pages = ["1", "2"]
+        pages = generate_field_report(intake, tmp_path / "report.pdf", wells_per_volume=1)
+    assert pages == 4
+    targets = [call.kwargs["target"] for call in render.return_value.write_pdf.call_args_list]
+    assert targets == [str(tmp_path / "report_1.pdf"), str(tmp_path / "report_2.pdf")]
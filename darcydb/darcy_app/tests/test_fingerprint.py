@@ -0,0 +1,48 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from ..models import DictDocOrganizations, DictEntities, Entities, License, LicenseToWells, Wells, WellsLithology
+from ..utils.fingerprint import passport_fingerprint
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def well(user):
+    entity = Entities.objects.create(name="справочник")
+    typo = DictEntities.objects.create(name="Разведочная", entity=entity)
+    return Wells.objects.create(name="1", typo=typo)
+
+
+def test_passport_fingerprint_stable_without_changes(well):
+    """Saving the well without changing its fields keeps the fingerprint."""
+    fingerprint = passport_fingerprint(well)
+    well.save()
+    assert passport_fingerprint(well) == fingerprint
+
+
+def test_passport_fingerprint_changes_with_related_rows(well):
+    """Adding a related row changes the fingerprint, removing it restores the previous one."""
+    fingerprint = passport_fingerprint(well)
+    layer = WellsLithology.objects.create(well=well, rock=well.typo, bot_elev=Decimal("10.00"))
+    with_layer = passport_fingerprint(well)
+    assert with_layer != fingerprint
+    layer.delete()
+    assert passport_fingerprint(well) == fingerprint
+
+
+def test_passport_fingerprint_changes_with_license(well):
+    """Editing the license printed in the passport changes the fingerprint."""
+    well_license = License.objects.create(
+        name="КЗН00001ВЭ",
+        department=DictDocOrganizations.objects.create(name="Департамент"),
+        date_end=datetime.date(2030, 1, 1),
+        gw_purpose="питьевое водоснабжение",
+    )
+    LicenseToWells.objects.create(well=well, license=well_license)
+    fingerprint = passport_fingerprint(well)
+    License.objects.filter(pk=well_license.pk).update(modified=timezone.now() + datetime.timedelta(minutes=1))
+    assert passport_fingerprint(well) != fingerprint
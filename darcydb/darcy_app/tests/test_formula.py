@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from ..models import FormulaCache
+from ..utils import formula
+from ..utils.formula import construction_tex, get_formulas
+
+pytestmark = pytest.mark.django_db
+
+
+def test_construction_tex_merges_equal_diameters():
+    constructions = [
+        SimpleNamespace(diameter=273, depth_from=0, depth_till=10),
+        SimpleNamespace(diameter=168, depth_from=10, depth_till=50),
+        SimpleNamespace(diameter=168, depth_from=50, depth_till=80),
+    ]
+    assert construction_tex(constructions) == "\\frac{273}{0-10} х \\frac{168}{10-80}"
+
+
+def test_get_formulas_renders_each_formula_once():
+    """A formula is rendered by KaTeX once and then served from the cache."""
+    with mock.patch.dict(formula._memory, clear=True), mock.patch(
+        "darcydb.darcy_app.utils.formula.render_formula", side_effect=lambda tex: f"<span>{tex}</span>"
+    ) as render:
+        assert get_formulas(["\\frac{1}{2}", ""]) == {"\\frac{1}{2}": "<span>\\frac{1}{2}</span>"}
+        formula._memory.clear()
+        assert get_formulas(["\\frac{1}{2}"]) == {"\\frac{1}{2}": "<span>\\frac{1}{2}</span>"}
+    render.assert_called_once_with("\\frac{1}{2}")
+    assert FormulaCache.objects.get().katex_version == formula.KATEX_VERSION
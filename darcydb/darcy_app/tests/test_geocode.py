@@ -0,0 +1,40 @@
+import datetime
+from unittest import mock
+
+import pytest
+import requests
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+
+from ..models import GeocodeCache
+from ..utils.geocode import reverse_geocode, store_address
+
+pytestmark = pytest.mark.django_db
+
+ADDRESS = {"country": "Россия", "state": "Республика Татарстан"}
+
+
+def test_reverse_geocode_stores_and_reuses_address():
+    """The first lookup hits the network, the second one is served from the cache."""
+    point = Point(49.12345, 55.78901, srid=4326)
+    with mock.patch("darcydb.darcy_app.utils.geocode.fetch_address", return_value=ADDRESS) as fetch:
+        assert reverse_geocode(point) == ADDRESS
+        assert reverse_geocode(Point(49.12346, 55.78899, srid=4326)) == ADDRESS
+    fetch.assert_called_once()
+    assert GeocodeCache.objects.count() == 1
+
+
+def test_reverse_geocode_stale_cache_on_network_error():
+    """A stale cached address is used when the geocoder is unavailable."""
+    point = Point(49.1, 55.7, srid=4326)
+    store_address(point.y, point.x, ADDRESS)
+    GeocodeCache.objects.update(fetched=timezone.now() - datetime.timedelta(days=1000))
+    with mock.patch("darcydb.darcy_app.utils.geocode.fetch_address", side_effect=requests.Timeout):
+        assert reverse_geocode(point) == ADDRESS
+
+
+def test_reverse_geocode_offline_without_cache():
+    """Without network and cache the address still has the keys used by the templates."""
+    with mock.patch("darcydb.darcy_app.utils.geocode.fetch_address", side_effect=requests.ConnectionError):
+        address = reverse_geocode(Point(10.0, 10.0, srid=4326))
+    assert address["country"] == "" and address["state"] == ""
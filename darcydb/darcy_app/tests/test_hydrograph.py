@@ -0,0 +1,48 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from ..models import WellsRegime, WellsTemperature
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def well(well):
+    cache.clear()
+    regime = WellsRegime.objects.create(well=well, date=datetime.date(2023, 5, 1))
+    regime.waterdepths.create(water_depth=Decimal("4.20"))
+    WellsTemperature.objects.create(content_object=regime, temperature=Decimal("6.5"))
+    return well
+
+
+def test_hydrograph_png_and_svg(api_client, well):
+    url = reverse("api:wells-hydrograph", args=[well.pk])
+    response = api_client.get(url)
+    assert response["Content-Type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+
+    response = api_client.get(url, {"image": "svg"})
+    assert response["Content-Type"] == "image/svg+xml"
+    assert b"<svg" in response.content
+
+    assert api_client.get(url, {"image": "gif"}).status_code == 400
+    assert api_client.get(reverse("api:wells-hydrograph", args=[well.pk + 1000])).status_code == 404
+
+
+def test_hydrograph_is_cached_until_readings_change(api_client, well):
+    url = reverse("api:wells-hydrograph", args=[well.pk])
+    with mock.patch("darcydb.darcy_app.utils.hydrograph.render_hydrograph", return_value=b"png") as render:
+        api_client.get(url)
+        api_client.get(url)
+        assert render.call_count == 1
+
+        WellsRegime.objects.create(well=well, date=datetime.date(2023, 6, 1)).waterdepths.create(
+            water_depth=Decimal("4.35")
+        )
+        api_client.get(url)
+        assert render.call_count == 2
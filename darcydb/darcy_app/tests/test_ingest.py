@@ -0,0 +1,51 @@
+import datetime
+import json
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from ..models import RegimeMeasurement, WellsRegime, WellsWaterDepth
+
+pytestmark = pytest.mark.django_db
+
+
+def test_bulk_ndjson_upserts_and_reports_rejects(api_client, well):
+    existing = WellsRegime.objects.create(well=well, date=datetime.date(2023, 1, 1))
+    existing.waterdepths.create(water_depth=Decimal("3.00"))
+    rows = [
+        {"well": well.pk, "date": "2023-01-01", "water_depth": "3.50"},
+        {"well": well.pk, "date": "2023-01-02", "time_measure": "08:00:00", "water_depth": 3.6},
+        {"well": well.pk, "date": "2023-01-02", "time_measure": "08:00:00", "water_depth": 3.7},
+        {"well": well.pk, "date": "2023-01-03", "water_depth": "глубоко"},
+        {"well": well.pk + 1000, "date": "2023-01-04", "water_depth": "1.00"},
+    ]
+    body = "\n".join(json.dumps(row) for row in rows) + "\nnot json\n"
+
+    response = api_client.post(reverse("api:regime-bulk"), body, content_type="application/x-ndjson")
+
+    assert response.status_code == 200
+    summary = response.json()
+    assert {key: summary[key] for key in ("received", "accepted", "rejected", "regimes_created")} == {
+        "received": 6,
+        "accepted": 3,
+        "rejected": 3,
+        "regimes_created": 1,
+    }
+    assert (summary["inserted"], summary["updated"]) == (1, 1)
+    assert [reject["row"] for reject in summary["rejects"]] == [4, 6, 5]
+    assert list(existing.waterdepths.values_list("water_depth", flat=True)) == [Decimal("3.50")]
+    added = WellsWaterDepth.objects.get(object_id=WellsRegime.objects.get(date=datetime.date(2023, 1, 2)).pk)
+    assert (added.time_measure, added.water_depth) == (datetime.timedelta(hours=8), Decimal("3.70"))
+    assert added.history.count() == 1
+    assert RegimeMeasurement.objects.filter(well=well).count() == 2
+
+
+def test_bulk_csv(api_client, well):
+    body = f"well,date,time_measure,water_depth\n{well.pk},2024-05-01,,4.25\n"
+    response = api_client.post(reverse("api:regime-bulk"), body, content_type="text/csv")
+    assert response.json()["inserted"] == 1
+    assert WellsRegime.objects.get(well=well).waterdepths.get().water_depth == Decimal("4.25")
+
+    response = api_client.post(reverse("api:regime-bulk"), body, content_type="application/xml")
+    assert response.status_code == 415
@@ -0,0 +1,69 @@
+import datetime
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from ..models import DictEntities, WellsDepression, WellsEfw, WellsRegime
+from ..utils.logger_import import Decimator, LoggerImport, read_logger
+
+pytestmark = pytest.mark.django_db
+
+
+def write_logger(path, start, minutes, pressure):
+    times = [start + datetime.timedelta(minutes=i) for i in range(minutes)]
+    path.write_text("time,pressure\n" + "".join(f"{t:%Y-%m-%d %H:%M:%S},{pressure(i)}\n" for i, t in enumerate(times)))
+    return path
+
+
+def test_decimator_carries_partial_interval_between_chunks():
+    decimator = Decimator(600)
+    minutes = np.arange(0, 25) * 60 * 10**9
+    first = decimator.feed(minutes[:7], np.arange(7.0))
+    second = decimator.feed(minutes[7:], np.arange(7.0, 25.0))
+    last = decimator.flush()
+    means = np.concatenate([first[1], second[1], last[1]])
+    assert list(means) == [4.5, 14.5, 22.0]
+
+
+def test_regime_import_with_barometric_compensation(well, tmp_path):
+    start = datetime.datetime(2024, 3, 1, 23, 0)
+    # Датчик на 20 м, над ним 12 м воды при меняющемся атмосферном давлении
+    water = write_logger(tmp_path / "well.csv", start, 120, lambda i: 100 + i * 0.01 + 12 * 9.80665)
+    baro = write_logger(tmp_path / "baro.csv", start, 120, lambda i: 100 + i * 0.01)
+
+    summary = LoggerImport(well, 20, reference=read_logger(baro, chunk_size=25), interval=1800).run(
+        read_logger(water, chunk_size=40)
+    )
+
+    assert (summary["readings"], summary["written"], summary["rejected"]) == (120, 4, 0)
+    regimes = WellsRegime.objects.filter(well=well).order_by("date")
+    assert [regime.date for regime in regimes] == [datetime.date(2024, 3, 1), datetime.date(2024, 3, 2)]
+    depths = regimes[1].waterdepths.order_by("time_measure")
+    assert [item.time_measure for item in depths] == [datetime.timedelta(0), datetime.timedelta(minutes=30)]
+    assert {item.water_depth for item in depths} == {Decimal("8.00")}
+
+
+def test_depression_import(user, well, tmp_path):
+    efw = WellsEfw.objects.create(
+        well=well,
+        date=datetime.datetime(2024, 3, 1, 10, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+        type_efw=DictEntities.objects.create(name="откачки одиночные опытные", entity=well.typo.entity),
+        pump_time=datetime.timedelta(hours=1),
+    )
+    depression = WellsDepression.objects.create(efw=efw)
+    water = write_logger(tmp_path / "well.csv", datetime.datetime(2024, 3, 1, 9, 50), 30, lambda i: 15 - i * 0.1)
+
+    summary = LoggerImport(depression, 20, interval=300).run(read_logger(water, units="m"))
+
+    # Пропущены исходные замеры логгера до начала опыта (9:50-9:59), а не интервалы прореживания
+    assert (summary["readings"], summary["skipped"], summary["written"]) == (30, 10, 4)
+    rows = depression.waterdepths.order_by("time_measure")
+    assert [row.time_measure for row in rows][:2] == [datetime.timedelta(0), datetime.timedelta(minutes=5)]
+    assert rows[0].water_depth == Decimal("6.20")
+    assert rows[0].history.count() == 1
+
+    # Повторный импорт того же файла не дублирует замеры журнала
+    summary = LoggerImport(depression, 20, interval=300).run(read_logger(water, units="m"))
+    assert (summary["written"], summary["duplicates"]) == (0, 4)
+    assert depression.waterdepths.count() == 4
@@ -0,0 +1,67 @@
+import datetime
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from django.contrib import messages
+
+from ..admin import WellsDepressionAdmin, darcy_admin
+from ..models import DictEntities, Entities, Wells, WellsDepression, WellsEfw
+from ..utils.packing import pack_depression, unpack_depression
+from ..utils.series import depression_series
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def depression(user):
+    entity = Entities.objects.create(name="справочник")
+    well = Wells.objects.create(name="1", typo=DictEntities.objects.create(name="Разведочная", entity=entity))
+    efw = WellsEfw.objects.create(
+        well=well,
+        date=datetime.datetime(2020, 5, 1, tzinfo=datetime.timezone.utc),
+        type_efw=DictEntities.objects.create(name="откачки одиночные опытные", entity=entity),
+        pump_time=datetime.timedelta(minutes=10),
+    )
+    depression = WellsDepression.objects.create(efw=efw)
+    for minutes, depth, rate in ((1, "6.50", "2.500"), (2, "7.25", None), (10, "9.10", "3.125")):
+        depression.waterdepths.create(water_depth=Decimal(depth), time_measure=datetime.timedelta(minutes=minutes))
+        if rate:
+            depression.rates.create(rate=Decimal(rate), time_measure=datetime.timedelta(minutes=minutes))
+    return depression
+
+
+def test_pack_and_unpack_round_trip(depression):
+    rows = depression_series(WellsDepression.objects.get(pk=depression.pk))
+    assert pack_depression(depression) == 3
+    assert not depression.waterdepths.exists() and not depression.rates.exists()
+    packed = WellsDepression.objects.get(pk=depression.pk)
+    assert depression_series(packed) == rows
+
+    assert unpack_depression(packed) == 5
+    unpacked = WellsDepression.objects.get(pk=depression.pk)
+    assert not unpacked.is_packed
+    assert depression_series(unpacked) == rows
+
+
+def test_editing_a_reading_unpacks_the_depression(depression):
+    pack_depression(depression)
+    depression.waterdepths.create(water_depth=Decimal("8.00"), time_measure=datetime.timedelta(minutes=2))
+    depression = WellsDepression.objects.get(pk=depression.pk)
+    assert not depression.is_packed
+    assert [item.water_depth for item in depression_series(depression)] == [
+        Decimal("6.50"),
+        Decimal("8.00"),
+        Decimal("9.10"),
+    ]
+
+
+def test_pack_action_reports_depressions_that_cannot_be_packed(depression):
+    depression.waterdepths.create(water_depth=Decimal("7.00"))
+    model_admin = WellsDepressionAdmin(WellsDepression, darcy_admin)
+    with mock.patch.object(model_admin, "message_user") as message_user:
+        model_admin.pack(None, WellsDepression.objects.filter(pk=depression.pk))
+    warning, summary = message_user.call_args_list
+    assert warning.kwargs == {"level": messages.WARNING}
+    assert summary.args == (None, "Упаковано замеров: 0")
+    assert depression.waterdepths.count() == 4
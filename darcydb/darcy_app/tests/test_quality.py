@@ -0,0 +1,52 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from ..filters import RegimeQaFlagFilter
+from ..models import RegimeQaFlag, RegimeQaState, Wells, WellsRegime
+from ..utils.quality import run_quality_checks
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def depths(well):
+    values = [Decimal(5) + Decimal("0.02") * (i * 7 % 5) for i in range(40)]
+    values[10] = -values[10]
+    values[20] = values[20] * 100
+    values[30:] = [value + Decimal("2.5") for value in values[30:]]
+    start = datetime.date(2023, 1, 2)
+    return [
+        WellsRegime.objects.create(well=well, date=start + datetime.timedelta(weeks=i)).waterdepths.create(
+            water_depth=value
+        )
+        for i, value in enumerate(values)
+    ]
+
+
+def test_outliers_and_steps_are_flagged(well, depths):
+    assert run_quality_checks() == (1, 0)
+
+    flags = RegimeQaFlag.objects.filter(well=well).order_by("date")
+    assert [(flag.water_depth_id, flag.kind) for flag in flags] == [
+        (depths[10].pk, RegimeQaFlag.SIGN),
+        (depths[20].pk, RegimeQaFlag.SCALE),
+        (depths[30].pk, RegimeQaFlag.STEP),
+    ]
+    assert RegimeQaState.objects.get(well=well).flags == 3
+
+    flagged = RegimeQaFlagFilter(None, {"qa_flag": str(RegimeQaFlag.SCALE)}, Wells, None)
+    assert list(flagged.queryset(None, Wells.objects.all())) == [well]
+    flagged = RegimeQaFlagFilter(None, {"qa_flag": "any"}, WellsRegime, None)
+    assert flagged.queryset(None, WellsRegime.objects.all()).count() == 3
+
+
+def test_only_changed_series_are_rechecked(well, depths):
+    run_quality_checks()
+    assert run_quality_checks() == (0, 1)
+
+    depths[20].water_depth = Decimal("5.04")
+    depths[20].save()
+    assert run_quality_checks() == (1, 0)
+    assert set(RegimeQaFlag.objects.values_list("kind", flat=True)) == {RegimeQaFlag.SIGN, RegimeQaFlag.STEP}
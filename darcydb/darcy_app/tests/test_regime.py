@@ -0,0 +1,71 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import NoReverseMatch, reverse
+
+from ..models import RegimeMeasurement, WellsRegime, WellsWaterDepth
+from ..utils.regime import refresh_regime_statistics, regime_series, regime_statistics
+
+pytestmark = pytest.mark.django_db
+
+
+def test_regime_readings_are_copied_to_partitioned_table(well):
+    regime = WellsRegime.objects.create(well=well, date=datetime.date(2019, 3, 1))
+    depth = regime.waterdepths.create(water_depth=Decimal("4.20"))
+    WellsRegime.objects.create(well=well, date=datetime.date(2021, 3, 1)).waterdepths.create(
+        water_depth=Decimal("4.80")
+    )
+    assert regime_series(well) == [
+        (datetime.date(2019, 3, 1), None, Decimal("4.20")),
+        (datetime.date(2021, 3, 1), None, Decimal("4.80")),
+    ]
+    assert regime_series(well, date_from=datetime.date(2020, 1, 1)) == [
+        (datetime.date(2021, 3, 1), None, Decimal("4.80"))
+    ]
+
+    regime.date = datetime.date(2022, 3, 1)
+    regime.save()
+    assert RegimeMeasurement.objects.get(source_id=depth.pk).date == datetime.date(2022, 3, 1)
+
+    depth.delete()
+    assert not RegimeMeasurement.objects.filter(regime=regime).exists()
+
+
+def test_resync_restores_readings_written_without_signals(well):
+    regime = WellsRegime.objects.create(well=well, date=datetime.date(2019, 3, 1))
+    depth = regime.waterdepths.create(water_depth=Decimal("4.20"))
+    WellsWaterDepth.objects.filter(pk=depth.pk).update(water_depth=Decimal("4.50"))
+    assert RegimeMeasurement.objects.get(source_id=depth.pk).value == Decimal("4.20")
+
+    call_command("resync_regime_measurements", "--chunk-size", "1")
+    assert RegimeMeasurement.objects.get(source_id=depth.pk).value == Decimal("4.50")
+
+
+def test_regime_statistics_by_month_and_day(well):
+    for day, depth in ((1, "4.00"), (15, "5.00"), (20, "6.50")):
+        WellsRegime.objects.create(well=well, date=datetime.date(2020, 6, day)).waterdepths.create(
+            water_depth=Decimal(depth)
+        )
+    refresh_regime_statistics()
+    assert regime_statistics([well.pk], "month") == {
+        well.pk: [(datetime.date(2020, 6, 1), Decimal("4.00"), Decimal("5.167"), Decimal("6.50"), 3)]
+    }
+    daily = regime_statistics([well.pk], "day", date_from=datetime.date(2020, 6, 10))[well.pk]
+    assert [row[0] for row in daily] == [datetime.date(2020, 6, 15), datetime.date(2020, 6, 20)]
+
+
+def test_regime_statistics_endpoint(api_client, well):
+    WellsRegime.objects.create(well=well, date=datetime.date(2021, 1, 5)).waterdepths.create(water_depth=Decimal("3"))
+    refresh_regime_statistics()
+    response = api_client.get(reverse("api:regime-statistics"), {"wells": f"{well.pk}", "granularity": "year"})
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"well": well.pk, "series": [["2021-01-01", 3.0, 3.0, 3.0, 1]]}]
+
+
+def test_only_regime_services_are_mounted_in_api():
+    assert reverse("api:regime-statistics") == "/api/regime/statistics/"
+    for name in ("regime", "efw"):
+        with pytest.raises(NoReverseMatch):
+            reverse(f"api:{name}")
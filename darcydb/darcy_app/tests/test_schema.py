@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+
+from ..utils.schema import get_schema
+
+
+def test_get_schema_cached_by_geometry(settings, tmp_path):
+    """The schema is rendered once per geometry, a moved well gets a new schema."""
+    settings.DOCUMENTS_CACHE_DIR = str(tmp_path)
+    well = SimpleNamespace(pk=1, geom=Point(49.1, 55.7, srid=4326))
+    with mock.patch("darcydb.darcy_app.utils.schema.render_schema", return_value=b"png") as render:
+        assert get_schema(well) == get_schema(well)
+        well.geom = Point(49.2, 55.7, srid=4326)
+        get_schema(well)
+    assert render.call_count == 2
+    assert len(list((tmp_path / "schemas").iterdir())) == 1
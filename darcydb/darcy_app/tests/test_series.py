@@ -0,0 +1,56 @@
+import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+
+from ..utils.series import depression_arrays, depression_readings, depression_series, pack_readings
+
+
+def related(*items):
+    return SimpleNamespace(all=lambda: list(items))
+
+
+def measure(pk, minutes, value, field="water_depth"):
+    return SimpleNamespace(pk=pk, time_measure=datetime.timedelta(minutes=minutes), **{field: Decimal(value)})
+
+
+def test_depression_series_aligns_rates_within_tolerance():
+    """Rates are matched to the nearest level reading within the tolerance, levels are ordered by time."""
+    depression = SimpleNamespace(
+        is_packed=False,
+        waterdepths=related(measure(1, 10, "9.5"), measure(2, 1, "6.5"), measure(3, 2, "7.5")),
+        rates=related(
+            measure(1, 1.25, "2.5", "rate"),
+            measure(2, 10, "3.1", "rate"),
+            measure(3, 10, "9.0", "rate"),
+        ),
+    )
+    series = depression_series(depression, tolerance=datetime.timedelta(seconds=30))
+    assert [item.time_measure for item in series] == [datetime.timedelta(minutes=m) for m in (1, 2, 10)]
+    assert [item.rate for item in series] == [Decimal("2.5"), None, Decimal("3.1")]
+
+
+def test_depression_series_without_rates():
+    depression = SimpleNamespace(is_packed=False, waterdepths=related(measure(1, 1, "6.5")), rates=related())
+    assert depression_series(depression)[0].rate is None
+
+
+def packed(depression):
+    series_time, series_depth, series_rate = pack_readings(*depression_readings(depression))
+    return SimpleNamespace(is_packed=True, series_time=series_time, series_depth=series_depth, series_rate=series_rate)
+
+
+def test_packed_depression_reads_like_rows():
+    """Packing levels and rates onto one time axis keeps the aligned series and exposes NumPy arrays."""
+    depression = SimpleNamespace(
+        is_packed=False,
+        waterdepths=related(measure(1, 10, "9.5"), measure(2, 1, "6.5")),
+        rates=related(measure(1, 1.25, "2.5", "rate"), measure(2, 10, "3.125", "rate")),
+    )
+    compact = packed(depression)
+    assert depression_series(compact) == depression_series(depression)
+    arrays = depression_arrays(compact)
+    np.testing.assert_array_equal(arrays.time, [60, 75, 600])
+    np.testing.assert_array_equal(arrays.water_depth, [6.5, np.nan, 9.5])
+    np.testing.assert_array_equal(arrays.rate, [np.nan, 2.5, 3.125])
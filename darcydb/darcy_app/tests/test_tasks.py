@@ -0,0 +1,41 @@
+from unittest import mock
+
+import pytest
+from celery.result import EagerResult
+
+from ..models import DictEntities, Documents, DocumentsJob, Entities, Wells
+from ..tasks import generate_passport_task
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def passport_job(user):
+    entity = Entities.objects.create(name="тип документа")
+    typo = DictEntities.objects.create(name="Паспорт скважины", entity=entity)
+    well = Wells.objects.create(name="1", typo=typo)
+    doc = Documents.objects.create(name="Паспорт скважины №1", typo=typo)
+    return DocumentsJob.objects.create(kind=DocumentsJob.PASSPORT, doc=doc, content_object=well)
+
+
+def test_generate_passport_task_done(settings, passport_job):
+    """The job goes through running to done and keeps its timings."""
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with mock.patch("darcydb.darcy_app.tasks.generate_passport") as generator:
+        task_result = generate_passport_task.delay(passport_job.pk)
+    assert isinstance(task_result, EagerResult)
+    passport_job.refresh_from_db()
+    generator.assert_called_once_with(passport_job.content_object, passport_job.doc, timings=mock.ANY)
+    assert passport_job.status == DocumentsJob.DONE
+    assert passport_job.started and passport_job.finished
+    assert "total" in passport_job.timings
+
+
+def test_generate_passport_task_failed(settings, passport_job):
+    """A generator error is stored on the job."""
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with mock.patch("darcydb.darcy_app.tasks.generate_passport", side_effect=ValueError("no geom")):
+        generate_passport_task.delay(passport_job.pk)
+    passport_job.refresh_from_db()
+    assert passport_job.status == DocumentsJob.FAILED
+    assert passport_job.error == "no geom"
@@ -0,0 +1,59 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+from django.contrib.gis.geos import Point
+from django.db import transaction
+
+from ..models import Wells, WellsDrilledData, WellsRegime, WellsSample, WellsState
+from ..utils.well_state import WellStateRefresh, rebuild_well_states
+
+pytestmark = pytest.mark.django_db
+
+
+def test_state_follows_latest_measurements(typo, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        well = Wells.objects.create(name="1", typo=typo, geom=Point(49.1, 55.7, srid=4326))
+        drilled = WellsDrilledData.objects.create(
+            well=well, date_start=datetime.date(2010, 5, 1), date_end=datetime.date(2010, 6, 1)
+        )
+        drilled.waterdepths.create(water_depth=Decimal("12.50"), type_level=True)
+        drilled.depths.create(depth=Decimal("80.00"))
+        WellsRegime.objects.create(well=well, date=datetime.date(2020, 4, 1)).waterdepths.create(
+            water_depth=Decimal("10.10")
+        )
+        WellsSample.objects.create(well=well, date=datetime.date(2021, 7, 1), name="1")
+    # Все изменения транзакции обрабатываются одним отложенным пересчетом
+    assert len([callback for callback in callbacks if isinstance(callback, WellStateRefresh)]) == 1
+
+    state = WellsState.objects.get(well=well)
+    assert (state.water_depth, state.water_depth_date) == (Decimal("10.10"), datetime.date(2020, 4, 1))
+    assert (state.depth, state.depth_date) == (Decimal("80.00"), datetime.date(2010, 6, 1))
+    assert state.last_sample_date == datetime.date(2021, 7, 1)
+    assert state.last_efw is None
+
+
+def test_wells_scheduled_after_a_rolled_back_savepoint_are_refreshed(typo, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        well = Wells.objects.create(name="1", typo=typo, geom=Point(49.1, 55.7, srid=4326))
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with pytest.raises(RuntimeError), transaction.atomic():
+            WellsRegime.objects.create(well=well, date=datetime.date(2022, 1, 10)).waterdepths.create(
+                water_depth=Decimal("3.30")
+            )
+            raise RuntimeError
+        WellsSample.objects.create(well=well, date=datetime.date(2021, 7, 1), name="1")
+    # Отложенная функция точки сохранения откачена, скважина зарегистрирована повторно
+    assert len([callback for callback in callbacks if isinstance(callback, WellStateRefresh)]) == 1
+
+    state = WellsState.objects.get(well=well)
+    assert (state.water_depth, state.last_sample_date) == (None, datetime.date(2021, 7, 1))
+
+
+def test_rebuild_well_states(well):
+    WellsState.objects.all().delete()
+    WellsRegime.objects.create(well=well, date=datetime.date(2022, 1, 10)).waterdepths.create(
+        water_depth=Decimal("3.30")
+    )
+    assert rebuild_well_states(Wells.objects.filter(pk=well.pk)) == 1
+    assert WellsState.objects.get(well=well).water_depth == Decimal("3.30")
@@ -1,7 +1,14 @@
 from django.urls import path
 from rest_framework.urlpatterns import format_suffix_patterns
 
-from .views import WellsEfwView, WellsRegimeView
+from .views import (
+    RegimeExportView,
+    RegimeIngestView,
+    RegimeStatisticsView,
+    WellsEfwView,
+    WellsHydrographView,
+    WellsRegimeView,
+)
 
 urlpatterns = [
     path("regime/", WellsRegimeView.as_view(), name="regime"),
@@ -9,3 +16,13 @@ urlpatterns = [
 ]
 
 urlpatterns = format_suffix_patterns(urlpatterns)
+
+# Маршруты, подключаемые в /api/ (config/api_router.py)
+api_urlpatterns = [
+    path("regime/statistics/", RegimeStatisticsView.as_view(), name="regime-statistics"),
+    path("regime/bulk/", RegimeIngestView.as_view(), name="regime-bulk"),
+    path("regime/export/", RegimeExportView.as_view(), name="regime-export"),
+    path("wells/<int:pk>/hydrograph/", WellsHydrographView.as_view(), name="wells-hydrograph"),
+]
+
+api_urlpatterns = format_suffix_patterns(api_urlpatterns)
@@ -0,0 +1,359 @@
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Exists, Min, OuterRef, Q
+
+from ..models import WellsConstruction, WellsEfw, WellsEfwAnalysis
+from .dossier import first
+from .series import depression_arrays
+
+# Версия методики: при изменении расчетов все опыты пересчитываются
+ANALYSIS_VERSION = 1
+
+RECOVERY_TYPE = "восстановление уровня"
+
+SECONDS_PER_DAY = 86400
+# Дебит журнала ОФР в л/с -> м3/сут
+RATE_TO_DAILY = 86.4
+
+# Прямая Купера-Джейкоба строится по замерам последней части опыта (t >= LATE_TIME * t_конца),
+# где u = r²S/4Tt мало и логарифмическая аппроксимация функции Тейса применима
+LATE_TIME = 0.1
+THEIS_ITERATIONS = 50
+
+AquiferTest = namedtuple(
+    "AquiferTest", ["efw_id", "recovery", "time", "drawdown", "rate", "radius", "pump_time", "fingerprint"]
+)
+
+
+def well_function(u):
+    """
+    Функция скважины Тейса W(u) = E1(u), полиномиальные аппроксимации
+    Абрамовица-Стиган 5.1.53 (u <= 1) и 5.1.56 (u > 1), погрешность < 5e-5.
+    """
+    u = np.asarray(u, dtype=float)
+    small = np.minimum(u, 1.0)
+    series = (
+        -np.log(small)
+        - 0.57721566
+        + small
+        * (0.99999193 + small * (-0.24991055 + small * (0.05519968 + small * (-0.00976004 + small * 0.00107857))))
+    )
+    large = np.maximum(u, 1.0)
+    ratio = (large * (large + 2.334733) + 0.250621) / (large * (large + 3.330657) + 1.681534)
+    return np.where(u <= 1.0, series, ratio * np.exp(-large) / large)
+
+
+def pad(arrays):
+    """Ряды разной длины в одной матрице (опыт - строка), недостающие значения - NaN"""
+    matrix = np.full((len(arrays), max((len(array) for array in arrays), default=0)), np.nan)
+    for i, array in enumerate(arrays):
+        matrix[i, : len(array)] = array
+    return matrix
+
+
+def fit_lines(x, y, mask):
+    """
+    Прямые y = slope * x + intercept по отмеченным mask точкам каждой строки (МНК).
+    Возвращает slope, intercept, r2 и число точек; при менее чем двух точках - NaN.
+    """
+    points = mask.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(mask, x, 0).sum(axis=1) / points
+        y_mean = np.where(mask, y, 0).sum(axis=1) / points
+        dx = np.where(mask, x - x_mean[:, None], 0)
+        dy = np.where(mask, y - y_mean[:, None], 0)
+        sxx = (dx * dx).sum(axis=1)
+        slope = (dx * dy).sum(axis=1) / sxx
+        intercept = y_mean - slope * x_mean
+        residual = np.where(mask, y - slope[:, None] * x - intercept[:, None], 0)
+        r2 = 1 - (residual * residual).sum(axis=1) / (dy * dy).sum(axis=1)
+    invalid = (points < 2) | (sxx == 0)
+    return (
+        np.where(invalid, np.nan, slope),
+        np.where(invalid, np.nan, intercept),
+        np.where(invalid, np.nan, r2),
+        points,
+    )
+
+
+def late_time_mask(time, values):
+    valid = np.isfinite(time) & np.isfinite(values) & (time > 0)
+    end = np.nanmax(np.where(valid, time, np.nan), axis=1, initial=0)
+    return valid & (time >= LATE_TIME * end[:, None])
+
+
+def cooper_jacob(time, drawdown, rate, radius):
+    """
+    Метод Купера-Джейкоба для матрицы опытов: s = 2.3Q / 4πT * lg(2.25Tt / r²S).
+    time - сут, drawdown - м, rate - м3/сут, radius - м (NaN - упругая водоотдача не определяется).
+    Возвращает T (м2/сут), S, r2 и число точек по каждому опыту.
+    """
+    slope, intercept, r2, points = fit_lines(
+        np.log10(np.where(time > 0, time, np.nan)), drawdown, late_time_mask(time, drawdown)
+    )
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        transmissivity = np.where(slope > 0, 2.303 * rate / (4 * np.pi * slope), np.nan)
+        # t0 - пересечение прямой с осью нулевого понижения
+        storativity = 2.25 * transmissivity * 10 ** (-intercept / slope) / radius**2
+    return transmissivity, storativity, r2, points
+
+
+def theis(time, drawdown, rate, radius, transmissivity, storativity, iterations=THEIS_ITERATIONS):
+    """
+    Подбор T и S по формуле Тейса s = Q / 4πT * W(r²S / 4Tt) для всех опытов одновременно:
+    метод Левенберга-Марквардта по ln T и ln S, начальное приближение - результат Купера-Джейкоба.
+    """
+    mask = np.isfinite(time) & np.isfinite(drawdown) & (time > 0) & (drawdown > 0)
+    start = np.isfinite(transmissivity) & np.isfinite(storativity) & (transmissivity > 0) & (storativity > 0)
+    mask &= start[:, None]
+    time = np.where(mask, time, 1.0)
+    drawdown = np.where(mask, drawdown, 0.0)
+    factor = np.where(start, rate / (4 * np.pi), 1.0)[:, None]
+    radius2 = np.where(start, radius**2, 1.0)[:, None]
+    params = np.stack([np.log(np.where(start, transmissivity, 1.0)), np.log(np.where(start, storativity, 1.0))], 1)
+    damping = np.full(len(params), 1e-3)
+
+    def evaluate(params):
+        t_value, s_value = np.exp(params[:, :1]), np.exp(params[:, 1:])
+        u = radius2 * s_value / (4 * t_value * time)
+        scale = factor / t_value
+        model = scale * well_function(u)
+        residual = np.where(mask, drawdown - model, 0)
+        return model, scale * np.exp(-u), (residual * residual).sum(axis=1), residual
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore", under="ignore"):
+        model, decay, error, residual = evaluate(params)
+        for _ in range(iterations):
+            jac_t = np.where(mask, decay - model, 0)
+            jac_s = np.where(mask, -decay, 0)
+            a11 = (jac_t * jac_t).sum(axis=1)
+            a12 = (jac_t * jac_s).sum(axis=1)
+            a22 = (jac_s * jac_s).sum(axis=1)
+            g1 = (jac_t * residual).sum(axis=1)
+            g2 = (jac_s * residual).sum(axis=1)
+            a11, a22 = a11 * (1 + damping), a22 * (1 + damping)
+            determinant = a11 * a22 - a12 * a12
+            step = np.stack([(a22 * g1 - a12 * g2) / determinant, (a11 * g2 - a12 * g1) / determinant], 1)
+            step = np.clip(np.nan_to_num(step), -2, 2)
+            candidate = evaluate(params + step)
+            better = candidate[2] < error
+            params = np.where(better[:, None], params + step, params)
+            model = np.where(better[:, None], candidate[0], model)
+            decay = np.where(better[:, None], candidate[1], decay)
+            residual = np.where(better[:, None], candidate[3], residual)
+            error = np.where(better, candidate[2], error)
+            damping = np.where(better, damping / 10, damping * 10)
+        total = np.where(mask, drawdown - np.nanmean(np.where(mask, drawdown, np.nan), axis=1)[:, None], 0)
+        r2 = 1 - error / (total * total).sum(axis=1)
+    points = mask.sum(axis=1)
+    fitted = start & (points >= 2)
+    return (
+        np.where(fitted, np.exp(params[:, 0]), np.nan),
+        np.where(fitted, np.exp(params[:, 1]), np.nan),
+        np.where(fitted, r2, np.nan),
+        points,
+    )
+
+
+def theis_recovery(time, drawdown, rate, pump_time):
+    """
+    Метод восстановления уровня Тейса: s' = 2.3Q / 4πT * lg(t / t'),
+    t' - время от остановки откачки, t = tp + t', tp - продолжительность откачки (сут).
+    Упругая водоотдача по восстановлению не определяется.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = np.log10((pump_time[:, None] + time) / np.where(time > 0, time, np.nan))
+    slope, _, r2, points = fit_lines(x, drawdown, late_time_mask(time, drawdown) & np.isfinite(x))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        transmissivity = np.where(slope > 0, 2.303 * rate / (4 * np.pi * slope), np.nan)
+    return transmissivity, r2, points
+
+
+def static_level(efw):
+    measure = first(efw.waterdepths.all())
+    return float(measure.water_depth) if measure else None
+
+
+def mean_rate(arrays):
+    rates = arrays.rate[np.isfinite(arrays.rate)]
+    return float(rates.mean()) * RATE_TO_DAILY if rates.size else np.nan
+
+
+def series_fingerprint(*values):
+    digest = hashlib.sha1(str(ANALYSIS_VERSION).encode())
+    for value in values:
+        digest.update(value.tobytes() if isinstance(value, np.ndarray) else repr(value).encode())
+    return digest.hexdigest()
+
+
+def build_test(efw, pumping, radius):
+    """
+    Опыт для интерпретации по ОФР с предзагруженными журналом и замерами.
+    Для восстановления уровня дебит, статический уровень и продолжительность
+    берутся из откачки pumping (ОФР той же скважины по тому же документу).
+    """
+    depression = first(efw.wellsdepression_set.all())
+    recovery = efw.type_efw.name == RECOVERY_TYPE
+    source = pumping if recovery else efw
+    if depression is None or source is None:
+        return None
+    level = static_level(source) if recovery else static_level(efw)
+    if recovery and level is None:
+        level = static_level(efw)
+    if level is None:
+        return None
+    arrays = depression_arrays(depression)
+    if recovery:
+        source_depression = first(pumping.wellsdepression_set.all())
+        if source_depression is None:
+            return None
+        source_arrays = depression_arrays(source_depression)
+        rate = mean_rate(source_arrays)
+        if pumping.pump_time:
+            pump_time = pumping.pump_time.total_seconds() / SECONDS_PER_DAY
+        else:
+            pump_time = np.nanmax(source_arrays.time, initial=np.nan) / SECONDS_PER_DAY
+    else:
+        rate, pump_time = mean_rate(arrays), np.nan
+    time = arrays.time / SECONDS_PER_DAY
+    drawdown = arrays.water_depth - level
+    return AquiferTest(
+        efw.pk,
+        recovery,
+        time,
+        drawdown,
+        rate,
+        radius,
+        pump_time,
+        series_fingerprint(time, drawdown, rate, radius, pump_time),
+    )
+
+
+def collect_tests(efws):
+    """
+    Опыты по выборке ОФР: замеры журналов, дебит, статический уровень и радиус
+    скважины (половина наименьшего диаметра конструкции, мм -> м) за несколько запросов.
+    """
+    efws = list(efws)
+    efw_ids = [efw.pk for efw in efws]
+    well_ids = {efw.well_id for efw in efws}
+    radii = {
+        row["well"]: row["diameter"] / 2000
+        for row in WellsConstruction.objects.filter(well__in=well_ids)
+        .values("well")
+        .annotate(diameter=Min("diameter"))
+    }
+    # Откачки, по которым интерпретируются восстановления уровня выборки (та же скважина и документ)
+    recovery = WellsEfw.objects.filter(
+        pk__in=efw_ids, type_efw__name=RECOVERY_TYPE, well=OuterRef("well"), doc=OuterRef("doc")
+    )
+    pumping_tests = WellsEfw.objects.exclude(type_efw__name=RECOVERY_TYPE).filter(Exists(recovery))
+    related = (
+        WellsEfw.objects.filter(Q(pk__in=efw_ids) | Q(pk__in=pumping_tests.values("pk")))
+        .select_related("type_efw")
+        .prefetch_related("waterdepths", "wellsdepression_set__waterdepths", "wellsdepression_set__rates")
+    )
+    by_pk = {efw.pk: efw for efw in related}
+    pumping = {}
+    for efw in by_pk.values():
+        if efw.type_efw.name != RECOVERY_TYPE and efw.doc_id:
+            pumping.setdefault((efw.well_id, efw.doc_id), efw)
+    tests = []
+    for efw in efws:
+        efw = by_pk[efw.pk]
+        test = build_test(efw, pumping.get((efw.well_id, efw.doc_id)), radii.get(efw.well_id, np.nan))
+        if test is not None:
+            tests.append(test)
+    return tests
+
+
+def analyze_tests(tests):
+    """
+    Интерпретация опытов одним пакетом: откачки - Купер-Джейкоб и Тейс,
+    восстановление уровня - метод Тейса. Возвращает несохраненные WellsEfwAnalysis.
+    """
+
+    def value(array, i):
+        return float(array[i]) if np.isfinite(array[i]) else None
+
+    results = []
+    pumping = [test for test in tests if not test.recovery]
+    if pumping:
+        time, drawdown = pad([test.time for test in pumping]), pad([test.drawdown for test in pumping])
+        rate = np.array([test.rate for test in pumping])
+        radius = np.array([test.radius for test in pumping])
+        jacob = cooper_jacob(time, drawdown, rate, radius)
+        fitted = theis(time, drawdown, rate, radius, jacob[0], jacob[1])
+        for method, (transmissivity, storativity, r2, points) in (
+            (WellsEfwAnalysis.COOPER_JACOB, jacob),
+            (WellsEfwAnalysis.THEIS, fitted),
+        ):
+            for i, test in enumerate(pumping):
+                results.append(
+                    WellsEfwAnalysis(
+                        efw_id=test.efw_id,
+                        method=method,
+                        transmissivity=value(transmissivity, i),
+                        storativity=value(storativity, i),
+                        rate=value(rate, i),
+                        points=int(points[i]),
+                        r2=value(r2, i),
+                        fingerprint=test.fingerprint,
+                    )
+                )
+    recovery = [test for test in tests if test.recovery]
+    if recovery:
+        rate = np.array([test.rate for test in recovery])
+        transmissivity, r2, points = theis_recovery(
+            pad([test.time for test in recovery]),
+            pad([test.drawdown for test in recovery]),
+            rate,
+            np.array([test.pump_time for test in recovery]),
+        )
+        for i, test in enumerate(recovery):
+            results.append(
+                WellsEfwAnalysis(
+                    efw_id=test.efw_id,
+                    method=WellsEfwAnalysis.RECOVERY,
+                    transmissivity=value(transmissivity, i),
+                    rate=value(rate, i),
+                    points=int(points[i]),
+                    r2=value(r2, i),
+                    fingerprint=test.fingerprint,
+                )
+            )
+    return results
+
+
+def run_analysis(efws=None, force=False, chunk_size=500):
+    """
+    Пакетная интерпретация ОФР. Опыты, замеры которых не изменились с прошлого
+    расчета (совпадает fingerprint), пропускаются, если не задан force.
+    Возвращает (пересчитано, пропущено).
+    """
+    efws = (WellsEfw.objects.all() if efws is None else efws).order_by("pk")
+    analyzed = skipped = 0
+    ids = list(efws.values_list("pk", flat=True))
+    for start in range(0, len(ids), chunk_size):
+        end = start + chunk_size
+        chunk = WellsEfw.objects.filter(pk__in=ids[start:end]).only("pk", "well_id")
+        tests = collect_tests(chunk)
+        if not force:
+            stored = dict(
+                WellsEfwAnalysis.objects.filter(efw__in=[test.efw_id for test in tests]).values_list(
+                    "efw_id", "fingerprint"
+                )
+            )
+            changed = [test for test in tests if stored.get(test.efw_id) != test.fingerprint]
+            skipped += len(tests) - len(changed)
+            tests = changed
+        if not tests:
+            continue
+        with transaction.atomic():
+            WellsEfwAnalysis.objects.filter(efw__in=[test.efw_id for test in tests]).delete()
+            WellsEfwAnalysis.objects.bulk_create(analyze_tests(tests))
+        analyzed += len(tests)
+    return analyzed, skipped
@@ -0,0 +1,68 @@
+import hashlib
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from pdf2image import convert_from_bytes
+from PIL import Image
+
+from ..models import AttachmentsDerivatives
+
+# Страницы A4 при 150 dpi
+PRINT_DPI = 150
+PRINT_SIZE = (1240, 1754)
+THUMB_SIZE = (300, 300)
+JPEG_QUALITY = 85
+
+
+def read_source(attachment):
+    with attachment.img.open("rb") as f:
+        return f.read()
+
+
+def source_images(content, name):
+    if name.lower().endswith(".pdf"):
+        return convert_from_bytes(content, dpi=PRINT_DPI)
+    return [Image.open(io.BytesIO(content))]
+
+
+def encode_image(image, size):
+    image = image.convert("RGB")
+    image.thumbnail(size)
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def delete_derivatives(attachment):
+    # Файлы удаляются обработчиком post_delete (signals.py)
+    attachment.derivatives.all().delete()
+
+
+def build_derivatives(attachment, force=False):
+    """
+    Растрирование вложения: страницы печатного разрешения (JPEG) и миниатюра первой страницы.
+    Если производные уже построены для текущего содержимого файла, ничего не делает.
+    """
+    content = read_source(attachment)
+    fingerprint = hashlib.sha1(content).hexdigest()
+    existing = attachment.derivatives.all()
+    if not force and existing.exists() and not existing.exclude(fingerprint=fingerprint).exists():
+        return list(existing)
+    images = source_images(content, attachment.img.name)
+    base_name = os.path.splitext(os.path.basename(attachment.img.name))[0]
+    files = [
+        (AttachmentsDerivatives.PRINT, page, f"{base_name}_{page}.jpg", encode_image(image, PRINT_SIZE))
+        for page, image in enumerate(images)
+    ]
+    files.append((AttachmentsDerivatives.THUMB, 0, f"{base_name}_thumb.jpg", encode_image(images[0], THUMB_SIZE)))
+    with transaction.atomic():
+        delete_derivatives(attachment)
+        derivatives = []
+        for kind, page, name, data in files:
+            derivative = AttachmentsDerivatives(attachment=attachment, kind=kind, page=page, fingerprint=fingerprint)
+            derivative.file.save(f"{attachment.pk}/{name}", ContentFile(data), save=False)
+            derivative.save()
+            derivatives.append(derivative)
+    return derivatives
@@ -0,0 +1,246 @@
+import datetime
+import io
+import resource
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import ExitStack
+from decimal import Decimal
+from unittest import mock
+
+import tilemapbase
+from django.contrib.gis.geos import Point
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from PIL import Image
+
+from ..models import (
+    AquiferCodes,
+    Attachments,
+    AttachmentsDerivatives,
+    DictEntities,
+    Documents,
+    DocumentsPath,
+    Entities,
+    Wells,
+    WellsAquifers,
+    WellsAquiferUsage,
+    WellsConstruction,
+    WellsDepression,
+    WellsEfw,
+    WellsLithology,
+)
+from .attachments import build_derivatives
+from .passport_gen import generate_passport
+from .pump_journals_gen import generate_pump_journal
+
+BenchmarkCase = namedtuple("BenchmarkCase", ["layers", "constructions", "readings", "attachments"])
+
+# Синтетические скважины: слои литологии, элементы конструкции, замеры ОФР, вложения
+BENCHMARK_CASES = {
+    "small": BenchmarkCase(layers=3, constructions=2, readings=20, attachments=0),
+    "medium": BenchmarkCase(layers=15, constructions=4, readings=200, attachments=2),
+    "large": BenchmarkCase(layers=60, constructions=8, readings=2000, attachments=6),
+}
+# Показатели, по которым результаты сравниваются с эталоном (больше - хуже)
+COMPARED_METRICS = ("seconds", "queries", "peak_rss_mb", "pdf_kb")
+CENTIMETRE = Decimal("0.01")
+STUB_ADDRESS = {"country": "Россия", "state": "Республика Татарстан", "county": ""}
+
+DICTS = {
+    "тип скважины": ["Разведочная"],
+    "тип документа": ["Паспорт скважины", "Журнал опытно-фильтрационных работ"],
+    "порода": ["песок", "глина"],
+    "тип конструкции": ["обсадная колонна"],
+    "тип ОФР": ["откачки одиночные опытные", "восстановление уровня"],
+}
+
+
+def peak_rss_mb():
+    """Максимальный объем резидентной памяти процесса с момента запуска, МБ"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает килобайты, macOS - байты
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+def get_dicts():
+    dicts = {}
+    for entity_name, names in DICTS.items():
+        entity, _ = Entities.objects.get_or_create(name=entity_name)
+        for name in names:
+            dicts[name] = DictEntities.objects.get_or_create(entity=entity, name=name)[0]
+    return dicts
+
+
+def synthetic_image(index):
+    image = Image.new("RGB", (1240, 1754), color=(255, 255 - index * 20 % 255, 255))
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+
+def create_synthetic_well(name, case, dicts):
+    """
+    Скважина с заданным количеством слоев, элементов конструкции, замеров откачки
+    и вложений. Возвращает скважину и ее журнал опытной откачки.
+    """
+    well = Wells.objects.create(name=name, typo=dicts["Разведочная"], geom=Point(49.1, 55.7, srid=4326), extra={})
+    layer_depth = (Decimal(200) / case.layers).quantize(CENTIMETRE)
+    for i in range(case.layers):
+        aquifer, _ = AquiferCodes.objects.get_or_create(aquifer_id=900000 + i, defaults={"aquifer_name": f"bench-{i}"})
+        WellsAquifers.objects.create(well=well, aquifer=aquifer, bot_elev=layer_depth * (i + 1))
+        WellsLithology.objects.create(
+            well=well,
+            rock=dicts["песок" if i % 2 else "глина"],
+            bot_elev=layer_depth * (i + 1),
+            extra={"description": f"слой {i + 1}"},
+        )
+    WellsAquiferUsage.objects.create(well=well, aquifer=aquifer)
+    construction_depth = (Decimal(200) / case.constructions).quantize(CENTIMETRE)
+    for i in range(case.constructions):
+        WellsConstruction.objects.create(
+            well=well,
+            construction_type=dicts["обсадная колонна"],
+            diameter=325 - 20 * i,
+            depth_from=construction_depth * i,
+            depth_till=construction_depth * (i + 1),
+        )
+    efw = WellsEfw.objects.create(
+        well=well,
+        date=datetime.datetime(2020, 5, 1, tzinfo=datetime.timezone.utc),
+        type_efw=dicts["откачки одиночные опытные"],
+        pump_time=datetime.timedelta(minutes=case.readings),
+        extra={"comments": "Синтетические данные"},
+    )
+    efw.waterdepths.create(water_depth=Decimal("5.00"), time_measure=datetime.timedelta(0))
+    depression = WellsDepression.objects.create(efw=efw)
+    for i in range(case.readings):
+        time_measure = datetime.timedelta(minutes=i + 1)
+        depression.waterdepths.create(
+            water_depth=(Decimal(5) + Decimal(i) / case.readings).quantize(CENTIMETRE), time_measure=time_measure
+        )
+        depression.rates.create(rate=Decimal("2.5"), time_measure=time_measure)
+    for i in range(case.attachments):
+        attachment = Attachments(content_object=well)
+        attachment.img.save(f"bench_{name}_{i}.png", ContentFile(synthetic_image(i)), save=False)
+        attachment.save()
+        build_derivatives(attachment)
+    efw.doc = Documents.objects.create(
+        name=f"Журнал опытной откачки из скважины №{name}",
+        typo=dicts["Журнал опытно-фильтрационных работ"],
+        creation_date=datetime.date.today(),
+        object_id=efw.pk,
+    )
+    efw.save()
+    return well, efw
+
+
+def stub_environment(stack, media_root):
+    """
+    Без сети и внешнего хранилища: геокодирование возвращает постоянный адрес,
+    тайлы OSM не загружаются (схема рисуется без подложки), файлы пишутся в media_root.
+    """
+    stack.enter_context(mock.patch("darcydb.darcy_app.utils.geocode.fetch_address", return_value=STUB_ADDRESS))
+    stack.enter_context(mock.patch.object(tilemapbase.Plotter, "plot"))
+    storage = FileSystemStorage(location=media_root)
+    for model, field_name in ((DocumentsPath, "path"), (Attachments, "img"), (AttachmentsDerivatives, "file")):
+        stack.enter_context(mock.patch.object(model._meta.get_field(field_name), "storage", storage))
+
+
+def measure(func, document):
+    """Время, количество запросов, пиковая память и размер PDF одного вызова генератора"""
+    timings = {}
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        func(timings)
+        seconds = time.perf_counter() - start
+    document_path = DocumentsPath.objects.filter(doc=document).first()
+    return {
+        "seconds": round(seconds, 3),
+        "queries": len(queries),
+        "peak_rss_mb": peak_rss_mb(),
+        "pdf_kb": round(document_path.path.size / 1024, 1) if document_path else 0,
+        "stages": timings,
+    }
+
+
+def measure_cold(func, document, cache_root):
+    """
+    Прогон без кэшей прошлых прогонов: PNG схем пишутся в новый временный каталог
+    вместо DOCUMENTS_CACHE_DIR, память формул процесса очищается
+    """
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.dict("darcydb.darcy_app.utils.formula._memory", clear=True))
+        stack.enter_context(override_settings(DOCUMENTS_CACHE_DIR=tempfile.mkdtemp(dir=cache_root)))
+        return measure(func, document)
+
+
+def run_benchmark(case_names=None, repeat=1, stdout=None):
+    """
+    Генерация паспорта и журнала опытной откачки для синтетических скважин.
+    Все данные создаются в транзакции, которая откатывается по завершении.
+    Случаи выполняются от простого к сложному: пиковая память процесса не убывает.
+    Возвращает {случай: {документ: показатели}}; при repeat > 1 берется
+    лучшее время и наибольшие остальные показатели.
+    """
+    case_names = case_names or list(BENCHMARK_CASES)
+    results = {}
+    with tempfile.TemporaryDirectory() as media_root, ExitStack() as stack:
+        stub_environment(stack, media_root)
+        cache_root = stack.enter_context(tempfile.TemporaryDirectory())
+        with transaction.atomic():
+            dicts = get_dicts()
+            for index, case_name in enumerate(case_names):
+                case = BENCHMARK_CASES[case_name]
+                well, efw = create_synthetic_well(f"bench{index}", case, dicts)
+                passport = Documents.objects.create(
+                    name=f"Паспорт скважины №{well.pk}",
+                    typo=dicts["Паспорт скважины"],
+                    creation_date=datetime.date.today(),
+                    object_id=well.pk,
+                )
+                documents = {
+                    "passport": (
+                        lambda timings: generate_passport(well, passport, force=True, timings=timings),
+                        passport,
+                    ),
+                    "pump_journal": (lambda timings: generate_pump_journal(efw, efw.doc, timings=timings), efw.doc),
+                }
+                results[case_name] = {"case": case._asdict()}
+                for doc_name, (func, document) in documents.items():
+                    runs = [measure_cold(func, document, cache_root) for _ in range(repeat)]
+                    best = min(runs, key=lambda run: run["seconds"])
+                    for metric in COMPARED_METRICS[1:]:
+                        best[metric] = max(run[metric] for run in runs)
+                    results[case_name][doc_name] = best
+                    if stdout:
+                        stdout.write(f"{case_name} {doc_name}: {format_result(best)}")
+            transaction.set_rollback(True)
+    return results
+
+
+def format_result(result):
+    return (
+        f"{result['seconds']} сек, запросов {result['queries']}, "
+        f"память {result['peak_rss_mb']} МБ, PDF {result['pdf_kb']} КБ"
+    )
+
+
+def compare_results(results, baseline, threshold):
+    """
+    Показатели, ухудшившиеся относительно эталона более чем на threshold (доля).
+    Возвращает список (случай, документ, показатель, эталон, результат).
+    """
+    regressions = []
+    for case_name, documents in results.items():
+        for doc_name, result in documents.items():
+            expected = baseline.get(case_name, {}).get(doc_name)
+            if doc_name == "case" or not expected:
+                continue
+            for metric in COMPARED_METRICS:
+                if metric in expected and result[metric] > expected[metric] * (1 + threshold):
+                    regressions.append((case_name, doc_name, metric, expected[metric], result[metric]))
+    return regressions
@@ -0,0 +1,97 @@
+import itertools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+
+from ..models import Wells
+from .passport_gen import generate_passport, get_passport_document
+from .renderer import renderer
+
+
+class BulkReport:
+    """
+    Итог пакетной генерации документов: количество, время, производительность и ошибки
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.skipped = 0
+        self.failed = []
+        self.durations = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, well_id, duration, error=None, skipped=False):
+        if error:
+            self.failed.append((well_id, error))
+        elif skipped:
+            self.skipped += 1
+        else:
+            self.durations.append(duration)
+            self.done += 1
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def throughput(self):
+        """Документов в минуту"""
+        return round(self.done / self.elapsed * 60, 2) if self.elapsed else 0.0
+
+    @property
+    def mean_duration(self):
+        return round(sum(self.durations) / len(self.durations), 2) if self.durations else 0.0
+
+    def __str__(self):
+        lines = [
+            f"Скважин: {self.total}, успешно: {self.done}, без изменений: {self.skipped}, "
+            f"с ошибкой: {len(self.failed)}",
+            f"Общее время: {self.elapsed:.1f} сек, производительность: {self.throughput} док/мин, "
+            f"среднее время документа: {self.mean_duration} сек",
+        ]
+        lines += [f"  скважина {well_id}: {error}" for well_id, error in self.failed]
+        return "\n".join(lines)
+
+
+def _init_worker():
+    # Шаблоны и таблица стилей компилируются один раз на рабочий процесс
+    renderer.warm()
+
+
+def render_passport(well_id, force=False):
+    start = time.perf_counter()
+    try:
+        well = Wells.objects.select_related("typo", "intake", "field").get(pk=well_id)
+        rendered = generate_passport(well, get_passport_document(well), force=force)
+    except Exception as e:
+        return well_id, time.perf_counter() - start, f"{type(e).__name__}: {e}", False
+    return well_id, time.perf_counter() - start, None, not rendered
+
+
+def render_passports(wells, processes=None, stdout=None, force=False):
+    """
+    Генерация паспортов для набора скважин в пуле рабочих процессов.
+    Паспорта скважин без изменений пропускаются, если не указан force.
+    Возвращает BulkReport.
+    """
+    well_ids = list(wells.values_list("pk", flat=True))
+    report = BulkReport(len(well_ids))
+    # Шаблоны компилируются до запуска пула и наследуются рабочими процессами,
+    # соединения с БД дочерние процессы открывают собственные
+    renderer.warm()
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("fork"), initializer=_init_worker
+    ) as executor:
+        for well_id, duration, error, skipped in executor.map(
+            render_passport, well_ids, itertools.repeat(force, len(well_ids))
+        ):
+            report.add(well_id, duration, error, skipped)
+            if stdout:
+                status = "ошибка" if error else "без изменений" if skipped else "готово"
+                stdout.write(f"{well_id}: {status} за {duration:.1f} сек")
+    return report.finish()
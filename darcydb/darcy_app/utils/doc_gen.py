@@ -1,18 +1,50 @@
-import datetime
 import os
 import re
-
-import requests
-
-from ..models import (
-    LicenseToWells,
-    WaterUsersChange,
-    WellsAquiferUsage,
-    WellsConstruction,
-    WellsDrilledData,
-    WellsGeophysics,
-    WellsSample,
-)
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import cached_property
+
+from django.conf import settings
+from django.core.files import File
+
+from ..models import DocumentsPath
+from .dossier import WellDossier
+from .geocode import reverse_geocode
+
+
+@contextmanager
+def timed(timings, name):
+    """Время выполнения этапа генерации документа, сек"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - start, 3)
+
+
+def timed_call(func, *args, **kwargs):
+    """Результат вызова и время выполнения, сек (для задач в пуле потоков)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, round(time.perf_counter() - start, 3)
+
+
+def save_document_pdf(document, name, html):
+    """
+    Запись сформированного PDF в файл документа (DocumentsPath).
+    PDF пишется во временный файл (в памяти до DOCUMENTS_SPOOL_MAX_SIZE, далее на диске)
+    и передается в хранилище потоком, без промежуточных копий в памяти.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=settings.DOCUMENTS_SPOOL_MAX_SIZE, suffix=".pdf") as output:
+        html.write_pdf(target=output)
+        output.seek(0)
+        document_path = DocumentsPath.objects.filter(doc=document).first()
+        if document_path:
+            document_path.delete()
+        document_path = DocumentsPath(doc=document)
+        document_path.path.save(name, File(output, name=name))
+    return document_path
 
 
 class PDF:
@@ -82,6 +114,10 @@ class PDF:
         self.instance = instance
         self.doc_instance = doc_instance
 
+    @cached_property
+    def dossier(self):
+        return WellDossier(self.instance)
+
     def form_lithology_description(self, lit):
         string_desc = [
             f"{self.check_none(lit.color)} {lit.rock}",
@@ -109,14 +145,10 @@ class PDF:
         return intakes if intakes else ""
 
     def get_license(self):
-        license_to_wells = LicenseToWells.objects.filter(well=self.instance).first()
-        return license_to_wells.license if license_to_wells else None
+        return self.dossier.license
 
     def get_water_user(self):
-        licenses = self.get_license()
-        if licenses:
-            water_users_change = WaterUsersChange.objects.filter(license=licenses).first()
-            return water_users_change.water_user if water_users_change else None
+        return self.dossier.water_user
 
     def create_title(self):
         water_user = self.get_water_user()
@@ -135,62 +167,22 @@ class PDF:
         return title_info
 
     def get_address(self):
-        lat, lon = self.instance.geom.y, self.instance.geom.x
-        url = f"https://nominatim.openstreetmap.org/reverse?lat={lat}&lon={lon}&format=json&accept-language=ru&zoom=15"
-        try:
-            result = requests.get(url=url)
-            address = result.json()
-            return address["address"]
-        except Exception as e:
-            return e
+        return reverse_geocode(self.instance.geom)
 
     def get_drilled_instance(self):
-        return WellsDrilledData.objects.filter(well=self.instance).first()
+        return self.dossier.drilled
 
     def get_geophysics_instance(self):
-        return WellsGeophysics.objects.filter(well=self.instance).order_by("-date").first()
+        return self.dossier.geophysics
 
     def get_sample_instance(self):
-        return WellsSample.objects.filter(well=self.instance).order_by("-date").first()
+        return self.dossier.sample
 
     def get_aquifer_usage(self):
-        aquifers = WellsAquiferUsage.objects.filter(well=self.instance)
-        return aquifers
+        return self.dossier.aquifer_usage
 
     def create_construction_data(self):
-        construction = WellsConstruction.objects.filter(well=self.instance)
-        if construction.exists():
-            for qs in construction:
-                qs.date = qs.date if qs.date else "Нет сведений"
-        return construction
-
-    def get_construction_archive(self, archive_date):
-        construction = self.create_construction_data()
-        if archive_date:
-            u_construction = construction.filter(date=archive_date.date)
-        else:
-            u_construction = construction.filter(date__isnull=False).exclude(date__year=datetime.datetime.now().year)
-        return u_construction
-
-    def get_construction_new(self, archive_date):
-        construction = self.create_construction_data()
-        if archive_date:
-            u_construction = construction.exclude(date=archive_date.date)
-        else:
-            u_construction = construction
-        return u_construction
+        return self.dossier.construction_rows(self.dossier.constructions)
 
     def construction_define(self, archive):
-        construction = self.create_construction_data()
-        if construction.exists():
-            archive_date = (
-                construction.filter(date__isnull=False).exclude(date__year=datetime.datetime.now().year).first()
-            )
-            if archive:
-                u_construction = self.get_construction_archive(archive_date)
-            else:
-                u_construction = self.get_construction_new(archive_date)
-            for qs in u_construction:
-                qs.date = qs.date if qs.date else "Нет сведений"
-            return u_construction
-        return construction
+        return self.dossier.constructions_define(archive)
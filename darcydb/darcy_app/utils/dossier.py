@@ -0,0 +1,162 @@
+import copy
+import datetime
+
+from django.db.models import Prefetch
+
+from ..models import (
+    Attachments,
+    LicenseToWells,
+    WaterUsersChange,
+    WellsAquifers,
+    WellsAquiferUsage,
+    WellsChem,
+    WellsConstruction,
+    WellsDepression,
+    WellsDrilledData,
+    WellsEfw,
+    WellsGeophysics,
+    WellsLithology,
+    WellsSample,
+)
+
+LITHOLOGY_RELATED = (
+    "rock",
+    "color",
+    "composition",
+    "structure",
+    "mineral",
+    "secondary_change",
+    "cement",
+    "fracture",
+    "weathering",
+    "caverns",
+    "inclusions",
+)
+ATTACHMENTS = Prefetch("attachments", queryset=Attachments.objects.prefetch_related("derivatives"))
+NO_DATA = "Нет сведений"
+
+
+def first(items):
+    """Аналог QuerySet.first() для неупорядоченной выборки: запись с наименьшим id"""
+    return min(items, key=lambda item: item.pk, default=None)
+
+
+def last_measure(items):
+    """Последний по времени замер"""
+    measured = [item for item in items if item.time_measure is not None]
+    return max(measured, key=lambda item: item.time_measure, default=None)
+
+
+def select_constructions(constructions, archive):
+    """
+    Элементы конструкции скважины (упорядоченные по depth_from) на дату архивных
+    сведений - первую дату не текущего года (archive=True), или фактические.
+    """
+    current_year = datetime.datetime.now().year
+    dated = [c for c in constructions if c.date is not None and c.date.year != current_year]
+    archive_date = dated[0].date if dated else None
+    if archive:
+        return [c for c in constructions if c.date == archive_date] if archive_date else dated
+    return [c for c in constructions if c.date != archive_date] if archive_date else list(constructions)
+
+
+class WellDossier:
+    """
+    Все сведения о скважине, необходимые для паспорта и журнала ОФР.
+    Загружаются фиксированным числом запросов с prefetch_related,
+    независимо от количества слоев, конструкций и замеров; разделы
+    документов строятся по данным в памяти.
+    """
+
+    def __init__(self, well):
+        self.well = well
+        link = LicenseToWells.objects.filter(well=well).select_related("license").order_by("pk").first()
+        self.license = link.license if link else None
+        self.water_user = None
+        if self.license:
+            change = (
+                WaterUsersChange.objects.filter(license=self.license)
+                .select_related("water_user")
+                .order_by("pk")
+                .first()
+            )
+            self.water_user = change.water_user if change else None
+        self.drilled = WellsDrilledData.objects.filter(well=well).prefetch_related("depths", "waterdepths").first()
+        self.geophysics = (
+            WellsGeophysics.objects.filter(well=well)
+            .order_by("-date")
+            .prefetch_related("depths", "waterdepths", ATTACHMENTS)
+            .first()
+        )
+        self.sample = (
+            WellsSample.objects.filter(well=well)
+            .order_by("-date")
+            .select_related("doc__org_executor")
+            .prefetch_related(
+                Prefetch("chemvalues", queryset=WellsChem.objects.select_related("parameter")), ATTACHMENTS
+            )
+            .first()
+        )
+        self.aquifers = list(WellsAquifers.objects.filter(well=well).select_related("aquifer"))
+        self.lithology = list(WellsLithology.objects.filter(well=well).select_related(*LITHOLOGY_RELATED))
+        self.aquifer_usage = list(WellsAquiferUsage.objects.filter(well=well))
+        self.constructions = list(WellsConstruction.objects.filter(well=well).select_related("construction_type"))
+        self.efws = list(
+            WellsEfw.objects.filter(well=well)
+            .order_by("-date")
+            .select_related("type_efw", "pump_type", "level_meter", "method_measure", "rate_measure")
+            .prefetch_related(
+                "waterdepths",
+                "lugs",
+                Prefetch(
+                    "wellsdepression_set", queryset=WellsDepression.objects.prefetch_related("waterdepths", "rates")
+                ),
+            )
+        )
+        self.attachments = list(well.attachments.prefetch_related("derivatives"))
+
+    @property
+    def used_aquifers(self):
+        return {usage.aquifer_id for usage in self.aquifer_usage}
+
+    def aquifer_for(self, layer):
+        """Гидрогеологическое подразделение слоя литологической колонки"""
+        above = [aq for aq in self.aquifers if aq.bot_elev <= layer.bot_elev]
+        if above:
+            return above[-1]
+        return self.aquifers[0] if self.aquifers else None
+
+    def get_efw(self, pk):
+        return next((efw for efw in self.efws if efw.pk == pk), None)
+
+    def efws_of_type(self, exclude=(), include=()):
+        return [
+            efw
+            for efw in self.efws
+            if efw.type_efw.name not in exclude and (not include or efw.type_efw.name in include)
+        ]
+
+    @staticmethod
+    def depression(efw):
+        return first(efw.wellsdepression_set.all())
+
+    @staticmethod
+    def static_level(obj):
+        measure = first(obj.waterdepths.all())
+        return measure.water_depth if measure else ""
+
+    def constructions_define(self, archive):
+        """
+        Конструкция скважины на дату архивных сведений (archive=True) или фактическая.
+        Возвращает копии записей, в которых пустая дата заменена на "Нет сведений".
+        """
+        return self.construction_rows(select_constructions(self.constructions, archive))
+
+    @staticmethod
+    def construction_rows(constructions):
+        rows = []
+        for construction in constructions:
+            construction = copy.copy(construction)
+            construction.date = construction.date or NO_DATA
+            rows.append(construction)
+        return rows
@@ -0,0 +1,80 @@
+import csv
+from itertools import islice
+
+from ..models import RegimeMeasurement, Wells
+
+# Параметр выгрузки -> значения RegimeMeasurement.parameter
+EXPORT_PARAMETERS = {
+    "all": (RegimeMeasurement.LEVEL, RegimeMeasurement.TEMPERATURE),
+    "level": (RegimeMeasurement.LEVEL,),
+    "temperature": (RegimeMeasurement.TEMPERATURE,),
+}
+PARAMETER_NAMES = {RegimeMeasurement.LEVEL: "level", RegimeMeasurement.TEMPERATURE: "temperature"}
+
+EXPORT_HEADER = ["well", "well_name", "date", "time_measure", "parameter", "value"]
+
+# Строк, читаемых из серверного курсора за раз (и отдаваемых одним фрагментом ответа)
+EXPORT_CHUNK_SIZE = 5000
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: writerow возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def export_wells(wells=None, intake=None, field=None, polygon=None):
+    """Скважины выгрузки: пересечение заданных условий"""
+    queryset = Wells.objects.all()
+    if wells:
+        queryset = queryset.filter(pk__in=wells)
+    if intake:
+        queryset = queryset.filter(intake=intake)
+    if field:
+        queryset = queryset.filter(field=field)
+    if polygon:
+        queryset = queryset.filter(geom__within=polygon)
+    return queryset
+
+
+def regime_export_rows(wells, parameter="all", date_from=None, date_till=None):
+    """
+    Режимные замеры скважин в порядке индекса regime_measurement (скважина, параметр, дата, время).
+    Читаются серверным курсором PostgreSQL порциями по EXPORT_CHUNK_SIZE.
+    """
+    measurements = RegimeMeasurement.objects.filter(
+        well__in=wells.values("pk"), parameter__in=EXPORT_PARAMETERS[parameter]
+    )
+    if date_from:
+        measurements = measurements.filter(date__gte=date_from)
+    if date_till:
+        measurements = measurements.filter(date__lte=date_till)
+    return (
+        measurements.order_by("well_id", "parameter", "date", "time_measure")
+        .values_list("well_id", "well__name", "date", "time_measure", "parameter", "value")
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def format_time(value):
+    if value is None:
+        return ""
+    hours, remainder = divmod(int(value.total_seconds()), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
+
+
+def stream_csv(rows):
+    """
+    Фрагменты CSV для StreamingHttpResponse. Заголовок отдается до выполнения запроса,
+    затем - по фрагменту на порцию строк.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    rows = iter(rows)
+    while chunk := list(islice(rows, EXPORT_CHUNK_SIZE)):
+        yield "".join(
+            writer.writerow([well, name, date.isoformat(), format_time(time), PARAMETER_NAMES[parameter], value])
+            for well, name, date, time, parameter, value in chunk
+        )
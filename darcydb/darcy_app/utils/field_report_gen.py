@@ -0,0 +1,123 @@
+import os
+
+from weasyprint import HTML
+from weasyprint.text.fonts import FontConfiguration
+
+from ..models import Fields, Intakes, Wells
+from .doc_gen import timed
+from .passport_gen import Passports, passport_context, shared_context
+from .renderer import get_stylesheet, get_template
+
+# Скважин в одном томе отчета: сверстанные страницы (вместе с изображениями
+# скважин) держатся в памяти до записи PDF, поэтому крупные объекты делятся на тома
+WELLS_PER_VOLUME = 200
+
+# Изображения shared_context, общие для всех паспортов; остаются в кэше между паспортами
+SHARED_IMAGES = ("logo", "watermark", "sign", "stamp", "sign_creator")
+
+
+def report_wells(obj):
+    """Скважины месторождения или водозабора в порядке номеров"""
+    wells = Wells.objects.select_related("typo", "intake", "field").order_by("name", "pk")
+    if isinstance(obj, Fields):
+        return wells.filter(field=obj)
+    if isinstance(obj, Intakes):
+        return wells.filter(intake=obj)
+    raise TypeError(f"Сводный отчет строится для месторождения или водозабора, получено: {obj!r}")
+
+
+class FieldReport:
+    """
+    Сводный отчет: паспорта скважин месторождения или водозабора в одном PDF.
+
+    Паспорта верстаются по одному: данные и HTML скважины освобождаются после
+    верстки ее паспорта. Сверстанные страницы остаются в памяти до записи PDF
+    вместе с изображениями скважины (схема, вложения, каротаж), поэтому объем
+    памяти растет с количеством скважин; generate_field_report ограничивает его,
+    деля крупные объекты на тома по WELLS_PER_VOLUME скважин.
+    Конфигурация шрифтов WeasyPrint и кэш изображений общие для всех паспортов;
+    в кэше между паспортами остаются только логотип, водяной знак, печать и
+    подписи, поэтому они встраиваются в итоговый PDF один раз.
+    Нумерация страниц начинается заново в каждом паспорте.
+    """
+
+    def __init__(self, obj, wells=None):
+        self.obj = obj
+        self.wells = report_wells(obj) if wells is None else wells
+        self.font_config = FontConfiguration()
+        self.image_cache = {}
+        self.shared_images = set()
+        self.first = None
+        self.pages = []
+
+    def render_section(self, **context):
+        rendered_html = get_template("passports/field_report.html").render(**context)
+        section = HTML(string=rendered_html).render(
+            stylesheets=[get_stylesheet()], font_config=self.font_config, cache=self.image_cache
+        )
+        self.first = self.first or section
+        self.pages.extend(section.pages)
+        # Изображения скважины не нужны следующим паспортам
+        for url in list(self.image_cache):
+            if url not in self.shared_images:
+                del self.image_cache[url]
+
+    def render(self, timings=None):
+        """
+        Верстка отчета. Возвращает weasyprint.Document со страницами всех паспортов
+        и памяткой по эксплуатации в конце; время этапов суммируется в timings.
+        """
+        timings = {} if timings is None else timings
+        shared = None
+        for well in self.wells.iterator(chunk_size=100):
+            well_timings = {}
+            pdf = Passports(well, None)
+            if shared is None:
+                shared = shared_context(pdf)
+                self.shared_images = {shared[name] for name in SHARED_IMAGES}
+            context = passport_context(pdf, well_timings)
+            passport = get_template("passports/passport_body.html").render(**shared, **context)
+            with timed(well_timings, "render"):
+                self.render_section(passport=passport)
+            add_timings(timings, well_timings)
+        self.render_section(brief_remind=True)
+        return self.first.copy(self.pages)
+
+
+def add_timings(totals, timings):
+    for name, value in timings.items():
+        totals[name] = round(totals.get(name, 0) + value, 3)
+
+
+def volume_path(target, number):
+    """report.pdf -> report_2.pdf"""
+    root, ext = os.path.splitext(os.fspath(target))
+    return f"{root}_{number}{ext}"
+
+
+def generate_field_report(obj, target, timings=None, wells_per_volume=WELLS_PER_VOLUME):
+    """
+    Сводный отчет по скважинам месторождения или водозабора в PDF (путь или файловый объект).
+    Если скважин больше wells_per_volume, отчет делится на тома report_1.pdf, report_2.pdf, ...
+    (target должен быть путем), каждый том верстается и записывается отдельно.
+    Возвращает количество страниц.
+    """
+    timings = {} if timings is None else timings
+    wells = report_wells(obj)
+    ids = list(wells.values_list("pk", flat=True))
+    volumes = []
+    for start in range(0, len(ids), wells_per_volume):
+        end = start + wells_per_volume
+        volumes.append(ids[start:end])
+    volumes = volumes or [[]]
+    if len(volumes) > 1 and not isinstance(target, (str, os.PathLike)):
+        raise ValueError("Отчет из нескольких томов записывается только по пути к файлу")
+    pages = 0
+    for number, volume in enumerate(volumes, start=1):
+        report = FieldReport(obj, wells.filter(pk__in=volume)).render(timings)
+        volume_timings = {}
+        with timed(volume_timings, "write"):
+            report.write_pdf(target=target if len(volumes) == 1 else volume_path(target, number))
+        add_timings(timings, volume_timings)
+        pages += len(report.pages)
+    return pages
@@ -0,0 +1,107 @@
+import hashlib
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Max, Q
+
+from ..models import (
+    Attachments,
+    Fields,
+    Intakes,
+    License,
+    LicenseToWells,
+    WaterUsers,
+    WaterUsersChange,
+    Wells,
+    WellsAquifers,
+    WellsAquiferUsage,
+    WellsChem,
+    WellsConstruction,
+    WellsDepression,
+    WellsDepth,
+    WellsDrilledData,
+    WellsEfw,
+    WellsGeophysics,
+    WellsLithology,
+    WellsLugHeight,
+    WellsRate,
+    WellsSample,
+    WellsWaterDepth,
+)
+from .renderer import renderer
+from .schema import SCHEMA_STYLE_VERSION
+
+
+def generic_filter(*querysets):
+    """
+    Условие на обобщенную связь (content_type, object_id) с записями нескольких моделей
+    """
+    condition = Q(pk__in=[])
+    for queryset in querysets:
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        condition |= Q(content_type=content_type, object_id__in=queryset.values("pk"))
+    return condition
+
+
+def related_querysets(well):
+    """
+    Выборки всех записей, из которых строится паспорт скважины
+    """
+    drilled = WellsDrilledData.objects.filter(well=well)
+    geophysics = WellsGeophysics.objects.filter(well=well)
+    samples = WellsSample.objects.filter(well=well)
+    efws = WellsEfw.objects.filter(well=well)
+    depressions = WellsDepression.objects.filter(efw__well=well)
+    licenses = LicenseToWells.objects.filter(well=well)
+    water_users = WaterUsersChange.objects.filter(license__in=licenses.values("license"))
+    return (
+        Intakes.objects.filter(pk=well.intake_id),
+        Fields.objects.filter(pk=well.field_id),
+        drilled,
+        geophysics,
+        samples,
+        efws,
+        depressions,
+        licenses,
+        License.objects.filter(pk__in=licenses.values("license")),
+        water_users,
+        WaterUsers.objects.filter(pk__in=water_users.values("water_user")),
+        WellsAquifers.objects.filter(well=well),
+        WellsAquiferUsage.objects.filter(well=well),
+        WellsLithology.objects.filter(well=well),
+        WellsConstruction.objects.filter(well=well),
+        Attachments.objects.filter(generic_filter(Wells.objects.filter(pk=well.pk), geophysics, samples)),
+        WellsChem.objects.filter(generic_filter(samples)),
+        WellsDepth.objects.filter(generic_filter(drilled, geophysics)),
+        WellsLugHeight.objects.filter(generic_filter(efws)),
+        WellsRate.objects.filter(generic_filter(depressions)),
+        WellsWaterDepth.objects.filter(generic_filter(drilled, geophysics, efws, depressions)),
+    )
+
+
+def passport_fingerprint(well):
+    """
+    Контрольная сумма исходных данных паспорта скважины: поля скважины,
+    количество и последнее изменение связанных записей (включая вложения),
+    версия шаблонов и оформления схемы.
+    """
+    digest = hashlib.sha1()
+    digest.update(f"{renderer.version()}:{SCHEMA_STYLE_VERSION}".encode())
+    # Сама скважина учитывается по значениям полей: admin сохраняет ее (и обновляет modified)
+    # при каждом нажатии "Сформировать документ"
+    well_state = (
+        well.pk,
+        well.name,
+        well.typo_id,
+        well.head,
+        well.moved_id,
+        well.intake_id,
+        well.field_id,
+        well.geom.wkt if well.geom else None,
+        json.dumps(well.extra, sort_keys=True, default=str),
+    )
+    digest.update(repr(well_state).encode())
+    for queryset in related_querysets(well):
+        state = queryset.aggregate(count=Count("pk"), modified=Max("modified"))
+        digest.update(f"{queryset.model.__name__}:{state['count']}:{state['modified']}".encode())
+    return digest.hexdigest()
@@ -0,0 +1,95 @@
+import hashlib
+
+import markdown
+import markdown_katex
+
+from ..models import FormulaCache
+
+KATEX_VERSION = markdown_katex.__version__
+
+# Формулы, уже прочитанные или отрендеренные в этом процессе
+_memory = {}
+
+
+def construction_tex(constructions):
+    """
+    Формула конструкции скважины в LaTeX: диаметр / интервал глубин для каждой
+    смены диаметра колонны
+    """
+    eq_data = []
+    if constructions:
+        depth_from = constructions[0].depth_from
+        for i, qs in enumerate(constructions):
+            # cs_type = "".join(map(lambda x: x[0], qs.construction_type.name.split()))
+            if i == len(constructions) - 1 or qs.diameter != constructions[i + 1].diameter:
+                eq_data.append(f"\\frac{{{qs.diameter}}}{{{str(depth_from)+ '-' + str(qs.depth_till)}}}")
+            else:
+                continue
+            if i != len(constructions) - 1:
+                depth_from = constructions[i + 1].depth_from
+    return " х ".join(eq_data)
+
+
+def formula_key(tex):
+    return hashlib.sha1(f"{KATEX_VERSION}:{tex}".encode()).hexdigest()
+
+
+def render_formula(tex):
+    """
+    Рендеринг формулы через KaTeX (внешний процесс), без обращения к БД
+    """
+    return markdown.markdown(
+        f"$`{tex}`$",
+        extensions=[
+            "markdown_katex",
+        ],
+        extension_configs={
+            "markdown_katex": {
+                "no_inline_svg": True,
+                "insert_fonts_css": True,
+            },
+        },
+    )
+
+
+def cached_formulas(texs):
+    """
+    HTML формул из кэша: память процесса, затем таблица formula_cache. Возвращает {tex: html}
+    """
+    result = {tex: _memory[tex] for tex in texs if tex in _memory}
+    missing = {formula_key(tex): tex for tex in texs if tex not in result}
+    if missing:
+        for key, html in FormulaCache.objects.filter(key__in=missing).values_list("key", "html"):
+            result[missing[key]] = _memory[missing[key]] = html
+    return result
+
+
+def store_formulas(rendered):
+    """
+    Сохранение отрендеренных формул {tex: html} в кэш
+    """
+    FormulaCache.objects.bulk_create(
+        [
+            FormulaCache(key=formula_key(tex), latex=tex, katex_version=KATEX_VERSION, html=html)
+            for tex, html in rendered.items()
+        ],
+        ignore_conflicts=True,
+    )
+    _memory.update(rendered)
+
+
+def get_formulas(texs, executor=None):
+    """
+    HTML формул {tex: html}. Отсутствующие в кэше формулы рендерятся
+    (параллельно, если передан executor) и сохраняются в кэш.
+    """
+    texs = {tex for tex in texs if tex}
+    formulas = cached_formulas(texs)
+    missing = sorted(texs - formulas.keys())
+    if missing:
+        rendered = dict(
+            zip(missing, executor.map(render_formula, missing) if executor else map(render_formula, missing))
+        )
+        store_formulas(rendered)
+        formulas.update(rendered)
+    return formulas
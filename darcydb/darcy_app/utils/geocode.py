@@ -0,0 +1,99 @@
+import logging
+from decimal import ROUND_HALF_UP, Decimal
+
+import requests
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+
+from ..models import Fields, GeocodeCache, Intakes
+
+logger = logging.getLogger(__name__)
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/reverse"
+PRECISION = Decimal("0.0001")
+
+
+def round_coords(lat, lon):
+    return (
+        Decimal(str(lat)).quantize(PRECISION, rounding=ROUND_HALF_UP),
+        Decimal(str(lon)).quantize(PRECISION, rounding=ROUND_HALF_UP),
+    )
+
+
+def fetch_address(lat, lon):
+    """
+    Запрос адреса к nominatim.openstreetmap.org. Обращается только к сети, без БД.
+    """
+    response = requests.get(
+        NOMINATIM_URL,
+        params={"lat": lat, "lon": lon, "format": "json", "accept-language": "ru", "zoom": 15},
+        headers={"User-Agent": "darcydb"},
+        timeout=settings.GEOCODE_TIMEOUT,
+    )
+    response.raise_for_status()
+    return response.json()["address"]
+
+
+def get_cached_address(lat, lon):
+    lat, lon = round_coords(lat, lon)
+    return GeocodeCache.objects.filter(lat=lat, lon=lon).first()
+
+
+def store_address(lat, lon, address):
+    lat, lon = round_coords(lat, lon)
+    GeocodeCache.objects.update_or_create(
+        lat=lat,
+        lon=lon,
+        defaults={"geom": Point(float(lon), float(lat), srid=4326), "address": address, "fetched": timezone.now()},
+    )
+
+
+def fallback_address(point):
+    """
+    Адрес без обращения к сети: регион определяется по полигонам месторождений
+    и водозаборов, содержащих точку, и уже известным адресам внутри этих полигонов.
+    """
+    address = {"country": "", "state": ""}
+    polygons = [*Fields.objects.filter(geom__contains=point), *Intakes.objects.filter(geom__contains=point)]
+    for polygon in polygons:
+        cached = GeocodeCache.objects.filter(geom__within=polygon.geom).order_by("-fetched").first()
+        if cached:
+            address.update(
+                {key: cached.address[key] for key in ("country", "state", "county") if cached.address.get(key)}
+            )
+            break
+    return address
+
+
+def fetch_address_safe(lat, lon):
+    """
+    Запрос адреса без обращения к БД; при ошибке сети возвращает None
+    """
+    try:
+        return fetch_address(lat, lon)
+    except (requests.RequestException, KeyError, ValueError) as e:
+        logger.warning("Reverse geocoding failed for %s, %s: %s", lat, lon, e)
+        return None
+
+
+def resolve_address(point, cached, address):
+    """
+    Итог геокодирования по результату запроса: сохранение нового адреса в кэш,
+    либо устаревшая запись кэша, либо определение региона по собственным полигонам.
+    """
+    if address is None:
+        return cached.address if cached else fallback_address(point)
+    store_address(point.y, point.x, address)
+    return address
+
+
+def reverse_geocode(point):
+    """
+    Адрес точки: свежая запись кэша, затем запрос к Nominatim,
+    затем устаревшая запись кэша, затем определение региона по собственным полигонам.
+    """
+    cached = get_cached_address(point.y, point.x)
+    if cached and cached.is_fresh:
+        return cached.address
+    return resolve_address(point, cached, fetch_address_safe(point.y, point.x))
@@ -0,0 +1,101 @@
+import datetime
+import hashlib
+import io
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count, Max
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from ..models import RegimeMeasurement, WellsRegime, WellsTemperature, WellsWaterDepth
+from .regime import regime_series
+
+# Увеличивается при любом изменении оформления графика, чтобы сбросить кэш
+HYDROGRAPH_STYLE_VERSION = 1
+HYDROGRAPH_FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+# Ключ меняется при изменении замеров, срок хранения только ограничивает объем кэша
+HYDROGRAPH_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+DPI = 100
+
+
+def hydrograph_key(well, image_format):
+    """
+    Ключ кэша графика: время последнего изменения и количество режимных наблюдений
+    и замеров уровня и температуры скважины (количество учитывает удаленные замеры).
+    """
+    regimes = WellsRegime.objects.filter(well=well)
+    readings = {
+        "content_type": ContentType.objects.get_for_model(WellsRegime),
+        "object_id__in": regimes.values("pk"),
+    }
+    stamps = [
+        queryset.aggregate(modified=Max("modified"), count=Count("pk"))
+        for queryset in (
+            regimes,
+            WellsWaterDepth.objects.filter(**readings),
+            WellsTemperature.objects.filter(**readings),
+        )
+    ]
+    state = ":".join(f"{stamp['modified'] and stamp['modified'].isoformat()}/{stamp['count']}" for stamp in stamps)
+    digest = hashlib.sha1(f"{HYDROGRAPH_STYLE_VERSION}:{state}".encode()).hexdigest()
+    return f"hydrograph:{well.pk}:{image_format}:{digest}"
+
+
+def series_times(series):
+    return [
+        datetime.datetime.combine(date, datetime.time()) + (time or datetime.timedelta()) for date, time, _ in series
+    ]
+
+
+def render_hydrograph(title, levels, temperatures, image_format="png"):
+    """
+    График уровня (ось глубины направлена вниз) и температуры подземных вод в PNG или SVG.
+    Рисуется на явном Agg-холсте без pyplot, фигура освобождается сразу после сохранения.
+    """
+    fig = Figure(figsize=(10, 4.5))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        ax.set_title(title)
+        ax.set_ylabel("Глубина подземных вод, м")
+        ax.grid(alpha=0.3)
+        if levels:
+            ax.plot(series_times(levels), [float(value) for *_, value in levels], color="tab:blue", marker=".")
+        ax.invert_yaxis()
+        if temperatures:
+            temperature_ax = ax.twinx()
+            temperature_ax.set_ylabel("Температура, ℃")
+            temperature_ax.plot(
+                series_times(temperatures), [float(value) for *_, value in temperatures], color="tab:red", marker="."
+            )
+        if not levels and not temperatures:
+            ax.text(0.5, 0.5, "Нет режимных замеров", transform=ax.transAxes, ha="center", va="center")
+        fig.autofmt_xdate()
+        output = io.BytesIO()
+        fig.savefig(output, format=image_format, dpi=DPI, bbox_inches="tight")
+    finally:
+        fig.clear()
+    return output.getvalue()
+
+
+def get_hydrograph(well, image_format="png"):
+    """
+    График режимных наблюдений скважины. Хранится в кэше Django под ключом,
+    зависящим от последнего изменения замеров, поэтому повторное открытие
+    скважины без новых замеров не перерисовывает график.
+    """
+    key = hydrograph_key(well, image_format)
+    image = cache.get(key)
+    if image is None:
+        image = render_hydrograph(
+            f"Скважина {well}",
+            regime_series(well, RegimeMeasurement.LEVEL),
+            regime_series(well, RegimeMeasurement.TEMPERATURE),
+            image_format,
+        )
+        cache.set(key, image, HYDROGRAPH_CACHE_TIMEOUT)
+    return image
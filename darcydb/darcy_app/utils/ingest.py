@@ -0,0 +1,274 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models.expressions import RawSQL
+
+from ..models import Wells, WellsRegime, WellsWaterDepth
+from .regime import sync_regimes
+from .well_state import schedule_well_state
+
+# Строк в одном пакете проверки и COPY
+CHUNK_SIZE = 5000
+# Отклоненных строк в ответе (остальные только считаются)
+MAX_REJECTS = 1000
+
+INGEST_FIELDS = {
+    "well": Wells._meta.pk,
+    "date": WellsRegime._meta.get_field("date"),
+    "time_measure": WellsWaterDepth._meta.get_field("time_measure"),
+    "water_depth": WellsWaterDepth._meta.get_field("water_depth"),
+}
+
+STAGING_TABLE = "regime_ingest_staging"
+# id созданных и измененных записей: история и пересчет пишутся из таблицы пакетами,
+# в памяти процесса остаются только количества
+CHANGES_TABLE = "regime_ingest_changes"
+
+REGIME_CREATED = 1
+DEPTH_UPDATED = 2
+DEPTH_INSERTED = 3
+
+CREATE_STAGING_SQL = f"""
+    DROP TABLE IF EXISTS {STAGING_TABLE};
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        row_number integer NOT NULL,
+        well_id bigint NOT NULL,
+        date date NOT NULL,
+        time_measure interval NULL,
+        water_depth numeric(6, 2) NOT NULL,
+        regime_id bigint NULL
+    ) ON COMMIT DROP;
+    DROP TABLE IF EXISTS {CHANGES_TABLE};
+    CREATE TEMP TABLE {CHANGES_TABLE} (kind smallint NOT NULL, id bigint NOT NULL) ON COMMIT DROP
+"""
+
+# На одно наблюдение и время замера - последняя строка пакета
+DEDUPLICATE_SQL = f"""
+    DELETE FROM {STAGING_TABLE} s USING {STAGING_TABLE} d
+    WHERE s.well_id = d.well_id AND s.date = d.date
+      AND s.time_measure IS NOT DISTINCT FROM d.time_measure AND s.row_number < d.row_number
+"""
+
+INSERT_REGIMES_SQL = f"""
+    WITH created AS (
+        INSERT INTO wells_regime (well_id, date, created, modified, author, last_user_id, uuid)
+        SELECT DISTINCT well_id, date, now(), now(), 'ufo', %(user)s, gen_random_uuid() FROM {STAGING_TABLE}
+        ON CONFLICT (well_id, date) DO NOTHING
+        RETURNING id
+    )
+    INSERT INTO {CHANGES_TABLE} (kind, id) SELECT {REGIME_CREATED}, id FROM created
+"""
+
+MATCH_REGIMES_SQL = f"""
+    UPDATE {STAGING_TABLE} s SET regime_id = r.id
+    FROM wells_regime r WHERE r.well_id = s.well_id AND r.date = s.date
+"""
+
+UPDATE_DEPTHS_SQL = f"""
+    WITH updated AS (
+        UPDATE wells_water_depth w
+        SET water_depth = s.water_depth, modified = now(), last_user_id = %(user)s
+        FROM {STAGING_TABLE} s
+        WHERE w.content_type_id = %(content_type)s AND w.object_id = s.regime_id
+          AND w.time_measure IS NOT DISTINCT FROM s.time_measure AND w.water_depth <> s.water_depth
+        RETURNING w.id
+    )
+    INSERT INTO {CHANGES_TABLE} (kind, id) SELECT {DEPTH_UPDATED}, id FROM updated
+"""
+
+INSERT_DEPTHS_SQL = f"""
+    WITH inserted AS (
+        INSERT INTO wells_water_depth (
+            type_level, time_measure, water_depth, content_type_id, object_id,
+            created, modified, author, last_user_id, uuid
+        )
+        SELECT false, s.time_measure, s.water_depth, %(content_type)s, s.regime_id,
+               now(), now(), 'ufo', %(user)s, gen_random_uuid()
+        FROM {STAGING_TABLE} s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM wells_water_depth w
+            WHERE w.content_type_id = %(content_type)s AND w.object_id = s.regime_id
+              AND w.time_measure IS NOT DISTINCT FROM s.time_measure
+        )
+        RETURNING id
+    )
+    INSERT INTO {CHANGES_TABLE} (kind, id) SELECT {DEPTH_INSERTED}, id FROM inserted
+"""
+
+# Наблюдения с новыми или измененными замерами (их не больше, чем суток в загрузке по скважинам)
+CHANGED_REGIMES_SQL = f"""
+    SELECT r.id, r.well_id FROM wells_regime r
+    WHERE r.id IN (
+        SELECT id FROM {CHANGES_TABLE} WHERE kind = {REGIME_CREATED}
+        UNION
+        SELECT w.object_id FROM wells_water_depth w JOIN {CHANGES_TABLE} c
+            ON c.id = w.id AND c.kind IN ({DEPTH_UPDATED}, {DEPTH_INSERTED})
+    )
+    ORDER BY r.id
+"""
+
+
+def ndjson_rows(lines):
+    """Строки NDJSON: (номер строки, dict или текст ошибки)"""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, f"Некорректный JSON: {e}"
+            continue
+        yield number, row if isinstance(row, dict) else "Ожидается объект JSON"
+
+
+def csv_rows(lines):
+    """Строки CSV с заголовком well,date,time_measure,water_depth: (номер строки, dict)"""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def clean_row(row):
+    """
+    Проверка строки полями моделей (тип, формат, число знаков).
+    Возвращает (значения, ошибки {поле: [сообщения]}).
+    """
+    values, errors = {}, {}
+    for name, field in INGEST_FIELDS.items():
+        value = row.get(name)
+        if value == "":
+            value = None
+        if name == "time_measure":
+            if value is None:
+                values[name] = None
+                continue
+            # Время замера: "ЧЧ:ММ:СС", "N days, ЧЧ:ММ:СС" или число секунд
+            value = str(value)
+        try:
+            values[name] = field.clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    return values, errors
+
+
+class RegimeIngest:
+    """
+    Массовая загрузка режимных замеров уровня: строки проверяются пакетами по CHUNK_SIZE,
+    корректные копируются (COPY) во временную таблицу, затем одним набором запросов
+    создаются недостающие наблюдения (well, date) и вставляются или обновляются замеры.
+    Сигналы не вызываются: regime_measurement, история и состояние скважин обновляются пакетно.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.received = self.accepted = 0
+        self.rejected = 0
+        self.rejects = []
+
+    def reject(self, number, errors):
+        self.rejected += 1
+        if len(self.rejects) < MAX_REJECTS:
+            self.rejects.append({"row": number, "errors": errors})
+
+    def copy_chunk(self, cursor, chunk):
+        wells = set(Wells.objects.filter(pk__in={values["well"] for _, values in chunk}).values_list("pk", flat=True))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for number, values in chunk:
+            if values["well"] not in wells:
+                self.reject(number, {"well": [f"Скважина {values['well']} не найдена"]})
+                continue
+            time_measure = values["time_measure"]
+            writer.writerow(
+                [
+                    number,
+                    values["well"],
+                    values["date"].isoformat(),
+                    f"{time_measure.total_seconds()} seconds" if time_measure is not None else "",
+                    values["water_depth"],
+                ]
+            )
+            self.accepted += 1
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} (row_number, well_id, date, time_measure, water_depth) FROM STDIN (FORMAT csv)",
+            buffer,
+        )
+
+    def load(self, rows):
+        """
+        rows - итератор (номер строки, dict или текст ошибки разбора).
+        Возвращает сводку загрузки с отклоненными строками.
+        """
+        content_type = ContentType.objects.get_for_model(WellsRegime).pk
+        params = {"user": self.user.pk, "content_type": content_type}
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_SQL)
+            chunk = []
+            for number, row in rows:
+                self.received += 1
+                if isinstance(row, str):
+                    self.reject(number, {"non_field_errors": [row]})
+                    continue
+                values, errors = clean_row(row)
+                if errors:
+                    self.reject(number, errors)
+                    continue
+                chunk.append((number, values))
+                if len(chunk) >= CHUNK_SIZE:
+                    self.copy_chunk(cursor, chunk)
+                    chunk = []
+            if chunk:
+                self.copy_chunk(cursor, chunk)
+
+            cursor.execute(f"ANALYZE {STAGING_TABLE}")
+            cursor.execute(DEDUPLICATE_SQL)
+            cursor.execute(INSERT_REGIMES_SQL, params)
+            created = cursor.rowcount
+            cursor.execute(MATCH_REGIMES_SQL)
+            cursor.execute(UPDATE_DEPTHS_SQL, params)
+            updated = cursor.rowcount
+            cursor.execute(INSERT_DEPTHS_SQL, params)
+            inserted = cursor.rowcount
+            cursor.execute(CHANGED_REGIMES_SQL)
+            changed = cursor.fetchall()
+
+            for start in range(0, len(changed), CHUNK_SIZE):
+                end = start + CHUNK_SIZE
+                sync_regimes([regime_id for regime_id, _ in changed[start:end]])
+            self.write_history()
+            for well_id in sorted({well_id for _, well_id in changed}):
+                schedule_well_state(well_id)
+        return {
+            "received": self.received,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "regimes_created": created,
+            "inserted": inserted,
+            "updated": updated,
+            "rejects": self.rejects,
+        }
+
+    def write_history(self):
+        """История созданных и измененных записей пакетами по CHUNK_SIZE из CHANGES_TABLE"""
+        for model, kind, update in (
+            (WellsRegime, REGIME_CREATED, False),
+            (WellsWaterDepth, DEPTH_INSERTED, False),
+            (WellsWaterDepth, DEPTH_UPDATED, True),
+        ):
+            changes = RawSQL(f"SELECT id FROM {CHANGES_TABLE} WHERE kind = %s", [kind])
+            instances = model.objects.filter(pk__in=changes).order_by("pk").iterator(chunk_size=CHUNK_SIZE)
+            while batch := list(islice(instances, CHUNK_SIZE)):
+                model.history.bulk_history_create(
+                    batch,
+                    batch_size=CHUNK_SIZE,
+                    update=update,
+                    default_user=self.user,
+                    default_change_reason="Массовая загрузка",
+                )
@@ -0,0 +1,215 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Wells, WellsDepression
+from .ingest import RegimeIngest
+from .packing import create_readings, unpack_depression
+from .series import DEPTH_PLACES, Reading, to_decimal
+
+# Строк файла логгера в одном пакете чтения
+CHUNK_SIZE = 100_000
+
+# Единицы давления логгера -> метры водяного столба (плотность воды 1000 кг/м3)
+PRESSURE_UNITS = {
+    "m": 1.0,
+    "cm": 0.01,
+    "kPa": 1 / 9.80665,
+    "mbar": 0.1 / 9.80665,
+    "psi": 6.894757 / 9.80665,
+}
+
+NANOSECONDS = 10**9
+
+
+def read_logger(
+    source,
+    time_column="time",
+    pressure_column="pressure",
+    units="kPa",
+    time_format=None,
+    chunk_size=CHUNK_SIZE,
+    **options,
+):
+    """
+    Файл логгера (CSV) пакетами по chunk_size строк: (время, нс от эпохи; напор, м вод. ст.).
+    Время - локальное, без часового пояса, в формате time_format (по умолчанию ISO 8601);
+    строки с нераспознанным временем или давлением пропускаются.
+    options передаются в pandas.read_csv (sep, decimal, skiprows, encoding и т.п.).
+    """
+    factor = PRESSURE_UNITS[units]
+    for chunk in pd.read_csv(source, usecols=[time_column, pressure_column], chunksize=chunk_size, **options):
+        times = pd.to_datetime(chunk[time_column], errors="coerce", format=time_format)
+        heads = pd.to_numeric(chunk[pressure_column], errors="coerce")
+        valid = (times.notna() & heads.notna()).to_numpy()
+        times = times.to_numpy(dtype="datetime64[ns]")[valid].astype(np.int64)
+        heads = heads.to_numpy(dtype=float)[valid] * factor
+        order = np.argsort(times, kind="stable")
+        yield times[order], heads[order]
+
+
+class BarometricReference:
+    """
+    Ряд опорного (барометрического) логгера, читаемый по мере продвижения основного файла:
+    в памяти только окно, покрывающее текущий пакет замеров. Оба файла - в порядке времени.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.times = np.empty(0, dtype=np.int64)
+        self.heads = np.empty(0)
+        self.exhausted = False
+
+    def read_until(self, end):
+        while not self.exhausted and (not self.times.size or self.times[-1] < end):
+            try:
+                times, heads = next(self.chunks)
+            except StopIteration:
+                self.exhausted = True
+                break
+            self.times = np.concatenate([self.times, times])
+            self.heads = np.concatenate([self.heads, heads])
+
+    def compensate(self, times, heads):
+        """
+        Напор над датчиком за вычетом атмосферного давления, интерполированного на время замеров.
+        Замеры вне периода работы барометра - NaN.
+        """
+        if not times.size:
+            return heads
+        self.read_until(times[-1])
+        # Окно с одним предыдущим замером барометра для интерполяции
+        start = max(np.searchsorted(self.times, times[0], side="right") - 1, 0)
+        self.times, self.heads = self.times[start:], self.heads[start:]
+        if not self.times.size:
+            return np.full(heads.shape, np.nan)
+        outside = (times < self.times[0]) | ((times > self.times[-1]) & self.exhausted)
+        return np.where(outside, np.nan, heads - np.interp(times, self.times, self.heads))
+
+
+class Decimator:
+    """
+    Прореживание ряда до интервала interval (сек): среднее значение в каждом интервале,
+    время - начало интервала. Незавершенный интервал пакета переносится в следующий пакет.
+    """
+
+    def __init__(self, interval):
+        self.interval = int(interval * NANOSECONDS)
+        self.pending = None
+
+    def feed(self, times, values):
+        if not self.interval:
+            return times, values
+        buckets, inverse = np.unique(times // self.interval, return_inverse=True)
+        sums = np.bincount(inverse, weights=values, minlength=buckets.size)
+        counts = np.bincount(inverse, minlength=buckets.size).astype(float)
+        if self.pending is not None:
+            bucket, total, count = self.pending
+            if buckets.size and buckets[0] == bucket:
+                sums[0] += total
+                counts[0] += count
+            else:
+                buckets = np.concatenate([[bucket], buckets])
+                sums = np.concatenate([[total], sums])
+                counts = np.concatenate([[count], counts])
+        if not buckets.size:
+            return buckets, sums
+        self.pending = buckets[-1], sums[-1], counts[-1]
+        return buckets[:-1] * self.interval, sums[:-1] / counts[:-1]
+
+    def flush(self):
+        if not self.interval or self.pending is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        bucket, total, count = self.pending
+        self.pending = None
+        return np.array([bucket * self.interval]), np.array([total / count])
+
+
+class LoggerImport:
+    """
+    Импорт логгера давления в режимные наблюдения скважины (target - Wells)
+    или в журнал ОФР (target - WellsDepression, время замера отсчитывается от начала опыта).
+    Глубина уровня = глубина датчика - (напор - атмосферное давление).
+    Файл читается пакетами, поэтому память не зависит от его размера.
+    """
+
+    def __init__(self, target, sensor_depth, reference=None, interval=0, user=None):
+        if not isinstance(target, (Wells, WellsDepression)):
+            raise TypeError(f"Импорт логгера в {type(target).__name__} не поддерживается")
+        self.target = target
+        self.sensor_depth = float(sensor_depth)
+        self.reference = BarometricReference(reference) if reference is not None else None
+        self.decimator = Decimator(interval)
+        self.user = user or get_user_model().objects.first()
+        self.readings = self.skipped = 0
+
+    def levels(self, chunks, start=None):
+        """
+        Прореженные глубины уровня пакетами: (время, нс; глубина, м).
+        Если задан start (нс), замеры до него пропускаются, а время отсчитывается
+        от start, так что интервалы прореживания начинаются с начала опыта.
+        """
+        for times, heads in chunks:
+            self.readings += times.size
+            if self.reference is not None:
+                heads = self.reference.compensate(times, heads)
+            valid = np.isfinite(heads)
+            if start is not None:
+                valid &= times >= start
+            self.skipped += int((~valid).sum())
+            times = times[valid] if start is None else times[valid] - start
+            yield self.decimator.feed(times, self.sensor_depth - heads[valid])
+        yield self.decimator.flush()
+
+    def regime_rows(self, chunks):
+        number = 0
+        for times, depths in self.levels(chunks):
+            stamps = pd.DatetimeIndex(times.astype("datetime64[ns]"))
+            offsets = stamps - stamps.normalize()
+            for stamp, offset, depth in zip(stamps, offsets, depths):
+                number += 1
+                yield number, {
+                    "well": self.target.pk,
+                    "date": stamp.date(),
+                    "time_measure": offset.to_pytimedelta(),
+                    "water_depth": to_decimal(depth, DEPTH_PLACES),
+                }
+
+    def load_depression(self, chunks):
+        depression = self.target
+        if depression.is_packed:
+            unpack_depression(depression)
+        start = timezone.localtime(depression.efw.date).replace(tzinfo=None)
+        start = np.datetime64(start, "ns").astype(np.int64)
+        # Время замеров, уже записанных в журнал (повторный импорт, перекрытие файлов)
+        existing = set(depression.waterdepths.values_list("time_measure", flat=True))
+        written = duplicates = 0
+        for offsets, depths in self.levels(chunks, start=start):
+            levels = []
+            for offset, depth in zip(offsets, depths):
+                time_measure = datetime.timedelta(microseconds=int(offset) // 1000)
+                if time_measure in existing:
+                    duplicates += 1
+                    continue
+                existing.add(time_measure)
+                levels.append(Reading(None, time_measure, to_decimal(depth, DEPTH_PLACES)))
+            written += create_readings(depression, levels, [], batch_size=5000)
+        return {"written": written, "duplicates": duplicates, "rejected": 0, "rejects": []}
+
+    def run(self, chunks):
+        with transaction.atomic():
+            if isinstance(self.target, Wells):
+                summary = RegimeIngest(self.user).load(self.regime_rows(chunks))
+                summary = {
+                    "written": summary["inserted"] + summary["updated"],
+                    "duplicates": 0,
+                    "rejected": summary["rejected"],
+                    "rejects": summary["rejects"],
+                }
+            else:
+                summary = self.load_depression(chunks)
+        return {"readings": self.readings, "skipped": self.skipped, **summary}
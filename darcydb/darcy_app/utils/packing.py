@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from simple_history.utils import bulk_create_with_history
+
+from ..models import WellsDepression, WellsRate, WellsWaterDepth
+from .series import depression_readings, pack_readings
+
+
+def pack_depression(depression):
+    """
+    Перенос замеров журнала ОФР из строк WellsWaterDepth/WellsRate в массивы series_*.
+    Строки удаляются (с записью в историю), журнал целиком читается одной строкой.
+    """
+    with transaction.atomic():
+        series_time, series_depth, series_rate = pack_readings(*depression_readings(depression))
+        # update() вместо save(): массивы не входят в историю журнала
+        WellsDepression.objects.filter(pk=depression.pk).update(
+            series_time=series_time, series_depth=series_depth, series_rate=series_rate
+        )
+        depression.waterdepths.all().delete()
+        depression.rates.all().delete()
+    depression.series_time, depression.series_depth, depression.series_rate = series_time, series_depth, series_rate
+    return len(series_time)
+
+
+def unpack_depression(depression, saving=None):
+    """
+    Обратный перенос: строки WellsWaterDepth/WellsRate из массивов упакованного журнала.
+    saving - сохраняемая сейчас строка замера: замер того же вида и времени из массива не создается.
+    """
+    if not depression.is_packed:
+        return 0
+    levels, rates = depression_readings(depression)
+    if isinstance(saving, WellsWaterDepth):
+        levels = [item for item in levels if item.time_measure != saving.time_measure]
+    elif isinstance(saving, WellsRate):
+        rates = [item for item in rates if item.time_measure != saving.time_measure]
+    with transaction.atomic():
+        create_readings(depression, levels, rates)
+        WellsDepression.objects.filter(pk=depression.pk).update(series_time=None, series_depth=None, series_rate=None)
+    depression.series_time = depression.series_depth = depression.series_rate = None
+    return len(levels) + len(rates)
+
+
+def create_readings(depression, levels, rates, batch_size=1000):
+    """
+    Массовое создание строк WellsWaterDepth/WellsRate журнала ОФР из [Reading]
+    с записью истории, без вызова BaseModel.save для каждой строки
+    """
+    now = timezone.now()
+    related = dict(
+        content_type=ContentType.objects.get_for_model(WellsDepression),
+        object_id=depression.pk,
+        created=now,
+        modified=now,
+        last_user=get_user_model().objects.first(),
+    )
+    with transaction.atomic():
+        bulk_create_with_history(
+            [WellsWaterDepth(time_measure=item.time_measure, water_depth=item.value, **related) for item in levels],
+            WellsWaterDepth,
+            batch_size=batch_size,
+        )
+        bulk_create_with_history(
+            [WellsRate(time_measure=item.time_measure, rate=item.value, **related) for item in rates],
+            WellsRate,
+            batch_size=batch_size,
+        )
+    return len(levels) + len(rates)
@@ -1,28 +1,28 @@
-import base64
 import datetime
-import io
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
+from functools import partial
 
-import geopandas as gpd
-import markdown
-import matplotlib.pyplot as plt
-import tilemapbase
-from django.core.files.base import ContentFile
-from django.db.models import F, Q
-from jinja2 import Environment, FileSystemLoader
-from shapely.geometry import Point
-from weasyprint import CSS, HTML
+from django.conf import settings
+from weasyprint import HTML
 
-from ..models import DocumentsPath, WellsAquifers, WellsAquiferUsage, WellsDepression, WellsEfw, WellsLithology
-from .doc_gen import PDF
+from ..models import DictEntities, Documents, DocumentsPath
+from .doc_gen import PDF, save_document_pdf, timed, timed_call
+from .dossier import first
+from .fingerprint import passport_fingerprint
+from .formula import cached_formulas, construction_tex, get_formulas, render_formula, store_formulas
+from .geocode import fetch_address_safe, get_cached_address, resolve_address
+from .renderer import get_stylesheet, get_template
+from .schema import get_schema
+from .series import depression_series, first_rate, last_level
 
 
 class Passports(PDF):
-    def create_position(self):
+    def create_position(self, address=None):
         licenses = self.get_license()
         intake = self.get_intakes()
         water_user = self.get_water_user()
-        address = self.get_address()
+        address = self.get_address() if address is None else address
         position_info = {
             "Страна": address.get("country", ""),
             "Область": address.get("state", ""),
@@ -45,12 +45,10 @@ class Passports(PDF):
         return position_info
 
     def get_attachments(self):
-        aq = self.instance
         geophysics = self.get_geophysics_instance()
         chem = self.get_sample_instance()
-        aq_attachments = geo_attachments = chem_attachments = []
-        if aq.attachments.exists():
-            aq_attachments = [item for attach in aq.attachments.all() for item in attach.get_base64_image()]
+        aq_attachments = [item for attach in self.dossier.attachments for item in attach.get_base64_image()]
+        geo_attachments = chem_attachments = []
         if geophysics:
             geo_attachments = [item for attach in geophysics.attachments.all() for item in attach.get_base64_image()]
         if chem:
@@ -77,52 +75,43 @@ class Passports(PDF):
         return drilled_info
 
     def get_pump_data(self, archive=True):
-        efw_qs = (
-            WellsEfw.objects.filter(well=self.instance)
-            .exclude(type_efw__name="восстановление уровня")
-            .order_by("-date")
+        current_year = datetime.datetime.now().year
+        efw = next(
+            (
+                efw
+                for efw in self.dossier.efws_of_type(exclude=["восстановление уровня"])
+                if (efw.date.year != current_year) == archive
+            ),
+            None,
         )
-        if archive:
-            efw = efw_qs.exclude(date__year=datetime.datetime.now().year).order_by("-date").first()
-        else:
-            efw = efw_qs.filter(date__year=datetime.datetime.now().year).order_by("-date").first()
 
         rate = ""
         depression = ""
         stat_wat = ""
         specific_rate = ""
         if efw:
-            stat_wat_inst = efw.waterdepths.first()
-            if stat_wat_inst:
-                stat_wat = stat_wat_inst.water_depth
-            depression_instance = WellsDepression.objects.get(efw=efw)
-            rates = depression_instance.rates.first()
-            dyn_wat = depression_instance.waterdepths.order_by("-time_measure").first()
-            depression = dyn_wat.water_depth - stat_wat if stat_wat != "" and dyn_wat else ""
-            rate = rates.rate
+            stat_wat = self.dossier.static_level(efw)
+            depression_instance = self.dossier.depression(efw)
+            dyn_wat = last_level(depression_instance)
+            depression = dyn_wat - stat_wat if stat_wat != "" and dyn_wat else ""
+            rate = first_rate(depression_instance)
             specific_rate = round(rate / depression, 2) if depression != "" else ""
         return rate, depression, specific_rate, stat_wat
 
     def get_pump_complex(self):
-        efw = (
-            WellsEfw.objects.filter(well=self.instance)
-            .exclude(type_efw__name__in=["откачки одиночные пробные", "восстановление уровня"])
-            .order_by("-date")
-            .first()
-        )
+        efws = self.dossier.efws_of_type(exclude=["откачки одиночные пробные", "восстановление уровня"])
+        efw = efws[0] if efws else None
         efw_data = {}
         levels = recommendations = ""
         stat_level = ""
         dyn_level = ""
         depression = ""
         if efw:
-            stat_level_inst = efw.waterdepths.first()
-            if stat_level_inst:
-                stat_level = stat_level_inst.water_depth
-            dpr_instance = WellsDepression.objects.filter(efw=efw).first()
+            stat_level = self.dossier.static_level(efw)
+            dpr_instance = self.dossier.depression(efw)
             if dpr_instance:
-                dyn_level = dpr_instance.waterdepths.all().order_by("-time_measure").first().water_depth
-                rate = dpr_instance.rates.first().rate
+                dyn_level = last_level(dpr_instance)
+                rate = first_rate(dpr_instance)
                 depression = dyn_level - stat_level if stat_level != "" and dyn_level else ""
                 specific_rate = round(rate / depression, 2) if depression != "" else ""
                 rate_hour = round(rate * Decimal(3.6), 2)
@@ -150,22 +139,26 @@ class Passports(PDF):
         return efw_data, levels, recommendations
 
     def get_test_pump(self):
-        efw = WellsEfw.objects.filter(
-            well=self.instance, doc=self.doc_instance, type_efw__name="откачки одиночные пробные"
-        ).first()
+        efw = next(
+            (
+                efw
+                for efw in self.dossier.efws_of_type(include=["откачки одиночные пробные"])
+                if efw.doc_id == self.doc_instance.pk
+            ),
+            None,
+        )
         test_pump = []
         test_pump_info = {}
         if efw:
-            stat_level = efw.waterdepths.first().water_depth
-            depr_qs = WellsDepression.objects.get(efw=efw)
-            wat_depths = depr_qs.waterdepths.all()
+            stat_level = self.dossier.static_level(efw)
+            depr_qs = self.dossier.depression(efw)
+            wat_depths = depression_series(depr_qs)
             for i, qs in enumerate(wat_depths):
-                rate_inst = depr_qs.rates.filter(time_measure=qs.time_measure).first()
                 depression = qs.water_depth - stat_level
                 rate = ""
                 specific_rate = ""
-                if rate_inst:
-                    rate = round(rate_inst.rate * Decimal(3.6), 2)
+                if qs.rate is not None:
+                    rate = round(qs.rate * Decimal(3.6), 2)
                     if depression:
                         specific_rate = round((rate / depression), 2)
                 test_pump.append(
@@ -178,7 +171,7 @@ class Passports(PDF):
                         specific_rate,
                     )
                 )
-            last_time = wat_depths.last().time_measure
+            last_time = wat_depths[-1].time_measure
             # delta = datetime.timedelta(hours=last_time.hour, minutes=last_time.minute, seconds=last_time.second)
             test_pump_info.update(
                 {
@@ -191,40 +184,20 @@ class Passports(PDF):
             )
         return test_pump, test_pump_info
 
+    def get_construction_tex(self, archive=True):
+        return construction_tex(self.construction_define(archive=archive))
+
     def get_construction_formula(self, archive=True):
-        u_construction = self.construction_define(archive=archive)
-        cnstr_html = ""
-        if u_construction:
-            eq_data = []
-            depth_from = u_construction[0].depth_from
-            for i, qs in enumerate(u_construction):
-                # cs_type = "".join(map(lambda x: x[0], qs.construction_type.name.split()))
-                if i == len(u_construction) - 1 or qs.diameter != u_construction[i + 1].diameter:
-                    eq_data.append(f"\\frac{{{qs.diameter}}}{{{str(depth_from)+ '-' + str(qs.depth_till)}}}")
-                else:
-                    continue
-                if i != len(u_construction) - 1:
-                    depth_from = u_construction[i + 1].depth_from
-            cnstr_unit = " х ".join(eq_data)
-            cnstr_html = markdown.markdown(
-                f"$`{cnstr_unit}`$",
-                extensions=[
-                    "markdown_katex",
-                ],
-                extension_configs={
-                    "markdown_katex": {
-                        "no_inline_svg": True,
-                        "insert_fonts_css": True,
-                    },
-                },
-            )
-        return cnstr_html
+        tex = self.get_construction_tex(archive=archive)
+        return get_formulas([tex]).get(tex, "")
 
-    def create_archive_data(self):
+    def create_archive_data(self, construction_formulas=None):
         drill = self.get_drilled_instance()
         geophysics = self.get_geophysics_instance()
-        construction_formula_old = self.get_construction_formula()
-        construction_formula_new = self.get_construction_formula(archive=False)
+        construction_formula_old, construction_formula_new = construction_formulas or (
+            self.get_construction_formula(),
+            self.get_construction_formula(archive=False),
+        )
         rate_old, depression_old, specific_rate_old, _ = self.get_pump_data()
         rate_new, depression_new, specific_rate_new, watdepth_new = self.get_pump_data(archive=False)
         nd = "нет сведений"
@@ -232,16 +205,16 @@ class Passports(PDF):
         depth_fact = ""
         watdepth_archive = ""
         if drill:
-            depth_instance_old = drill.depths.first()
-            watdepth_instance_old = drill.waterdepths.first()
+            depth_instance_old = first(drill.depths.all())
+            watdepth_instance_old = first(drill.waterdepths.all())
             if depth_instance_old:
                 depth_archive = depth_instance_old.depth
             if watdepth_instance_old:
                 watdepth_archive = watdepth_instance_old.water_depth
         if geophysics:
-            depth_instance_new = geophysics.depths.first()
+            depth_instance_new = first(geophysics.depths.all())
             if not watdepth_new:
-                watdepth_instance_new = geophysics.waterdepths.first()
+                watdepth_instance_new = first(geophysics.waterdepths.all())
                 if watdepth_instance_new:
                     watdepth_new = watdepth_instance_new.water_depth
             if depth_instance_new:
@@ -292,17 +265,13 @@ class Passports(PDF):
             return geophysics_data
 
     def create_lithology(self):
-        aquifer = WellsAquifers.objects.filter(well=self.instance)
-        lithology = WellsLithology.objects.filter(well=self.instance)
-        aq_usage = WellsAquiferUsage.objects.filter(well=self.instance)
+        used_aquifers = self.dossier.used_aquifers
         data = []
-        if lithology.exists():
+        if self.dossier.lithology:
             top_elev = 0
-            for i, hor in enumerate(lithology):
-                aq = aquifer.filter(bot_elev__lte=hor.bot_elev).last()
-                if not aq:
-                    aq = aquifer.first()
-                if aq_usage.filter(aquifer=aq.aquifer).exists():
+            for i, hor in enumerate(self.dossier.lithology):
+                aq = self.dossier.aquifer_for(hor)
+                if aq.aquifer_id in used_aquifers:
                     comments = "Да"
                 else:
                     comments = "Нет"
@@ -339,8 +308,14 @@ class Passports(PDF):
     def create_chem_conclusion(self):
         sample = self.get_sample_instance()
         if sample:
-            chem = sample.chemvalues.filter(Q(chem_value__gt=F("parameter__chem_pdk")))
-            if chem.exists():
+            chem = [
+                qs
+                for qs in sample.chemvalues.all()
+                if qs.chem_value is not None
+                and qs.parameter.chem_pdk is not None
+                and qs.chem_value > qs.parameter.chem_pdk
+            ]
+            if chem:
                 data = []
                 for qs in chem:
                     chem_str = (
@@ -359,39 +334,7 @@ class Passports(PDF):
         return self.instance.extra.get("comments")
 
     def create_schema(self):
-        lat, lon = self.instance.geom.y, self.instance.geom.x
-        gdf = gpd.GeoDataFrame(geometry=[Point(lon, lat)])
-        gdf.crs = "EPSG:4326"
-        gdf = gdf.to_crs("EPSG:3857")
-        tilemapbase.start_logging()
-        tilemapbase.init(create=True)
-        x, y = gdf["geometry"][0].x, gdf["geometry"][0].y
-        margin = 3810  # meters
-        extent = tilemapbase.Extent.from_3857(x - margin, x + margin, y + margin, y - margin)
-        dpi = 100
-        fig, ax = plt.subplots(figsize=(12, 10))
-        plotter = tilemapbase.Plotter(extent, tilemapbase.tiles.build_OSM(), width=600)
-        plotter.plot(ax)
-        ax.set_xlim(x - margin, x + margin)
-        ax.set_ylim(y - margin, y + margin)
-        ax.tick_params(left=False, right=False, labelleft=False, labelbottom=False, bottom=False)
-        # ax.axis("off")
-        scale_len = 1000  # scale length in meters
-        x0, y0 = x - margin + 100, y - margin + 400  # bottom-left position
-        x1, y1 = x0 + scale_len, y0
-        ax.plot([x0, x1], [y0, y1], color="black", linewidth=2)
-        tick_len = 50  # tick length is 50 meters
-        ax.plot([x0, x0], [y0, y0 + tick_len], color="black", linewidth=2)
-        ax.plot([x1, x1], [y0, y0 + tick_len], color="black", linewidth=2)
-        ax.annotate(
-            f"{scale_len} м", (x0 + scale_len / 2, y0 - 150), textcoords="data", ha="center", va="center", fontsize=14
-        )
-        gdf.plot(ax=ax, color="red", markersize=(80, 80))
-        schema_pic = io.BytesIO()
-        ax.figure.savefig(schema_pic, dpi=dpi, format="png")
-        schema_pic.seek(0)
-        schema = base64.b64encode(schema_pic.read()).decode("utf-8")
-        return schema
+        return get_schema(self.instance)
 
     def save(self):
         geophysics = self.get_geophysics_instance()
@@ -400,72 +343,142 @@ class Passports(PDF):
             geophysics.save()
 
 
-def generate_passport(well, document):
-    env = Environment(loader=FileSystemLoader("darcydb/darcy_app/utils/templates"))
-    template = env.get_template("passports/pass.html")
-    pdf = Passports(well, document)
-    logo = pdf.get_logo()
-    watermark = pdf.get_watermark()
-    sign = pdf.get_sign()
-    stamp = pdf.get_stamp()
-    well_id = f"{well.name}{'/ГВК' + str(well.extra['name_gwk']) if well.extra.get('name_gwk') else ''}"
-    title = pdf.create_title()
-    position_info = pdf.create_position()
-    aq_attachments, geo_attachments, chem_attachments = pdf.get_attachments()
-    schema = pdf.create_schema()
-    drilled_info = pdf.create_drilled_base()
-    drilled_data = pdf.create_archive_data()
-    geo_journal = pdf.create_lithology()
+def get_passport_document(well):
+    """
+    Документ "Паспорт скважины" для скважины, создается при отсутствии
+    """
+    code = DictEntities.objects.get(entity__name="тип документа", name="Паспорт скважины")
+    doc_instance = well.docs.filter(typo=code).last()
+    if not doc_instance:
+        doc_instance = well.docs.create(
+            name=f"Паспорт скважины №{well.pk}",
+            typo=code,
+            creation_date=datetime.datetime.now().date(),
+            object_id=well.pk,
+        )
+    return doc_instance
+
+
+def gather_sections(pdf, timings):
+    """
+    Медленные разделы паспорта, не обращающиеся к БД: запрос адреса, схема расположения,
+    загрузка вложений из хранилища и формулы конструкции (KaTeX) выполняются
+    параллельно в пуле потоков. Досье скважины и кэш адресов читаются и
+    записываются только в основном потоке.
+    """
+    point = pdf.instance.geom
+    cached = get_cached_address(point.y, point.x)
+    tasks = {
+        "schema": pdf.create_schema,
+        "attachments": pdf.get_attachments,
+    }
+    if not (cached and cached.is_fresh):
+        tasks["address"] = partial(fetch_address_safe, point.y, point.x)
+    # KaTeX запускается только для формул, которых нет в кэше
+    texs = {
+        "formula_archive": pdf.get_construction_tex(archive=True),
+        "formula_new": pdf.get_construction_tex(archive=False),
+    }
+    formulas = cached_formulas([tex for tex in texs.values() if tex])
+    pending = set()
+    for name, tex in texs.items():
+        if tex and tex not in formulas and tex not in pending:
+            tasks[name] = partial(render_formula, tex)
+            pending.add(tex)
+    results = {}
+    with timed(timings, "sections"), ThreadPoolExecutor(max_workers=settings.DOCUMENTS_SECTION_WORKERS) as executor:
+        futures = {name: executor.submit(timed_call, func) for name, func in tasks.items()}
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+    if "address" in results:
+        results["address"] = resolve_address(point, cached, results["address"])
+    else:
+        results["address"] = cached.address
+    rendered = {texs[name]: results[name] for name in texs if name in results}
+    if rendered:
+        store_formulas(rendered)
+        formulas.update(rendered)
+    for name, tex in texs.items():
+        results[name] = formulas.get(tex, "")
+    return results
+
+
+def shared_context(pdf):
+    """
+    Общие для всех паспортов изображения и реквизиты. В сводном отчете они
+    указываются одними и теми же URL, поэтому встраиваются в PDF один раз.
+    """
+    return dict(
+        doc_type="Паспорт".upper(),
+        logo=pdf.get_logo(),
+        year=datetime.datetime.now().year,
+        watermark=pdf.get_watermark(),
+        sign=pdf.get_sign(),
+        stamp=pdf.get_stamp(),
+        sign_creator=pdf.get_sign("Мошин В.Е..png"),
+    )
+
+
+def passport_context(pdf, timings):
+    """
+    Разделы паспорта скважины для шаблона passports/passport_body.html
+    """
+    well = pdf.instance
+    with timed(timings, "data"):
+        pdf.dossier
+    sections = gather_sections(pdf, timings)
+    aq_attachments, geo_attachments, chem_attachments = sections["attachments"]
     # construction_data = pdf.create_construction_data()
     construction_data = pdf.construction_define(archive=False)
-    if not construction_data.exists():
+    if not construction_data:
         construction_data = pdf.construction_define(archive=True)
-    geophysics_data = pdf.create_geophysics_data()
     efr, levels, pump_recommendations = pdf.get_pump_complex()
     # test_pump, test_pump_info = pdf.get_test_pump()
-    sample_data = pdf.create_sample_data()
-    conclusion = pdf.create_chem_conclusion()
-    extra_data = pdf.get_extra_data()
-    sign_creator = pdf.get_sign("Мошин В.Е..png")
-    rendered_html = template.render(
-        doc_type="Паспорт".upper(),
-        logo=logo,
-        year=datetime.datetime.now().year,
-        watermark=watermark,
-        sign=sign,
-        stamp=stamp,
-        well_id=well_id,
+    return dict(
+        well_id=f"{well.name}{'/ГВК' + str(well.extra['name_gwk']) if well.extra.get('name_gwk') else ''}",
         type_well=f"{well.typo.name[:-2]}ой".upper(),
-        title_info=title,
-        position_info=position_info,
-        schema_pic=schema,
-        drilled_header=drilled_info,
-        drilled_data=drilled_data,
-        geo_journal=geo_journal,
+        title_info=pdf.create_title(),
+        position_info=pdf.create_position(sections["address"]),
+        schema_pic=sections["schema"],
+        drilled_header=pdf.create_drilled_base(),
+        drilled_data=pdf.create_archive_data((sections["formula_archive"], sections["formula_new"])),
+        geo_journal=pdf.create_lithology(),
         construction_data=construction_data,
-        geophysics_data=geophysics_data,
+        geophysics_data=pdf.create_geophysics_data(),
         efr=efr,
         levels=levels,
         pump_recommendations=pump_recommendations,
         # test_pump=test_pump,
         # test_pump_info=test_pump_info,
-        sample_data=sample_data,
-        conclusion=conclusion,
-        extra_data=extra_data,
+        sample_data=pdf.create_sample_data(),
+        conclusion=pdf.create_chem_conclusion(),
+        extra_data=pdf.get_extra_data(),
         aq_attachments=aq_attachments,
         geo_attachments=geo_attachments,
         chem_attachments=chem_attachments,
-        sign_creator=sign_creator,
     )
-    output = io.BytesIO()
-    html = HTML(string=rendered_html).render(stylesheets=[CSS("darcydb/darcy_app/utils/css/base.css")])
-    html.write_pdf(target=output)
-    name_pdf = f"Паспорт_{well.name}.pdf"
-    document_path = DocumentsPath.objects.filter(doc=document).first()
-    if document_path:
-        document_path.delete()
-    document_path = DocumentsPath(doc=document)
-    output.seek(0)
-    document_path.path.save(name_pdf, ContentFile(output.read()))
-    document_path.save()
+
+
+def generate_passport(well, document, force=False, timings=None):
+    """
+    Генерация паспорта скважины. Если исходные данные, шаблоны и оформление
+    не изменились с прошлой генерации и файл документа существует,
+    паспорт не перегенерируется. Возвращает True, если документ был сформирован.
+    Время этапов записывается в timings.
+    """
+    timings = {} if timings is None else timings
+    if not force and document.fingerprint and document.fingerprint == passport_fingerprint(well):
+        if DocumentsPath.objects.filter(doc=document).exists():
+            return False
+    template = get_template("passports/pass.html")
+    pdf = Passports(well, document)
+    rendered_html = template.render(**shared_context(pdf), **passport_context(pdf, timings))
+    with timed(timings, "render"):
+        html = HTML(string=rendered_html).render(stylesheets=[get_stylesheet()])
+    with timed(timings, "upload"):
+        save_document_pdf(document, f"Паспорт_{well.name}.pdf", html)
     pdf.save()
+    # Контрольная сумма считается после pdf.save(), который обновляет связанные записи
+    document.fingerprint = passport_fingerprint(well)
+    Documents.objects.filter(pk=document.pk).update(fingerprint=document.fingerprint)
+    return True
@@ -1,19 +1,19 @@
 import datetime
-import io
 from decimal import Decimal
 
-from django.core.files.base import ContentFile
-from jinja2 import Environment, FileSystemLoader
-from weasyprint import CSS, HTML
+from weasyprint import HTML
 
-from ..models import DocumentsPath, WellsAquifers, WellsDepression, WellsEfw, WellsLithology
-from .doc_gen import PDF
+from .doc_gen import PDF, save_document_pdf, timed
+from .dossier import first
+from .renderer import get_stylesheet, get_template
+from .series import depression_series
 
 
 class PumpJournal(PDF):
     def __init__(self, efw, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.efw = efw
+        # ОФР из досье скважины, с предзагруженными замерами
+        self.efw = self.dossier.get_efw(efw.pk) or efw
 
     def create_info_data(self):
         field = self.get_fields()
@@ -26,7 +26,7 @@ class PumpJournal(PDF):
         geophysics = self.get_geophysics_instance()
         depth_fact = ""
         if geophysics:
-            depth_instance_new = geophysics.depths.first()
+            depth_instance_new = first(geophysics.depths.all())
             if depth_instance_new:
                 depth_fact = depth_instance_new.depth
         info = {
@@ -42,7 +42,7 @@ class PumpJournal(PDF):
             "Глубина кровли водоносного горизонта": f"{top} м" if top is not None else "",
             "Глубина подошвы водоносного горизонта": f"{bot} м" if bot else "",
             "Даты проведения опыта": self.efw.date.date().strftime("%d.%m.%Y"),
-            "Высота оголовка скважины": f"{self.efw.lugs.first().lug_height} м" if self.efw.lugs.first() else "",
+            "Высота оголовка скважины": f"{first(self.efw.lugs.all()).lug_height} м" if self.efw.lugs.all() else "",
             "Статический уровень воды на начало откачки": "",
             "Динамический уровень воды на конец откачки": "",
         }
@@ -65,18 +65,14 @@ class PumpJournal(PDF):
         dyn_level = ""
         rate_fin = ""
         depression = ""
-        stat_level_inst = self.efw.waterdepths.first()
-        if stat_level_inst:
-            stat_level = stat_level_inst.water_depth
-        depr_qs = WellsDepression.objects.filter(efw=self.efw).first()
+        stat_level = self.dossier.static_level(self.efw)
+        depr_qs = self.dossier.depression(self.efw)
         if depr_qs:
-            wat_depths = depr_qs.waterdepths.all()
-            for i, qs in enumerate(wat_depths):
-                rate_inst = depr_qs.rates.filter(time_measure=qs.time_measure).first()
+            for qs in depression_series(depr_qs):
                 depression = qs.water_depth - stat_level if stat_level != "" and qs.water_depth else 0
                 rate = ""
-                if rate_inst:
-                    rate = rate_fin = round(rate_inst.rate * Decimal(3.6), 2)
+                if qs.rate is not None:
+                    rate = rate_fin = round(qs.rate * Decimal(3.6), 2)
                 pump_data.append(
                     (
                         (self.efw.date + qs.time_measure).date(),
@@ -100,14 +96,19 @@ class PumpJournal(PDF):
 
     def get_recovery_data(self):
         recovery_data = []
-        efw_recovery = WellsEfw.objects.filter(
-            well=self.efw.well, doc=self.efw.doc, type_efw__name="восстановление уровня"
-        ).first()
+        efw_recovery = next(
+            (
+                efw
+                for efw in self.dossier.efws_of_type(include=["восстановление уровня"])
+                if efw.doc_id == self.efw.doc_id
+            ),
+            None,
+        )
         wat_start = ""
         if efw_recovery:
-            depr_qs = WellsDepression.objects.get(efw=efw_recovery)
-            wat_depths = depr_qs.waterdepths.all()
-            wat_start = depr_qs.waterdepths.first().water_depth
+            depr_qs = self.dossier.depression(efw_recovery)
+            wat_depths = depression_series(depr_qs)
+            wat_start = wat_depths[0].water_depth if wat_depths else ""
             for qs in wat_depths:
                 recovery = wat_start - qs.water_depth
                 recovery_data.append(
@@ -123,18 +124,15 @@ class PumpJournal(PDF):
         return wat_start, recovery_data
 
     def create_aquifer_data(self):
-        stat_level = self.efw.waterdepths.first().water_depth
-        aquifer = WellsAquifers.objects.filter(well=self.instance)
-        lithology = WellsLithology.objects.filter(well=self.instance, bot_elev__gte=stat_level)
-        aq_usage = self.get_aquifer_usage()
+        stat_level = first(self.efw.waterdepths.all()).water_depth
+        lithology = [hor for hor in self.dossier.lithology if hor.bot_elev >= stat_level]
+        used_aquifers = self.dossier.used_aquifers
         data = []
-        if lithology.exists():
+        if lithology:
             top_elev = 0
             for i, hor in enumerate(lithology):
-                aq = aquifer.filter(bot_elev__lte=hor.bot_elev).last()
-                if not aq:
-                    aq = aquifer.first()
-                if aq_usage.filter(aquifer=aq.aquifer).exists():
+                aq = self.dossier.aquifer_for(hor)
+                if aq.aquifer_id in used_aquifers:
                     if data:
                         if data[-1][3] == aq.aquifer.aquifer_index:
                             continue
@@ -152,10 +150,11 @@ class PumpJournal(PDF):
         return sign_list
 
 
-def generate_pump_journal(efw, document):
-    env = Environment(loader=FileSystemLoader("darcydb/darcy_app/utils/templates"))
-    template = env.get_template("pump_journals/pump_journal.html")
-    pdf = PumpJournal(efw, efw.well, document)
+def generate_pump_journal(efw, document, timings=None):
+    timings = {} if timings is None else timings
+    template = get_template("pump_journals/pump_journal.html")
+    with timed(timings, "data"):
+        pdf = PumpJournal(efw, efw.well, document)
     logo = pdf.get_logo()
     watermark = pdf.get_watermark()
     sign = pdf.get_sign()
@@ -163,9 +162,8 @@ def generate_pump_journal(efw, document):
     well_id = f"{efw.well.name}{'/ГВК' + str(efw.well.extra['name_gwk']) if efw.well.extra.get('name_gwk') else ''}"
     title = pdf.create_title()
     info = pdf.create_info_data()
-    construction_data = pdf.create_construction_data()
     construction_data = pdf.construction_define(archive=False)
-    if not construction_data.exists():
+    if not construction_data:
         construction_data = pdf.construction_define(archive=True)
     instrumental_data = pdf.get_instrumental_data()
     dyn_wat, stat_wat, rate, specific_rate, depression, pump_data = pdf.get_pump_data()
@@ -196,14 +194,7 @@ def generate_pump_journal(efw, document):
         conclusions=efw.extra.get("comments", ""),
         sign_list=sign_list,
     )
-    output = io.BytesIO()
-    html = HTML(string=rendered_html).render(stylesheets=[CSS("darcydb/darcy_app/utils/css/base.css")])
-    html.write_pdf(target=output)
-    name_pdf = f"Журнал_опытной_откачки_{efw.well.name}-{efw.date.date()}.pdf"
-    document_path = DocumentsPath.objects.filter(doc=document).first()
-    if document_path:
-        document_path.delete()
-    document_path = DocumentsPath(doc=document)
-    output.seek(0)
-    document_path.path.save(name_pdf, ContentFile(output.read()))
-    document_path.save()
+    with timed(timings, "render"):
+        html = HTML(string=rendered_html).render(stylesheets=[get_stylesheet()])
+    with timed(timings, "upload"):
+        save_document_pdf(document, f"Журнал_опытной_откачки_{efw.well.name}-{efw.date.date()}.pdf", html)
@@ -0,0 +1,199 @@
+from collections import Counter
+
+import numpy as np
+from django.db import connection, transaction
+from numpy.lib.stride_tricks import sliding_window_view
+
+from ..models import RegimeMeasurement, RegimeQaFlag, RegimeQaState
+
+# Версия алгоритма: входит в контрольную сумму, изменение порогов пересчитывает все ряды
+QA_VERSION = 1
+
+# Выбросы: скользящая медиана и MAD по окну из SPIKE_WINDOW замеров
+SPIKE_WINDOW = 7
+SPIKE_SCORE = 6.0
+# Минимальное отклонение выброса от медианы, м
+MIN_SPIKE = 0.5
+# Нижняя граница разброса ряда, м (ровные ряды с нулевым MAD)
+NOISE_FLOOR = 0.05
+# MAD -> стандартное отклонение нормального распределения
+MAD_SCALE = 1.4826
+# Ошибка знака: |значение| отличается от |медианы| не более чем на долю
+SIGN_TOLERANCE = 0.1
+# Ошибка единиц: отношение к медиане отличается от степени 10 не более чем на 0.05 порядка (~12%)
+SCALE_TOLERANCE = 0.05
+
+# Скачки уровня: разность медиан окон по STEP_WINDOW замеров до и после замера
+STEP_WINDOW = 10
+STEP_SCORE = 8.0
+# Минимальный скачок, м
+MIN_STEP = 1.0
+# Доля скачка, приходящаяся на разность с предыдущим замером (резкий, а не сезонный подъем)
+STEP_SHARE = 0.8
+
+FINGERPRINT_SQL = """
+    SELECT well_id, count(*),
+        coalesce(sum(hashtext(concat_ws(':', source_id, date, time_measure, value))::bigint), 0)
+    FROM regime_measurement
+    WHERE parameter = %(level)s AND (%(wells)s::integer[] IS NULL OR well_id = ANY(%(wells)s))
+    GROUP BY well_id
+"""
+
+
+def rolling_median(values, window):
+    """Скользящие медиана и MAD с центром в замере; края ряда отражаются"""
+    half = window // 2
+    windows = sliding_window_view(np.pad(values, half, mode="reflect"), window)
+    median = np.median(windows, axis=1)
+    mad = np.median(np.abs(windows - median[:, None]), axis=1)
+    return median, mad
+
+
+def find_spikes(values):
+    """
+    Выбросы по робастному z-показателю (x - медиана) / (1.4826 * MAD).
+    Возвращает (маска выбросов, скользящая медиана, z-показатель).
+    """
+    median, mad = rolling_median(values, SPIKE_WINDOW)
+    deviation = values - median
+    score = deviation / np.maximum(MAD_SCALE * mad, NOISE_FLOOR)
+    spikes = (np.abs(score) > SPIKE_SCORE) & (np.abs(deviation) > MIN_SPIKE)
+    return spikes, median, score
+
+
+def classify_spikes(values, median):
+    """Вид замечания для выбросов: ошибка знака, ошибка единиц (см/мм вместо м) или выброс"""
+    kinds = np.full(values.shape, RegimeQaFlag.SPIKE)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.abs(values / median)
+        decades = np.log10(ratio)
+    order = np.round(decades)
+    sign = (np.sign(values) == -np.sign(median)) & (np.abs(ratio - 1) <= SIGN_TOLERANCE)
+    scale = (order != 0) & (np.abs(decades - order) <= SCALE_TOLERANCE)
+    kinds[scale] = RegimeQaFlag.SCALE
+    kinds[sign] = RegimeQaFlag.SIGN
+    return kinds
+
+
+def find_steps(values):
+    """
+    Резкие скачки уровня: медиана STEP_WINDOW замеров после замера отличается от медианы
+    STEP_WINDOW замеров до него больше порога, и почти весь скачок приходится на сам замер.
+    Порог - STEP_SCORE робастных отклонений разности соседних замеров, но не меньше MIN_STEP.
+    Возвращает (индексы замеров, показатель скачка).
+    """
+    window = STEP_WINDOW
+    if values.size < 2 * window:
+        return np.empty(0, dtype=int), np.empty(0)
+    medians = np.median(sliding_window_view(values, window), axis=1)
+    positions = np.arange(window, values.size - window + 1)
+    steps = medians[window:] - medians[:-window]
+    jumps = values[positions] - values[positions - 1]
+    diffs = np.diff(values)
+    noise = MAD_SCALE * np.median(np.abs(diffs - np.median(diffs))) / np.sqrt(2)
+    threshold = max(STEP_SCORE * noise, MIN_STEP)
+    found = (
+        (np.abs(steps) > threshold)
+        & (np.sign(jumps) == np.sign(steps))
+        & (np.abs(jumps) >= STEP_SHARE * np.abs(steps))
+    )
+    return positions[found], steps[found] / max(noise, NOISE_FLOOR)
+
+
+def check_series(values):
+    """
+    Проверка ряда уровней одной скважины (в порядке времени замеров).
+    Скачки ищутся по ряду, в котором выбросы заменены скользящей медианой.
+    Возвращает (индексы замеров, виды замечаний, показатели).
+    """
+    if values.size < SPIKE_WINDOW:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int), np.empty(0)
+    spikes, median, score = find_spikes(values)
+    kinds = classify_spikes(values, median)
+    steps, step_scores = find_steps(np.where(spikes, median, values))
+    spikes = np.flatnonzero(spikes)
+    return (
+        np.concatenate([spikes, steps]),
+        np.concatenate([kinds[spikes], np.full(steps.size, RegimeQaFlag.STEP)]),
+        np.concatenate([score[spikes], step_scores]),
+    )
+
+
+def series_fingerprints(well_ids=None):
+    """Контрольные суммы рядов уровней {скважина: сумма} одним запросом по regime_measurement"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            FINGERPRINT_SQL,
+            {"level": RegimeMeasurement.LEVEL, "wells": None if well_ids is None else list(well_ids)},
+        )
+        return {well_id: f"{QA_VERSION}:{count}:{total}" for well_id, count, total in cursor.fetchall()}
+
+
+def collect_flags(well_ids):
+    """Замечания по рядам уровней группы скважин; замеры читаются одним запросом"""
+    rows = list(
+        RegimeMeasurement.objects.filter(well__in=well_ids, parameter=RegimeMeasurement.LEVEL)
+        .order_by("well_id", "date", "time_measure", "source_id")
+        .values_list("well_id", "regime_id", "source_id", "date", "time_measure", "value")
+    )
+    if not rows:
+        return []
+    wells = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    values = np.fromiter((row[5] for row in rows), dtype=float, count=len(rows))
+    bounds = np.flatnonzero(np.diff(wells)) + 1
+    flags = []
+    for start, end in zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [len(rows)]])):
+        for index, kind, score in zip(*check_series(values[start:end])):
+            well_id, regime_id, source_id, date, time_measure, value = rows[start + index]
+            flags.append(
+                RegimeQaFlag(
+                    well_id=well_id,
+                    regime_id=regime_id,
+                    water_depth_id=source_id,
+                    date=date,
+                    time_measure=time_measure,
+                    value=value,
+                    kind=int(kind),
+                    score=round(float(score), 2),
+                )
+            )
+    return flags
+
+
+def run_quality_checks(wells=None, force=False, chunk_size=200):
+    """
+    Пакетная проверка рядов уровней режимных наблюдений. Ряды, замеры которых
+    не изменились с прошлой проверки (совпадает fingerprint), пропускаются,
+    если не задан force. Возвращает (проверено, пропущено).
+    """
+    well_ids = None if wells is None else list(wells.values_list("pk", flat=True))
+    fingerprints = series_fingerprints(well_ids)
+    changed = sorted(fingerprints)
+    if not force:
+        stored = dict(RegimeQaState.objects.filter(well__in=changed).values_list("well_id", "fingerprint"))
+        changed = [well_id for well_id in changed if stored.get(well_id) != fingerprints[well_id]]
+    for start in range(0, len(changed), chunk_size):
+        end = start + chunk_size
+        chunk = changed[start:end]
+        flags = collect_flags(chunk)
+        counts = Counter(flag.well_id for flag in flags)
+        with transaction.atomic():
+            RegimeQaFlag.objects.filter(well__in=chunk).delete()
+            RegimeQaFlag.objects.bulk_create(flags, batch_size=1000)
+            RegimeQaState.objects.bulk_create(
+                [
+                    RegimeQaState(well_id=well_id, fingerprint=fingerprints[well_id], flags=counts[well_id])
+                    for well_id in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=["well"],
+                update_fields=["fingerprint", "flags", "checked"],
+            )
+    # Скважины, у которых не осталось замеров уровня
+    stale = RegimeQaState.objects.exclude(well__in=list(fingerprints))
+    if well_ids is not None:
+        stale = stale.filter(well__in=well_ids)
+    with transaction.atomic():
+        RegimeQaFlag.objects.filter(well__in=stale.values("well")).delete()
+        stale.delete()
+    return len(changed), len(fingerprints) - len(changed)
@@ -0,0 +1,163 @@
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+
+from ..models import RegimeMeasurement, WellsRegime
+
+# Секции regime_measurement, существование которых уже проверено в этом процессе
+_partitions = set()
+
+COPY_MEASUREMENTS_SQL = """
+    INSERT INTO regime_measurement (well_id, regime_id, date, time_measure, parameter, value, source_id)
+    SELECT r.well_id, r.id, r.date, m.time_measure, %(level)s, m.water_depth, m.id
+    FROM wells_regime r JOIN wells_water_depth m ON m.content_type_id = %(content_type)s AND m.object_id = r.id
+    WHERE r.id = ANY(%(regimes)s)
+    UNION ALL
+    SELECT r.well_id, r.id, r.date, t.time_measure, %(temperature)s, t.temperature, t.id
+    FROM wells_regime r JOIN wells_temperature t ON t.content_type_id = %(content_type)s AND t.object_id = r.id
+    WHERE r.id = ANY(%(regimes)s)
+"""
+
+
+def partition_name(year):
+    return f"{RegimeMeasurement._meta.db_table}_{year}"
+
+
+def ensure_partition(year):
+    """
+    Годовая секция regime_measurement. Создается при первой записи замеров за год.
+    """
+    if year in _partitions:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(year)} PARTITION OF {RegimeMeasurement._meta.db_table} "
+            "FOR VALUES FROM (%s) TO (%s)",
+            [f"{year}-01-01", f"{year + 1}-01-01"],
+        )
+    # Секция, созданная в откаченной транзакции, не должна считаться существующей
+    transaction.on_commit(lambda: _partitions.add(year))
+
+
+def is_regime_measurement(instance):
+    return instance.content_type_id == ContentType.objects.get_for_model(WellsRegime).pk
+
+
+def sync_regime(regime_id):
+    """
+    Перезапись замеров режимного наблюдения в regime_measurement по WellsWaterDepth
+    и WellsTemperature. Удаленное наблюдение удаляется из таблицы каскадно.
+    """
+    sync_regimes([regime_id])
+
+
+def sync_regimes(regime_ids):
+    """Перезапись замеров нескольких режимных наблюдений одним запросом (массовая загрузка)"""
+    regime_ids = list(regime_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {RegimeMeasurement._meta.db_table} WHERE regime_id = ANY(%s)",
+            [regime_ids],
+        )
+        for year in WellsRegime.objects.filter(pk__in=regime_ids).dates("date", "year"):
+            ensure_partition(year.year)
+        cursor.execute(
+            COPY_MEASUREMENTS_SQL,
+            {
+                "level": RegimeMeasurement.LEVEL,
+                "temperature": RegimeMeasurement.TEMPERATURE,
+                "content_type": ContentType.objects.get_for_model(WellsRegime).pk,
+                "regimes": regime_ids,
+            },
+        )
+
+
+def resync_regimes(regimes=None, chunk_size=1000):
+    """
+    Полная перезапись regime_measurement по исходным таблицам пакетами по chunk_size наблюдений.
+    Нужна после записей в обход сигналов (update(), SQL, loaddata --raw).
+    Возвращает количество режимных наблюдений.
+    """
+    regimes = WellsRegime.objects.all() if regimes is None else regimes
+    regime_ids = regimes.order_by("pk").values_list("pk", flat=True).iterator(chunk_size=chunk_size)
+    count = 0
+    while chunk := list(islice(regime_ids, chunk_size)):
+        with transaction.atomic():
+            sync_regimes(chunk)
+        count += len(chunk)
+    return count
+
+
+def regime_series(well, parameter=RegimeMeasurement.LEVEL, date_from=None, date_till=None):
+    """
+    Временной ряд режимных замеров скважины [(дата, время замера, значение)].
+    Условие по дате ограничивает чтение секциями нужных лет.
+    """
+    measurements = RegimeMeasurement.objects.filter(well=well, parameter=parameter)
+    if date_from:
+        measurements = measurements.filter(date__gte=date_from)
+    if date_till:
+        measurements = measurements.filter(date__lte=date_till)
+    return list(measurements.order_by("date", "time_measure").values_list("date", "time_measure", "value"))
+
+
+# Гранулярность статистики -> материализованное представление; суточная считается по regime_measurement
+STATISTICS_VIEWS = {
+    "day": None,
+    "month": "regime_level_monthly",
+    "year": "regime_level_yearly",
+}
+
+
+def truncate_date(value, granularity):
+    if granularity == "year":
+        return value.replace(month=1, day=1)
+    if granularity == "month":
+        return value.replace(day=1)
+    return value
+
+
+def refresh_regime_statistics():
+    """Пересчет материализованных представлений статистики уровней (без блокировки чтения)"""
+    with connection.cursor() as cursor:
+        for view in filter(None, STATISTICS_VIEWS.values()):
+            cursor.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+
+
+def regime_statistics(well_ids, granularity="month", date_from=None, date_till=None):
+    """
+    Минимальный, средний и максимальный уровень подземных вод по скважинам за сутки,
+    месяц или год. Месячная и годовая статистика читается из материализованных
+    представлений (актуальна на момент refresh_regime_statistics), суточная
+    агрегируется в PostgreSQL по секциям regime_measurement нужных лет.
+    Возвращает {id скважины: [(период, min, mean, max, количество замеров)]}.
+    """
+    view = STATISTICS_VIEWS[granularity]
+    params = {"wells": list(well_ids), "level": RegimeMeasurement.LEVEL}
+    conditions = ["well_id = ANY(%(wells)s)"]
+    if view:
+        source = f"SELECT well_id, period, min_value, mean_value, max_value, readings FROM {view}"
+        date_column = "period"
+    else:
+        source = (
+            "SELECT well_id, date AS period, min(value), round(avg(value), 3), max(value), count(*) "
+            "FROM regime_measurement"
+        )
+        date_column = "date"
+        conditions.append("parameter = %(level)s")
+    if date_from:
+        conditions.append(f"{date_column} >= %(date_from)s")
+        params["date_from"] = truncate_date(date_from, granularity)
+    if date_till:
+        conditions.append(f"{date_column} <= %(date_till)s")
+        params["date_till"] = date_till
+    query = f"{source} WHERE {' AND '.join(conditions)}"
+    if not view:
+        query += " GROUP BY well_id, date"
+    statistics = {well_id: [] for well_id in params["wells"]}
+    with connection.cursor() as cursor:
+        cursor.execute(f"{query} ORDER BY well_id, period", params)
+        for well_id, *row in cursor.fetchall():
+            statistics[well_id].append(tuple(row))
+    return statistics
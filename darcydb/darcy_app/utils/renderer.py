@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from jinja2 import Environment, FileSystemLoader, ModuleLoader
+from weasyprint import CSS
+
+logger = logging.getLogger(__name__)
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATES_DIR = os.path.join(UTILS_DIR, "templates")
+CSS_PATH = os.path.join(UTILS_DIR, "css", "base.css")
+DOCUMENT_TEMPLATES = ("passports", "pump_journals")
+
+
+class DocumentRenderer:
+    """
+    Общий для процесса кэш шаблонов документов и таблицы стилей.
+
+    Шаблоны паспортов и журналов компилируются один раз на процесс; Jinja
+    перечитывает шаблон только при изменении mtime файла. Если задан каталог
+    с заранее скомпилированными шаблонами (compile_doc_templates) и он не
+    устарел, шаблоны загружаются из Python-модулей без разбора исходников.
+    Разобранный base.css перечитывается только при изменении mtime файла.
+    """
+
+    def __init__(self, templates_dir=TEMPLATES_DIR, css_path=CSS_PATH, compiled_dir=None):
+        self.templates_dir = templates_dir
+        self.css_path = css_path
+        self.compiled_dir = compiled_dir
+        self._environment = None
+        self._stylesheet = None
+        self._css_mtime = None
+        self._version = None
+        self._version_mtime = None
+
+    def template_files(self):
+        for folder in DOCUMENT_TEMPLATES:
+            folder_path = os.path.join(self.templates_dir, folder)
+            for name in sorted(os.listdir(folder_path)):
+                yield f"{folder}/{name}", os.path.join(folder_path, name)
+
+    def templates_mtime(self):
+        return max(os.path.getmtime(path) for _, path in self.template_files())
+
+    def compiled_is_fresh(self):
+        marker = os.path.join(self.compiled_dir, ".compiled") if self.compiled_dir else None
+        return bool(marker and os.path.exists(marker) and os.path.getmtime(marker) >= self.templates_mtime())
+
+    def _create_environment(self):
+        if self.compiled_dir:
+            if self.compiled_is_fresh():
+                return Environment(loader=ModuleLoader(self.compiled_dir))
+            logger.warning("Compiled document templates in %s are missing or stale", self.compiled_dir)
+        return Environment(loader=FileSystemLoader(self.templates_dir), auto_reload=True)
+
+    @property
+    def environment(self):
+        if self._environment is None:
+            self._environment = self._create_environment()
+        elif isinstance(self._environment.loader, ModuleLoader) and not self.compiled_is_fresh():
+            self._environment = self._create_environment()
+        return self._environment
+
+    def get_template(self, name):
+        return self.environment.get_template(name)
+
+    def get_stylesheet(self):
+        mtime = os.path.getmtime(self.css_path)
+        if self._stylesheet is None or mtime != self._css_mtime:
+            self._stylesheet = CSS(filename=self.css_path)
+            self._css_mtime = mtime
+        return self._stylesheet
+
+    def version(self):
+        """Хэш содержимого шаблонов документов и таблицы стилей, пересчитывается при изменении mtime"""
+        mtime = max(self.templates_mtime(), os.path.getmtime(self.css_path))
+        if self._version is None or mtime != self._version_mtime:
+            digest = hashlib.sha1()
+            for name, path in [*self.template_files(), ("base.css", self.css_path)]:
+                digest.update(name.encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            self._version = digest.hexdigest()
+            self._version_mtime = mtime
+        return self._version
+
+    def warm(self):
+        """Компиляция всех шаблонов документов и разбор таблицы стилей"""
+        for name, _ in self.template_files():
+            self.get_template(name)
+        self.get_stylesheet()
+
+    def compile_templates(self, target=None):
+        """Компиляция шаблонов документов в Python-модули (ahead-of-time)"""
+        target = target or self.compiled_dir
+        os.makedirs(target, exist_ok=True)
+        env = Environment(loader=FileSystemLoader(self.templates_dir))
+        env.compile_templates(
+            target,
+            filter_func=lambda name: name.split("/")[0] in DOCUMENT_TEMPLATES,
+            zip=None,
+            ignore_errors=False,
+        )
+        with open(os.path.join(target, ".compiled"), "w"):
+            pass
+        return target
+
+
+renderer = DocumentRenderer(compiled_dir=getattr(settings, "DOCUMENTS_COMPILED_TEMPLATES_DIR", None) or None)
+
+
+def get_template(name):
+    return renderer.get_template(name)
+
+
+def get_stylesheet():
+    """
+    Разобранная таблица стилей base.css, одна на процесс
+    """
+    return renderer.get_stylesheet()
@@ -0,0 +1,94 @@
+import base64
+import glob
+import hashlib
+import io
+import os
+
+import tilemapbase
+from django.conf import settings
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# Увеличивается при любом изменении оформления схемы, чтобы сбросить кэш PNG
+SCHEMA_STYLE_VERSION = 1
+MARGIN = 3810  # meters
+SCALE_LEN = 1000  # scale length in meters
+TICK_LEN = 50  # tick length in meters
+DPI = 100
+
+_tiles_initialized = False
+
+
+def get_cache_dir(*parts):
+    path = os.path.join(settings.DOCUMENTS_CACHE_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def init_tiles():
+    """
+    Локальный кэш тайлов OSM (sqlite), один на процесс
+    """
+    global _tiles_initialized
+    if not _tiles_initialized:
+        tilemapbase.init(cache_filename=os.path.join(get_cache_dir("tiles"), "tiles.db"), create=True)
+        _tiles_initialized = True
+
+
+def schema_key(geom):
+    return hashlib.sha1(f"{SCHEMA_STYLE_VERSION}:{geom.srid}:{geom.wkt}".encode()).hexdigest()
+
+
+def render_schema(geom):
+    """
+    Обзорная схема расположения скважины в PNG.
+    Рисуется на явном Agg-холсте без pyplot, фигура освобождается сразу после сохранения.
+    """
+    init_tiles()
+    point = geom.transform(3857, clone=True)
+    x, y = point.x, point.y
+    extent = tilemapbase.Extent.from_3857(x - MARGIN, x + MARGIN, y + MARGIN, y - MARGIN)
+    fig = Figure(figsize=(12, 10))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        plotter = tilemapbase.Plotter(extent, tilemapbase.tiles.build_OSM(), width=600)
+        plotter.plot(ax)
+        ax.set_xlim(x - MARGIN, x + MARGIN)
+        ax.set_ylim(y - MARGIN, y + MARGIN)
+        ax.tick_params(left=False, right=False, labelleft=False, labelbottom=False, bottom=False)
+        x0, y0 = x - MARGIN + 100, y - MARGIN + 400  # bottom-left position
+        x1 = x0 + SCALE_LEN
+        ax.plot([x0, x1], [y0, y0], color="black", linewidth=2)
+        ax.plot([x0, x0], [y0, y0 + TICK_LEN], color="black", linewidth=2)
+        ax.plot([x1, x1], [y0, y0 + TICK_LEN], color="black", linewidth=2)
+        ax.annotate(
+            f"{SCALE_LEN} м", (x0 + SCALE_LEN / 2, y0 - 150), textcoords="data", ha="center", va="center", fontsize=14
+        )
+        ax.scatter([x], [y], color="red", s=80)
+        output = io.BytesIO()
+        fig.savefig(output, dpi=DPI, format="png")
+    finally:
+        fig.clear()
+    return output.getvalue()
+
+
+def get_schema(well):
+    """
+    Схема расположения скважины в base64. PNG кэшируется на диске по скважине,
+    хэшу геометрии и версии оформления; устаревшие файлы скважины удаляются.
+    """
+    cache_dir = get_cache_dir("schemas")
+    path = os.path.join(cache_dir, f"{well.pk}_{schema_key(well.geom)}.png")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            png = f.read()
+    else:
+        png = render_schema(well.geom)
+        for stale in glob.glob(os.path.join(cache_dir, f"{well.pk}_*.png")):
+            os.remove(stale)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+    return base64.b64encode(png).decode("utf-8")
@@ -0,0 +1,127 @@
+import datetime
+from collections import namedtuple
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+# Допустимое расхождение времени замера дебита и уровня при сопоставлении
+RATE_TOLERANCE = datetime.timedelta(seconds=30)
+
+# Знаков после запятой в WellsWaterDepth.water_depth и WellsRate.rate
+DEPTH_PLACES = 2
+RATE_PLACES = 3
+
+Measurement = namedtuple("Measurement", ["time_measure", "water_depth", "rate"])
+Reading = namedtuple("Reading", ["pk", "time_measure", "value"])
+DepressionArrays = namedtuple("DepressionArrays", ["time", "water_depth", "rate"])
+
+
+def to_decimal(value, places):
+    return round(Decimal(str(value)), places)
+
+
+def depression_readings(depression):
+    """
+    Замеры уровня и дебита журнала ОФР: ([Reading], [Reading]).
+    Упакованный журнал читается из массивов series_* без запросов
+    (pk - порядковый номер на общей шкале времени), иначе из waterdepths/rates.
+    """
+    if not depression.is_packed:
+        return (
+            [Reading(item.pk, item.time_measure, item.water_depth) for item in depression.waterdepths.all()],
+            [Reading(item.pk, item.time_measure, item.rate) for item in depression.rates.all()],
+        )
+    levels, rates = [], []
+    for i, (seconds, depth, rate) in enumerate(
+        zip(depression.series_time, depression.series_depth, depression.series_rate)
+    ):
+        time_measure = datetime.timedelta(seconds=seconds)
+        if depth is not None:
+            levels.append(Reading(i, time_measure, to_decimal(depth, DEPTH_PLACES)))
+        if rate is not None:
+            rates.append(Reading(i, time_measure, to_decimal(rate, RATE_PLACES)))
+    return levels, rates
+
+
+def pack_readings(levels, rates):
+    """
+    Общая шкала времени замеров уровня и дебита (сек) и векторы значений на ней;
+    None там, где замера этого вида нет. На одно время берется первая введенная запись.
+    """
+    values = ({}, {})
+    for readings, by_time in zip((levels, rates), values):
+        for reading in sorted(readings, key=lambda item: item.pk):
+            if reading.time_measure is None:
+                raise ValueError(f"Замер {reading.pk} без времени не может быть упакован")
+            by_time.setdefault(reading.time_measure, float(reading.value))
+    times = sorted(values[0].keys() | values[1].keys())
+    return (
+        [time_measure.total_seconds() for time_measure in times],
+        [values[0].get(time_measure) for time_measure in times],
+        [values[1].get(time_measure) for time_measure in times],
+    )
+
+
+def depression_arrays(depression):
+    """
+    Замеры журнала ОФР в массивах NumPy на общей шкале времени: время (сек),
+    глубина уровня (м), дебит (л/с); отсутствующие значения - NaN.
+    Для упакованного журнала - без запросов к БД.
+    """
+    if depression.is_packed:
+        series = depression.series_time, depression.series_depth, depression.series_rate
+    else:
+        series = pack_readings(*depression_readings(depression))
+    return DepressionArrays(*(np.array(values, dtype=float) for values in series))
+
+
+def last_level(depression):
+    """Последний по времени замер уровня"""
+    levels = [item for item in depression_readings(depression)[0] if item.time_measure is not None]
+    return max(levels, key=lambda item: item.time_measure).value if levels else None
+
+
+def first_rate(depression):
+    """Первый введенный замер дебита"""
+    rates = depression_readings(depression)[1]
+    return min(rates, key=lambda item: item.pk).value if rates else None
+
+
+def depression_series(depression, tolerance=RATE_TOLERANCE):
+    """
+    Замеры уровня журнала ОФР, сопоставленные с замерами дебита по времени.
+
+    Уровни и дебиты берутся из waterdepths/rates (по одному запросу или из prefetch_related)
+    или из массивов упакованного журнала. Дебит присоединяется к уровню через pandas.merge_asof:
+    ближайший замер в пределах tolerance, при точном совпадении времени - он. Возвращает список Measurement,
+    упорядоченный по времени замера; rate равен None, если дебит не найден.
+    """
+    levels, rates = depression_readings(depression)
+    depths = pd.DataFrame(levels, columns=["pk", "time_measure", "water_depth"]).dropna(subset=["time_measure"])
+    if depths.empty:
+        return []
+    depths["time_measure"] = pd.to_timedelta(depths["time_measure"])
+    depths = depths.sort_values(["time_measure", "pk"], kind="stable")
+    rates = pd.DataFrame(rates, columns=["rate_pk", "time_measure", "rate"])
+    if rates.empty:
+        depths["rate"] = None
+    else:
+        rates["time_measure"] = pd.to_timedelta(rates["time_measure"])
+        # На одно время замера - первая введенная запись дебита
+        rates = rates.sort_values(["time_measure", "rate_pk"], kind="stable").drop_duplicates("time_measure")
+        depths = pd.merge_asof(
+            depths,
+            rates[["time_measure", "rate"]],
+            on="time_measure",
+            direction="nearest",
+            tolerance=pd.Timedelta(tolerance),
+        )
+    return [
+        Measurement(
+            time_measure.to_pytimedelta(),
+            water_depth,
+            None if pd.isna(rate) else rate,
+        )
+        for time_measure, water_depth, rate in zip(depths["time_measure"], depths["water_depth"], depths["rate"])
+    ]
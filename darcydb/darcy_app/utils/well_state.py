@@ -0,0 +1,164 @@
+import datetime
+from threading import local
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from ..models import (
+    RegimeMeasurement,
+    Wells,
+    WellsDrilledData,
+    WellsEfw,
+    WellsGeophysics,
+    WellsRegime,
+    WellsSample,
+    WellsState,
+)
+from .dossier import first
+
+
+def latest(*candidates):
+    """Значение с наибольшей датой из пар (дата, значение); пары без значения пропускаются"""
+    candidates = [(date, value) for date, value in candidates if date is not None and value is not None]
+    return max(candidates, key=lambda item: item[0], default=(None, None))
+
+
+def as_date(value):
+    return value.date() if isinstance(value, datetime.datetime) else value
+
+
+def compute_state(well_id):
+    """
+    Последнее состояние скважины по исходным записям:
+    уровень - по режимным наблюдениям, ОФР (статический уровень), ГИС и бурению;
+    глубина - по ГИС и бурению; тех. состояние - по бурению.
+    """
+    regime = (
+        RegimeMeasurement.objects.filter(well_id=well_id, parameter=RegimeMeasurement.LEVEL)
+        .order_by("-date", "-time_measure")
+        .values_list("date", "value")
+        .first()
+    )
+    drilled = (
+        WellsDrilledData.objects.filter(well_id=well_id)
+        .order_by("-date_end")
+        .prefetch_related("depths", "waterdepths", "conditions")
+        .first()
+    )
+    geophysics = (
+        WellsGeophysics.objects.filter(well_id=well_id)
+        .order_by("-date")
+        .prefetch_related("depths", "waterdepths")
+        .first()
+    )
+    efw = WellsEfw.objects.filter(well_id=well_id).order_by("-date").prefetch_related("waterdepths").first()
+    sample = WellsSample.objects.filter(well_id=well_id).order_by("-date").first()
+
+    def value(obj, related, field):
+        item = first(getattr(obj, related).all()) if obj else None
+        return getattr(item, field) if item else None
+
+    water_depth_date, water_depth = latest(
+        regime or (None, None),
+        (as_date(efw.date) if efw else None, value(efw, "waterdepths", "water_depth")),
+        (geophysics.date if geophysics else None, value(geophysics, "waterdepths", "water_depth")),
+        (drilled.date_end if drilled else None, value(drilled, "waterdepths", "water_depth")),
+    )
+    depth_date, depth = latest(
+        (geophysics.date if geophysics else None, value(geophysics, "depths", "depth")),
+        (drilled.date_end if drilled else None, value(drilled, "depths", "depth")),
+    )
+    condition = value(drilled, "conditions", "condition_id")
+    return dict(
+        water_depth=water_depth,
+        water_depth_date=water_depth_date,
+        depth=depth,
+        depth_date=depth_date,
+        condition_id=condition,
+        condition_date=drilled.date_end if condition else None,
+        last_sample=sample,
+        last_sample_date=sample.date if sample else None,
+        last_efw=efw,
+        last_efw_date=efw.date if efw else None,
+    )
+
+
+def refresh_well_state(well_id):
+    if Wells.objects.filter(pk=well_id).exists():
+        WellsState.objects.update_or_create(well_id=well_id, defaults=compute_state(well_id))
+
+
+class WellStateRefresh:
+    """
+    Скважины соединения, ожидающие обновления состояния после фиксации транзакции.
+    Отложенная функция регистрируется один раз и повторно - только если прежняя могла быть
+    отменена откатом точки сохранения; накопленные скважины при этом не теряются.
+    """
+
+    def __init__(self, using):
+        self.using = using
+        self.well_ids = set()
+        self.atomic = None
+        self.savepoints = None
+
+    def add(self, well_id):
+        connection = transaction.get_connection(self.using)
+        if connection.atomic_blocks[0] is not self.atomic:
+            # Новая транзакция: скважины откаченной транзакции не обновляются
+            self.well_ids.clear()
+            self.atomic, self.savepoints = connection.atomic_blocks[0], None
+        # Блоки без точки сохранения откатываются только вместе с внешним
+        savepoints = tuple(sid for sid in connection.savepoint_ids if sid)
+        if self.savepoints is None or savepoints[: len(self.savepoints)] != self.savepoints:
+            self.savepoints = savepoints
+            transaction.on_commit(self, using=self.using)
+        self.well_ids.add(well_id)
+
+    def __call__(self):
+        well_ids, self.well_ids = self.well_ids, set()
+        self.atomic = self.savepoints = None
+        for well_id in sorted(well_ids):
+            refresh_well_state(well_id)
+
+
+# Реестры отложенного обновления по соединениям потока
+_pending = local()
+
+
+def schedule_well_state(well_id, using=DEFAULT_DB_ALIAS):
+    """
+    Обновление состояния скважины после фиксации текущей транзакции,
+    один раз на скважину, сколько бы замеров ни изменилось.
+    """
+    if well_id is None:
+        return
+    if not transaction.get_connection(using).in_atomic_block:
+        refresh_well_state(well_id)
+        return
+    refresh = getattr(_pending, using, None)
+    if refresh is None:
+        refresh = WellStateRefresh(using)
+        setattr(_pending, using, refresh)
+    refresh.add(well_id)
+
+
+def related_well_id(instance):
+    """Скважина записи с полем well или замера с обобщенной связью (WellsWaterDepth, WellsDepth и др.)"""
+    if hasattr(instance, "well_id"):
+        return instance.well_id
+    model = instance.content_type.model_class()
+    if model is Wells:
+        return instance.object_id
+    if model in (WellsDrilledData, WellsGeophysics, WellsEfw, WellsSample, WellsRegime):
+        return model.objects.filter(pk=instance.object_id).values_list("well_id", flat=True).first()
+    return None
+
+
+def rebuild_well_states(wells=None):
+    """Полный пересчет состояния скважин. Возвращает количество скважин"""
+    wells = Wells.objects.all() if wells is None else wells
+    count = 0
+    for well_id in wells.order_by("pk").values_list("pk", flat=True).iterator():
+        with transaction.atomic():
+            refresh_well_state(well_id)
+        count += 1
+    return count
@@ -1,7 +1,22 @@
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, mixins
+from rest_framework.exceptions import UnsupportedMediaType
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from .models import WellsEfw, WellsRegime
-from .serializers import WellsEfwSerializer, WellsRegimeSerializer
+from .models import Wells, WellsEfw, WellsRegime
+from .serializers import (
+    HydrographQuerySerializer,
+    RegimeExportQuerySerializer,
+    RegimeStatisticsQuerySerializer,
+    WellsEfwSerializer,
+    WellsRegimeSerializer,
+)
+from .utils.export import export_wells, regime_export_rows, stream_csv
+from .utils.hydrograph import HYDROGRAPH_FORMATS, get_hydrograph
+from .utils.ingest import RegimeIngest, csv_rows, ndjson_rows
+from .utils.regime import regime_statistics
 
 
 class WellsRegimeView(
@@ -17,6 +32,29 @@ class WellsRegimeView(
         return self.create(request, *args, **kwargs)
 
 
+class RegimeIngestView(APIView):
+    """
+    Массовая загрузка режимных замеров уровня потоком NDJSON (application/x-ndjson)
+    или CSV (text/csv) с полями well, date, time_measure, water_depth.
+    Наблюдение (well, date) создается или дополняется, замер с тем же временем обновляется.
+    Ответ - сводка загрузки и отклоненные строки с ошибками.
+    """
+
+    formats = {
+        "application/x-ndjson": ndjson_rows,
+        "application/jsonlines": ndjson_rows,
+        "text/csv": csv_rows,
+    }
+
+    def post(self, request, *args, **kwargs):
+        media_type = request.content_type.split(";")[0].strip()
+        if media_type not in self.formats:
+            raise UnsupportedMediaType(media_type)
+        # Тело запроса читается построчно, без загрузки в память целиком
+        lines = (line.decode("utf-8-sig", errors="replace") for line in request.stream or [])
+        return Response(RegimeIngest(request.user).load(self.formats[media_type](lines)))
+
+
 class WellsEfwView(mixins.ListModelMixin, mixins.CreateModelMixin, mixins.UpdateModelMixin, generics.GenericAPIView):
     queryset = WellsEfw.objects.all()
     serializer_class = WellsEfwSerializer
@@ -26,3 +64,75 @@ class WellsEfwView(mixins.ListModelMixin, mixins.CreateModelMixin, mixins.Update
 
     def post(self, request, *args, **kwargs):
         return self.create(request, *args, **kwargs)
+
+
+class RegimeStatisticsView(generics.GenericAPIView):
+    """
+    Статистика уровней подземных вод по режимным наблюдениям:
+    ?wells=1,2,3&granularity=day|month|year&date_from=YYYY-MM-DD&date_till=YYYY-MM-DD.
+    Ряд скважины - список [период, min, mean, max, количество замеров].
+    """
+
+    serializer_class = RegimeStatisticsQuerySerializer
+
+    def get(self, request, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        statistics = regime_statistics(
+            params["wells"], params["granularity"], params.get("date_from"), params.get("date_till")
+        )
+        return Response(
+            {
+                "granularity": params["granularity"],
+                "columns": ["period", "min", "mean", "max", "readings"],
+                "results": [{"well": well_id, "series": series} for well_id, series in statistics.items()],
+            }
+        )
+
+
+class FileResponseMixin:
+    """
+    Представление отдает файл (HttpResponse) независимо от заголовка Accept:
+    рендерер выбирается принудительно и нужен только для ответов с ошибками.
+    """
+
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
+
+
+class RegimeExportView(FileResponseMixin, generics.GenericAPIView):
+    """
+    Выгрузка режимных замеров в CSV потоком:
+    ?wells=1,2,3 | intake=ID | field=ID | polygon=WKT, parameter=all|level|temperature,
+    date_from=YYYY-MM-DD, date_till=YYYY-MM-DD.
+    Строки читаются серверным курсором и отдаются по мере чтения, без сборки файла в памяти.
+    """
+
+    serializer_class = RegimeExportQuerySerializer
+
+    def get(self, request, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        wells = export_wells(params.get("wells"), params.get("intake"), params.get("field"), params.get("polygon"))
+        rows = regime_export_rows(wells, params["parameter"], params.get("date_from"), params.get("date_till"))
+        response = StreamingHttpResponse(stream_csv(rows), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = 'attachment; filename="regime_export.csv"'
+        return response
+
+
+class WellsHydrographView(FileResponseMixin, generics.GenericAPIView):
+    """
+    График режимных наблюдений скважины (уровень и температура): ?image=png|svg.
+    Изображение кэшируется до изменения замеров скважины.
+    """
+
+    serializer_class = HydrographQuerySerializer
+
+    def get(self, request, pk, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        image_format = query.validated_data["image"]
+        well = get_object_or_404(Wells, pk=pk)
+        return HttpResponse(get_hydrograph(well, image_format), content_type=HYDROGRAPH_FORMATS[image_format])